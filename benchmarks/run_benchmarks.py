@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import contextlib
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# reading_pdf and count_keywords import parse from old_files.
+for _path in (REPO_ROOT, os.path.join(REPO_ROOT, "old_files")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import instrumentation
+from benchmarks.synthetic_corpus import generate_corpus, generate_ris
+
+BASELINE_DIR = os.path.join(REPO_ROOT, "benchmarks", "baselines")
+
+@contextlib.contextmanager
+def _quiet():
+    # The pipelines print a line per paper; keep benchmark output readable.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def _rates(seconds, docs, pages):
+    return {
+        "seconds": seconds,
+        "docs_per_sec": docs / seconds if seconds else 0.0,
+        "pages_per_sec": pages / seconds if seconds else 0.0,
+    }
+
+def time_stages(run, *args, **kwargs):
+    """
+    Run an entry point under a fresh instrumentation recorder.
+
+    The stage totals are those the entry point records itself (open, toc,
+    extraction, tokenization, matching, aggregation and so on), merged from
+    every worker, so they always follow the code that actually ran.
+
+    Args:
+        run (callable): The entry point, such as scipaper_classifier.analyze_papers.
+        *args, **kwargs: Passed on to run.
+
+    Returns:
+        tuple: The return value of run, the wall-clock seconds it took and a
+            dictionary with its seconds per stage and its counters.
+    """
+    instrumentation.enable()
+    start = time.perf_counter()
+    try:
+        with _quiet():
+            value = run(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        recorder = instrumentation.disable()
+    stages = {stage: recorder.stage_seconds[stage] for stage in sorted(recorder.stage_seconds)}
+    return value, seconds, {"stages": stages, "counters": dict(recorder.counters)}
+
+def benchmark_analyze_papers(directory, pages, **kwargs):
+    """
+    Time scipaper_classifier.analyze_papers end to end and stage by stage.
+
+    Args:
+        directory (str): The corpus directory.
+        pages (int): Number of pages in the corpus, for pages/sec.
+        **kwargs: Passed on to analyze_papers.
+
+    Returns:
+        dict: seconds, docs_per_sec, pages_per_sec, stages and counters.
+    """
+    from scipaper_classifier import analyze_papers, list_pdf_files
+    _, seconds, recorded = time_stages(analyze_papers, directory, **kwargs)
+    return {**_rates(seconds, len(list_pdf_files(directory)), pages), **recorded}
+
+def benchmark_reading_pdf(directory, pages):
+    """
+    Time reading_pdf.analyze_papers (the DeepLabCut scan) end to end and stage by stage.
+    """
+    import reading_pdf
+    (cited, not_cited, _, _), seconds, recorded = time_stages(reading_pdf.analyze_papers, directory)
+    return {**_rates(seconds, cited + not_cited, pages), **recorded}
+
+def benchmark_count_keywords(ris_path, n_entries, backend="spacy"):
+    """
+    Time old_files/parse.py::count_keywords on a RIS export, end to end and stage by stage.
+    """
+    import parse
+    _, seconds, recorded = time_stages(parse.count_keywords, ris_path, backend=backend)
+    return {"seconds": seconds, "entries_per_sec": n_entries / seconds if seconds else 0.0, **recorded}
+
+def run(n_papers=50, n_entries=500, seed=0, workdir=None, backend="spacy", skip=()):
+    """
+    Generate the synthetic corpus and run every benchmark.
+
+    Args:
+        n_papers (int): Number of synthetic papers.
+        n_entries (int): Number of synthetic RIS entries.
+        seed (int): Random seed of the corpus.
+        workdir (str, optional): Where to write the corpus. Defaults to a temporary directory.
+        backend (str): Matching backend of the classifier.
+        skip (iterable of str): Benchmark names to leave out.
+
+    Returns:
+        dict: The results, keyed by benchmark name, with the corpus settings and environment.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = workdir or tmp
+        corpus_dir = os.path.join(workdir, "papers")
+        corpus = generate_corpus(corpus_dir, n_papers=n_papers, seed=seed)
+        ris_path = os.path.join(workdir, "citations.ris")
+        generate_ris(ris_path, n_entries=n_entries, seed=seed)
+
+        results = {
+            "corpus": corpus,
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        }
+        if "analyze_papers" not in skip:
+            results["analyze_papers"] = benchmark_analyze_papers(corpus_dir, corpus["pages"], backend=backend)
+        if "reading_pdf" not in skip:
+            results["reading_pdf"] = benchmark_reading_pdf(corpus_dir, corpus["pages"])
+        if "count_keywords" not in skip:
+            results["count_keywords"] = benchmark_count_keywords(ris_path, n_entries, backend)
+    return results
+
+def save_baseline(results, name="baseline"):
+    """
+    Save benchmark results as a named baseline under benchmarks/baselines.
+
+    Returns:
+        str: The path of the saved file.
+    """
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, name + ".json")
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+    return path
+
+def _timed_metrics(values):
+    metrics = {"seconds": values["seconds"]}
+    metrics.update({f"stages.{stage}": seconds for stage, seconds in values.get("stages", {}).items()})
+    return metrics
+
+def compare_to_baseline(results, name="baseline", tolerance=0.10):
+    """
+    Compare results with a saved baseline.
+
+    Args:
+        results (dict): Results from run.
+        name (str): The name of the baseline.
+        tolerance (float): Allowed slowdown before a metric counts as a regression.
+
+    Returns:
+        list of tuple: (metric, baseline seconds, current seconds, ratio, regressed) for the
+            total and each stage of every benchmark present in both.
+    """
+    with open(os.path.join(BASELINE_DIR, name + ".json")) as file:
+        baseline = json.load(file)
+    rows = []
+    for benchmark, values in results.items():
+        if benchmark in ("corpus", "environment") or benchmark not in baseline:
+            continue
+        old_metrics = _timed_metrics(baseline[benchmark])
+        for key, new in _timed_metrics(values).items():
+            old = old_metrics.get(key)
+            if not old:
+                continue
+            ratio = new / old
+            rows.append((f"{benchmark}.{key}", old, new, ratio, ratio > 1 + tolerance))
+    return rows
+
+def print_report(results):
+    for benchmark, values in results.items():
+        if benchmark in ("corpus", "environment"):
+            continue
+        print(benchmark)
+        _print_values(values, "  ")
+
+def _print_values(values, indent):
+    for key, value in values.items():
+        if isinstance(value, dict):
+            print(f"{indent}{key}")
+            _print_values(value, indent + "  ")
+        else:
+            print(f"{indent}{key:16s} {value:.4f}" if isinstance(value, float) else f"{indent}{key:16s} {value}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the classifier on a synthetic corpus.")
+    parser.add_argument("--papers", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default="spacy")
+    parser.add_argument("--skip", nargs="*", default=[], help="Benchmarks to leave out.")
+    parser.add_argument("--save", metavar="NAME", help="Save the results as a baseline.")
+    parser.add_argument("--compare", metavar="NAME", help="Compare the results with a saved baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    # The classifier reads the classes file from the working directory.
+    os.chdir(REPO_ROOT)
+    results = run(args.papers, args.entries, args.seed, backend=args.backend, skip=args.skip)
+    print_report(results)
+    if args.save:
+        print("Saved", save_baseline(results, args.save))
+    if args.compare:
+        regressed = False
+        for metric, old, new, ratio, is_regression in compare_to_baseline(results, args.compare, args.tolerance):
+            regressed = regressed or is_regression
+            print(f"{metric:28s} {old:9.4f} -> {new:9.4f}  x{ratio:.2f}{'  REGRESSION' if is_regression else ''}")
+        sys.exit(1 if regressed else 0)
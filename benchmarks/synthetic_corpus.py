@@ -0,0 +1,137 @@
+import os
+import random
+import fitz
+
+FILLER_WORDS = ["the", "of", "and", "we", "were", "data", "analysis", "behavior", "video", "tracking",
+                "pose", "estimation", "network", "trained", "frames", "model", "recorded", "using",
+                "camera", "trials", "session", "movement", "markers", "experiment", "significant",
+                "compared", "between", "groups", "performance", "was", "in", "to", "with", "for"]
+ANIMAL_TERMS = ["mouse", "mice", "rat", "rats", "fly", "flies", "zebrafish", "fish", "macaque", "monkey",
+                "horse", "dog", "cat", "bird", "bee", "ant", "cricket", "octopus", "worm", "pig"]
+METHODS_TITLES = ["Materials and Methods", "Methods", "Methodology"]
+SECTION_TITLES = ["Abstract", "Introduction", "Methods", "Results", "Discussion", "References"]
+
+WORDS_PER_PAGE = 250
+PAGE_RECT = fitz.Rect(50, 90, 545, 790)
+
+def _paragraph(rng, n_words, terms, density):
+    words = []
+    for _ in range(n_words):
+        if rng.random() < density:
+            words.append(rng.choice(terms))
+        else:
+            words.append(rng.choice(FILLER_WORDS))
+    return " ".join(words)
+
+def generate_paper(path, rng, n_pages, with_toc, density, terms=ANIMAL_TERMS, numbered=False, uppercase=False):
+    """
+    Write one synthetic paper.
+
+    Each section starts on a new page under a bold heading. The body mixes
+    filler words with animal terms; one dominant term is drawn per paper so
+    papers have a clear label.
+
+    Args:
+        path (str): Where to write the PDF.
+        rng (random.Random): The random generator.
+        n_pages (int): Number of pages, at least the number of sections.
+        with_toc (bool): If True, add a table of contents (outline).
+        density (float): Probability that a body word is an animal term.
+        terms (list of str): The animal terms to draw from.
+        numbered (bool): If True, number the headings ("2. Methods").
+        uppercase (bool): If True, write the headings in capitals.
+
+    Returns:
+        int: The number of pages written.
+    """
+    titles = list(SECTION_TITLES)
+    titles[2] = rng.choice(METHODS_TITLES)
+    n_pages = max(n_pages, len(titles))
+    # The methods and results sections get most of the extra pages, as in theses.
+    pages_per_section = [1] * len(titles)
+    for _ in range(n_pages - len(titles)):
+        pages_per_section[rng.choice([1, 2, 2, 3, 3, 4])] += 1
+
+    dominant = rng.choice(terms)
+    paper_terms = [dominant] * 4 + rng.sample(terms, 3)
+
+    document = fitz.open()
+    toc = []
+    for number, (title, section_pages) in enumerate(zip(titles, pages_per_section)):
+        heading = title.upper() if uppercase else title
+        if numbered and title not in ("Abstract", "References"):
+            heading = f"{number}. {heading}"
+        for section_page in range(section_pages):
+            page = document.new_page()
+            if section_page == 0:
+                toc.append([1, heading, document.page_count])
+                page.insert_text((50, 70), heading, fontsize=14, fontname="hebo")
+            page.insert_textbox(PAGE_RECT, _paragraph(rng, WORDS_PER_PAGE, paper_terms, density),
+                                fontsize=9, fontname="helv")
+    if with_toc:
+        document.set_toc(toc)
+    document.set_metadata({"title": f"Synthetic study of {dominant} behavior"})
+    document.save(path)
+    page_count = document.page_count
+    document.close()
+    return page_count
+
+def generate_corpus(directory, n_papers=50, seed=0, toc_fraction=0.5, min_pages=6, max_pages=40,
+                    density=0.02, title_hit_fraction=0.3):
+    """
+    Generate a reproducible corpus of synthetic papers.
+
+    Args:
+        directory (str): The output directory, created if needed.
+        n_papers (int): Number of papers.
+        seed (int): Random seed; the same seed always gives the same corpus.
+        toc_fraction (float): Fraction of papers with a table of contents.
+        min_pages (int): Smallest paper length.
+        max_pages (int): Largest paper length.
+        density (float): Probability that a body word is an animal term.
+        title_hit_fraction (float): Fraction of file names that contain an animal term.
+
+    Returns:
+        dict: Corpus statistics: papers, pages and the generation settings.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    total_pages = 0
+    for number in range(n_papers):
+        with_toc = rng.random() < toc_fraction
+        name = f"paper_{number:05d}"
+        if rng.random() < title_hit_fraction:
+            name += "_" + rng.choice(ANIMAL_TERMS) + "_tracking"
+        total_pages += generate_paper(
+            os.path.join(directory, name + ".pdf"), rng,
+            n_pages=rng.randint(min_pages, max_pages), with_toc=with_toc,
+            density=density * rng.uniform(0.5, 1.5),
+            numbered=rng.random() < 0.5, uppercase=rng.random() < 0.3)
+    return {"papers": n_papers, "pages": total_pages, "seed": seed, "toc_fraction": toc_fraction,
+            "density": density}
+
+def generate_ris(path, n_entries=500, seed=0, density=0.05):
+    """
+    Generate a reproducible RIS export with titles and abstracts.
+
+    Args:
+        path (str): Where to write the RIS file.
+        n_entries (int): Number of entries.
+        seed (int): Random seed.
+        density (float): Probability that an abstract word is an animal term.
+
+    Returns:
+        int: The number of entries written.
+    """
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as file:
+        for number in range(n_entries):
+            title_terms = ANIMAL_TERMS if rng.random() < 0.4 else []
+            title = _paragraph(rng, 10, title_terms or ["behavior"], 0.1 if title_terms else 0)
+            abstract = _paragraph(rng, 150, ANIMAL_TERMS, density)
+            file.write("TY  - JOUR\n")
+            file.write(f"TI  - <i>{title.capitalize()}</i>\n")
+            file.write(f"AU  - Author, Number {number}\n")
+            file.write(f"AB  - {abstract}\n")
+            file.write("ER  - \n\n")
+    return n_entries
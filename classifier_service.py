@@ -0,0 +1,227 @@
+import json
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from scipaper_classifier import (load_nlp_and_matcher, match_texts, get_top_keyword, classify_pdf_bytes)
+
+# The model and matcher of a service worker, loaded once per process.
+_state = {}
+
+def _init_service_worker(classes_path, fast, backend, options):
+    _state["nlp"], _state["matcher"] = load_nlp_and_matcher(classes_path, fast, backend)
+    _state["options"] = options
+
+def _warm_up():
+    return True
+
+def _classify_text_batch(texts):
+    # One nlp.pipe call for every text of the batch.
+    results = []
+    for matches in match_texts(texts, _state["matcher"], _state["nlp"]):
+        results.append({"top_keyword": get_top_keyword(matches), "source": "text", "counts": Counter(matches)})
+    return results
+
+class ItemError(Exception):
+    """
+    The failure of one item of a batch, such as an upload that is not a PDF.
+    The other items of the batch still get their results.
+    """
+
+def _classify_pdf(data, filename):
+    try:
+        return classify_pdf_bytes(data, _state["matcher"], _state["nlp"], filename, **_state["options"])
+    except Exception as e:
+        raise ItemError(f"{type(e).__name__}: {e}") from None
+
+class MicroBatcher:
+    """
+    Group requests that arrive close together into one call of run_batch.
+
+    A batch is sent once it holds max_batch items or window seconds after its
+    first item, whichever comes first, so a lone request waits at most window.
+
+    Args:
+        run_batch (callable): Called in the executor with a list of items; returns
+            one result per item. A result that is an ItemError is raised to the
+            submitter of that item only.
+        executor (concurrent.futures.Executor): Where batches run.
+        window (float): Seconds to wait for more items.
+        max_batch (int): Largest batch.
+    """
+    def __init__(self, run_batch, executor, window=0.002, max_batch=64):
+        self.run_batch = run_batch
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self._items = []
+        self._timer = None
+
+    async def submit(self, item):
+        """
+        Queue an item and wait for its result.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append((item, future))
+        if len(self._items) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._items = self._items, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.run_batch, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, ItemError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+class ClassifierService:
+    """
+    Long-running classifier that keeps the model and matcher warm.
+
+    Texts are micro-batched and PDFs sent one by one to a pool of worker
+    processes; the event loop only does I/O. A PDF is enough work on its own,
+    and batching PDFs would read a batch serially in one worker while the
+    others sit idle. With the fork start method the model is loaded once in
+    this process and shared by the workers.
+
+    Args:
+        classes_path (str): The path to the classes file.
+        backend (str): "spacy" or "aho-corasick".
+        fast (bool): Load only the tokenizer; see load_nlp_and_matcher.
+        workers (int): Number of worker processes.
+        window (float): Seconds a request may wait for others to batch with.
+        max_batch (int): Largest number of texts per batch.
+        max_pages (int, optional): Page budget per document.
+        max_chars (int, optional): Character budget per document.
+        detect_headings (bool): See plan_pdf_texts.
+    """
+    def __init__(self, classes_path="classes", backend="spacy", fast=True, workers=2, window=0.002, max_batch=64,
+                 max_pages=None, max_chars=None, detect_headings=True):
+        options = {"max_pages": max_pages, "max_chars": max_chars, "detect_headings": detect_headings}
+        initargs = (classes_path, fast, backend, options)
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            _init_service_worker(*initargs)
+        else:
+            context = multiprocessing.get_context()
+        self.executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_service_worker,
+                                            initargs=initargs)
+        # Start every worker now, so the first requests do not pay for it.
+        for future in [self.executor.submit(_warm_up) for _ in range(workers)]:
+            future.result()
+        self.texts = MicroBatcher(_classify_text_batch, self.executor, window, max_batch)
+
+    async def classify_text(self, text):
+        """
+        Tag a raw text, such as a title or an abstract.
+
+        Returns:
+            dict: The keys top_keyword, source ("text") and counts.
+        """
+        return await self.texts.submit(text)
+
+    async def classify_pdf(self, data, filename=None):
+        """
+        Tag a PDF given as bytes; see classify_pdf_bytes.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _classify_pdf, data, filename)
+
+    def close(self):
+        self.executor.shutdown()
+
+    async def handle(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive:
+        #   POST /classify/text   body: UTF-8 text
+        #   POST /classify/pdf    body: PDF bytes, optional X-Filename header
+        #   GET  /health
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, result = await self._route(method, path, headers, body)
+                payload = json.dumps(result).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, headers, body):
+        try:
+            if method == "GET" and path == "/health":
+                return "200 OK", {"status": "ok"}
+            if method == "POST" and path == "/classify/text":
+                return "200 OK", await self.classify_text(body.decode("utf-8"))
+            if method == "POST" and path == "/classify/pdf":
+                return "200 OK", await self.classify_pdf(body, headers.get("x-filename"))
+            return "404 Not Found", {"error": f"No route for {method} {path}"}
+        except ItemError as e:
+            return "422 Unprocessable Entity", {"error": str(e)}
+        except Exception as e:
+            return "500 Internal Server Error", {"error": f"{type(e).__name__}: {e}"}
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_socket=None):
+        """
+        Serve HTTP requests until cancelled, on a TCP port or a Unix socket.
+        """
+        if unix_socket:
+            server = await asyncio.start_unix_server(self.handle, unix_socket)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the classifier over HTTP with a warm model.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", help="Listen on a Unix socket instead of a TCP port.")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--backend", default="spacy")
+    parser.add_argument("--classes", dest="classes_path", default="classes")
+    args = parser.parse_args()
+    service = ClassifierService(args.classes_path, args.backend, workers=args.workers)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix_socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -0,0 +1,194 @@
+import os
+import re
+import hashlib
+import random
+from collections import defaultdict
+import instrumentation
+from input_sources import content_hash, open_pdf, source_stat
+
+# File name markers of supplementary material, as checked by isSupplementary.
+SUPPLEMENT_KEYWORDS = ["_supplement"]
+
+SHINGLE_WORDS = 5
+NUM_HASHES = 64
+# The signature is split into bands of rows; papers sharing any band are
+# compared. 16 bands of 4 rows find pairs above about 0.6 similarity.
+BANDS = 16
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+_WORD = re.compile(r"\w+")
+
+def supplement_stem(filename):
+    """
+    Return the part of a supplementary file name before its marker, such as
+    "smith2020" for "smith2020_supplement_1.pdf", or None for other files.
+    """
+    for keyword in SUPPLEMENT_KEYWORDS:
+        position = filename.find(keyword)
+        if position != -1:
+            return filename[:position]
+    return None
+
+def first_page_signature(file_path):
+    """
+    Compute the MinHash signature of the word shingles of a PDF's first page.
+
+    Args:
+        file_path (str): The path to the PDF file or archive member.
+
+    Returns:
+        tuple of int: NUM_HASHES values, or None if the first page has no text.
+    """
+    with instrumentation.stage("open"):
+        document = open_pdf(file_path)
+    with document:
+        if len(document) == 0:
+            return None
+        with instrumentation.stage("extraction"):
+            words = _WORD.findall(document.load_page(0).get_text("text").lower())
+    if not words:
+        return None
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+              for shingle in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def similarity(signature, other):
+    """
+    Estimate the Jaccard similarity of two first pages from their signatures.
+    """
+    return sum(x == y for x, y in zip(signature, other)) / len(signature)
+
+class DedupPlan:
+    """
+    The outcome of plan_unique: which files to classify and which to skip.
+
+    Attributes:
+        unique (list of tuple): (filename, file_path) pairs to classify, in input order.
+        duplicates (dict): Paths of skipped copies mapped to the path of the kept copy.
+        supplements (dict): Paths of supplementary files mapped to the path of their
+            main paper, or None if it is not in the corpus.
+        saved_bytes (int): Total size of the files that will not be read.
+    """
+    def __init__(self):
+        self.unique = []
+        self.duplicates = {}
+        self.supplements = {}
+        self.saved_bytes = 0
+
+    def report(self):
+        """
+        Return a one-line summary of the skipped files.
+        """
+        return (f"Unique papers: {len(self.unique)}, duplicates skipped: {len(self.duplicates)}, "
+                f"supplements skipped: {len(self.supplements)} "
+                f"({self.saved_bytes / (1024 * 1024):.1f} MB not read)")
+
+def _describe(error):
+    return f"{type(error).__name__}: {error}"
+
+def plan_unique(files, near_duplicates=True, threshold=0.9, skip=(), signatures=None):
+    """
+    Find duplicate and supplementary files before classification.
+
+    Exact copies are found by content hash, which is only computed for files
+    whose size is shared by another file. With near_duplicates, re-downloads
+    that differ in bytes (another watermark or download date) are found by
+    comparing MinHash signatures of their first page. Supplementary files are
+    linked to the paper whose file name they extend. A file that cannot be
+    read is reported and kept as unique, so the classification decides what
+    to do with it.
+
+    Args:
+        files (list of tuple): (filename, file_path) pairs, as from list_pdf_files.
+        near_duplicates (bool): If True, also compare first pages. This opens
+            every file and reads its first page, unless signatures are given.
+        threshold (float): Estimated first-page similarity above which two
+            papers are the same.
+        skip (container of str): Paths that must not be read, such as quarantined
+            files. They are kept as unique.
+        signatures (dict, optional): Paths mapped to their first_page_signature,
+            computed beforehand; paths that are missing are kept as unique.
+
+    Returns:
+        DedupPlan: The plan; the first file of each group is the one kept.
+    """
+    plan = DedupPlan()
+    sizes = {file_path: source_stat(file_path)[0] for filename, file_path in files}
+
+    candidates = []
+    for filename, file_path in files:
+        if supplement_stem(filename) is None:
+            candidates.append((filename, file_path))
+    stems = {os.path.splitext(filename)[0]: file_path for filename, file_path in candidates}
+    for filename, file_path in files:
+        stem = supplement_stem(filename)
+        if stem is not None:
+            stem = stem.rstrip("_- .")
+            main = stems.get(stem)
+            if main is None and stem:
+                matches = sorted(name for name in stems if name.startswith(stem))
+                main = stems[matches[0]] if matches else None
+            plan.supplements[file_path] = main
+            plan.saved_bytes += sizes[file_path]
+
+    by_size = defaultdict(list)
+    for filename, file_path in candidates:
+        by_size[sizes[file_path]].append(file_path)
+    kept_by_hash = {}
+    for filename, file_path in candidates:
+        if len(by_size[sizes[file_path]]) < 2 or file_path in skip:
+            continue
+        try:
+            digest = content_hash(file_path)
+        except Exception as e:
+            print("Could not read", file_path, _describe(e))
+            continue
+        if digest in kept_by_hash:
+            plan.duplicates[file_path] = kept_by_hash[digest]
+        else:
+            kept_by_hash[digest] = file_path
+
+    if near_duplicates:
+        buckets = defaultdict(list)
+        rows = NUM_HASHES // BANDS
+        for filename, file_path in candidates:
+            if file_path in plan.duplicates or file_path in skip:
+                continue
+            if signatures is not None:
+                signature = signatures.get(file_path)
+            else:
+                try:
+                    signature = first_page_signature(file_path)
+                except Exception as e:
+                    print("Could not read", file_path, _describe(e))
+                    continue
+            if signature is None:
+                continue
+            kept = None
+            for band in range(BANDS):
+                key = (band, signature[band * rows:(band + 1) * rows])
+                for other_path, other_signature in buckets[key]:
+                    if similarity(signature, other_signature) >= threshold:
+                        kept = other_path
+                        break
+                if kept is not None:
+                    break
+            if kept is not None:
+                plan.duplicates[file_path] = kept
+                continue
+            for band in range(BANDS):
+                buckets[(band, signature[band * rows:(band + 1) * rows])].append((file_path, signature))
+
+    # A kept copy may itself be a near duplicate of an earlier paper.
+    for file_path, kept in plan.duplicates.items():
+        while kept in plan.duplicates:
+            kept = plan.duplicates[kept]
+        plan.duplicates[file_path] = kept
+    for filename, file_path in candidates:
+        if file_path in plan.duplicates:
+            plan.saved_bytes += sizes[file_path]
+        else:
+            plan.unique.append((filename, file_path))
+    return plan
@@ -0,0 +1,141 @@
+import os
+import tarfile
+import zipfile
+import hashlib
+
+# Separates an archive path from the name of a member inside it, as in
+# "corpus.zip::papers/mouse_tracking.pdf".
+MEMBER_SEPARATOR = "::"
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# (process ID, archive path) -> open ZipFile or TarFile. Keyed by process so a
+# forked worker never shares a file position with its parent.
+_archives = {}
+
+def is_archive(path):
+    """
+    Return True if a path names a zip or tar archive.
+    """
+    return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+def split_member(path):
+    """
+    Split a source path into the archive path and the member name.
+
+    Returns:
+        tuple: (archive path, member name), or (path, None) for a plain file.
+    """
+    archive, separator, member = path.partition(MEMBER_SEPARATOR)
+    return (archive, member) if separator else (path, None)
+
+def _open_tar(path):
+    # Members are read in any order, which a compressed tar can only do by 
+    # decompressing from its start for every member.
+    try:
+        return tarfile.open(path, "r:")
+    except tarfile.ReadError:
+        # Raises ReadError again if it is no tar archive at all.
+        tarfile.open(path).close()
+        raise ValueError(f"{path} is a compressed tar archive, whose members can only be read in order. "
+                         f"Decompress it to a plain .tar (e.g. gunzip) or use a zip archive.") from None
+
+def _archive(path):
+    key = (os.getpid(), os.path.abspath(path))
+    archive = _archives.get(key)
+    if archive is None:
+        archive = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else _open_tar(path)
+        _archives[key] = archive
+    return archive
+
+def close_archives():
+    """
+    Close the archives opened by this process.
+    """
+    for (pid, path), archive in list(_archives.items()):
+        if pid == os.getpid():
+            archive.close()
+            del _archives[(pid, path)]
+
+def list_pdfs(source):
+    """
+    List the PDF files of a directory or an archive.
+
+    Args:
+        source (str): A directory, or a zip or tar archive.
+
+    Returns:
+        list of tuple: (filename, path) pairs. Directories are listed in os.listdir
+            order and archives in member order. The path of an archive member is
+            "archive::member" and is accepted by every function of this module.
+
+    Raises:
+        ValueError: If source is a compressed tar archive (.tar.gz, .tar.bz2, ...), 
+            which cannot be read out of order without decompressing it again and again.
+    """
+    if not is_archive(source):
+        return [(filename, os.path.join(source, filename))
+                for filename in os.listdir(source) if filename.endswith(".pdf")]
+    archive = _archive(source)
+    if isinstance(archive, zipfile.ZipFile):
+        names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    else:
+        names = [info.name for info in archive.getmembers() if info.isfile()]
+    return [(os.path.basename(name), source + MEMBER_SEPARATOR + name)
+            for name in names if name.endswith(".pdf")]
+
+def read_bytes(path):
+    """
+    Return the content of a file or archive member.
+    """
+    archive_path, member = split_member(path)
+    if member is None:
+        with open(path, "rb") as file:
+            return file.read()
+    archive = _archive(archive_path)
+    if isinstance(archive, zipfile.ZipFile):
+        return archive.read(member)
+    with archive.extractfile(member) as file:
+        return file.read()
+
+def source_stat(path):
+    """
+    Return the size and modification time of a file or archive member.
+
+    Returns:
+        tuple: (size in bytes, modification time as a POSIX timestamp).
+    """
+    archive_path, member = split_member(path)
+    if member is None:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+    archive = _archive(archive_path)
+    if isinstance(archive, zipfile.ZipFile):
+        # Zip timestamps carry no time zone, so the archive's own mtime is used.
+        return archive.getinfo(member).file_size, os.stat(archive_path).st_mtime
+    info = archive.getmember(member)
+    return info.size, float(info.mtime)
+
+def content_hash(path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 digest of a file or archive member.
+    """
+    digest = hashlib.sha256()
+    archive_path, member = split_member(path)
+    if member is None:
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(chunk_size), b""):
+                digest.update(chunk)
+    else:
+        digest.update(read_bytes(path))
+    return digest.hexdigest()
+
+def open_pdf(path):
+    """
+    Open a PDF file or archive member with fitz. Members are read into memory
+    and opened as a stream, so nothing is unpacked to disk.
+    """
+    import fitz
+    archive_path, member = split_member(path)
+    if member is None:
+        return fitz.open(path)
+    return fitz.open(stream=read_bytes(path), filetype="pdf")
@@ -0,0 +1,239 @@
+import json
+import time
+import heapq
+import itertools
+import contextlib
+from collections import defaultdict
+
+# Upper bounds, in seconds, of the stage histogram buckets.
+BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, float("inf")]
+
+# The active recorder, or None when instrumentation is off. Every hook checks
+# this first and returns at once, so disabled instrumentation costs one global
+# lookup per call.
+_recorder = None
+_null_context = contextlib.nullcontext()
+
+class Recorder:
+    """
+    Collects stage timings, counters and per-document records.
+
+    Args:
+        keep_documents (int): Number of slowest documents to keep for the report.
+    """
+    def __init__(self, keep_documents=100):
+        self.keep_documents = keep_documents
+        self.stage_seconds = defaultdict(float)
+        self.stage_calls = defaultdict(int)
+        self.histograms = defaultdict(lambda: [0] * len(BUCKETS))
+        self.counters = defaultdict(int)
+        self.paths = defaultdict(int)
+        self._documents = []
+        self._tiebreak = itertools.count()
+        self._current = None
+
+    def add_stage(self, stage, seconds):
+        self.stage_seconds[stage] += seconds
+        self.stage_calls[stage] += 1
+        histogram = self.histograms[stage]
+        for number, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram[number] += 1
+                break
+        if self._current is not None:
+            stages = self._current["stages"]
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def add_document(self, record):
+        entry = (record["seconds"], next(self._tiebreak), record)
+        if len(self._documents) < self.keep_documents:
+            heapq.heappush(self._documents, entry)
+        else:
+            heapq.heappushpop(self._documents, entry)
+
+    def slowest(self, n=10):
+        """
+        Return the n slowest documents, slowest first.
+
+        Returns:
+            list of dict: Records with the keys document, seconds, path and stages.
+        """
+        return [record for _, _, record in heapq.nlargest(n, self._documents)]
+
+    def snapshot(self):
+        """
+        Return everything recorded as a JSON-serializable dictionary.
+        """
+        return {
+            "stages": {stage: {"seconds": self.stage_seconds[stage], "calls": self.stage_calls[stage],
+                               "buckets": list(self.histograms[stage])}
+                       for stage in self.stage_seconds},
+            "counters": dict(self.counters),
+            "paths": dict(self.paths),
+            "documents": [record for _, _, record in self._documents],
+        }
+
+    def merge(self, snapshot):
+        """
+        Add a snapshot, typically taken in a worker process, to this recorder.
+        """
+        for stage, values in snapshot["stages"].items():
+            self.stage_seconds[stage] += values["seconds"]
+            self.stage_calls[stage] += values["calls"]
+            histogram = self.histograms[stage]
+            for number, count in enumerate(values["buckets"]):
+                histogram[number] += count
+        for name, value in snapshot["counters"].items():
+            self.counters[name] += value
+        for name, value in snapshot["paths"].items():
+            self.paths[name] += value
+        for record in snapshot["documents"]:
+            self.add_document(record)
+
+    def to_json(self, indent=2):
+        """
+        Export the recorded metrics, with the slowest documents first, as JSON.
+        """
+        data = self.snapshot()
+        data["documents"] = self.slowest(len(self._documents))
+        return json.dumps(data, indent=indent, sort_keys=True)
+
+    def to_prometheus(self, prefix="scipaper"):
+        """
+        Export the recorded metrics in the Prometheus text exposition format.
+        """
+        lines = [f"# HELP {prefix}_stage_seconds Time spent in each pipeline stage.",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        for stage in sorted(self.stage_seconds):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, self.histograms[stage]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {self.stage_seconds[stage]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {self.stage_calls[stage]}')
+        lines += [f"# HELP {prefix}_events_total Pages, characters, cache hits and other counts.",
+                  f"# TYPE {prefix}_events_total counter"]
+        for name in sorted(self.counters):
+            lines.append(f'{prefix}_events_total{{name="{name}"}} {self.counters[name]}')
+        lines += [f"# HELP {prefix}_documents_total Documents by the path taken to classify them.",
+                  f"# TYPE {prefix}_documents_total counter"]
+        for path in sorted(self.paths):
+            lines.append(f'{prefix}_documents_total{{path="{path}"}} {self.paths[path]}')
+        return "\n".join(lines) + "\n"
+
+    def report(self, n=10):
+        """
+        Return a plain-text summary: time per stage, counters and the n slowest documents.
+        """
+        lines = ["Stage                 seconds    calls"]
+        for stage in sorted(self.stage_seconds, key=self.stage_seconds.get, reverse=True):
+            lines.append(f"{stage:18s} {self.stage_seconds[stage]:10.3f} {self.stage_calls[stage]:8d}")
+        for name in sorted(self.counters):
+            lines.append(f"{name}: {self.counters[name]}")
+        for path in sorted(self.paths):
+            lines.append(f"path {path}: {self.paths[path]}")
+        lines.append(f"Slowest {n} documents:")
+        for record in self.slowest(n):
+            stages = ", ".join(f"{stage} {seconds:.3f}" for stage, seconds in
+                               sorted(record["stages"].items(), key=lambda item: -item[1]))
+            lines.append(f"{record['seconds']:8.3f}s  {record['path'] or '-':8s} {record['document']}  ({stages})")
+        return "\n".join(lines)
+
+class _Stage:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.add_stage(self.name, time.perf_counter() - self.start)
+
+class _Document:
+    __slots__ = ("recorder", "record", "outer", "start")
+
+    def __init__(self, recorder, document):
+        self.recorder = recorder
+        self.record = {"document": document, "seconds": 0.0, "path": None, "stages": {}}
+
+    def __enter__(self):
+        self.outer = self.recorder._current
+        self.recorder._current = self.record
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.record["seconds"] = time.perf_counter() - self.start
+        self.recorder._current = self.outer
+        self.recorder.add_document(self.record)
+
+def enable(keep_documents=100):
+    """
+    Turn instrumentation on with a fresh recorder.
+
+    Returns:
+        Recorder: The active recorder.
+    """
+    global _recorder
+    _recorder = Recorder(keep_documents)
+    return _recorder
+
+def disable():
+    """
+    Turn instrumentation off.
+
+    Returns:
+        Recorder: The recorder that was active, or None.
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+def enabled():
+    return _recorder is not None
+
+def get_recorder():
+    return _recorder
+
+def stage(name):
+    """
+    Time a block of code as a pipeline stage:
+
+        with instrumentation.stage("extraction"):
+            ...
+    """
+    if _recorder is None:
+        return _null_context
+    return _Stage(_recorder, name)
+
+def document(name):
+    """
+    Mark a block as the processing of one document, for the slowest-documents report.
+    """
+    if _recorder is None:
+        return _null_context
+    return _Document(_recorder, name)
+
+def count(name, value=1):
+    """
+    Add value to a counter, such as pages, chars or cache_hits.
+    """
+    if _recorder is None:
+        return
+    _recorder.counters[name] += value
+
+def record_path(path):
+    """
+    Record which path was taken for the current document: title, toc, layout, fallback, 
+    skip, or cache when its text came from the text cache.
+    """
+    if _recorder is None:
+        return
+    _recorder.paths[path] += 1
+    if _recorder._current is not None:
+        _recorder._current["path"] = path
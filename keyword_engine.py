@@ -0,0 +1,247 @@
+import re
+from collections import deque
+
+
+def load_terms(classes_path="classes"):
+    """
+    Read and normalize the vocabulary of a classes file.
+
+    Surrounding whitespace is removed, runs of inner whitespace are collapsed
+    to one space and duplicates are dropped, keeping the first occurrence.
+
+    Args:
+        classes_path (str): The path to the file with one term per line.
+
+    Returns:
+        list of str: The normalized terms.
+    """
+    terms = []
+    seen = set()
+    with open(classes_path, "r") as file:
+        for line in file:
+            term = " ".join(line.split())
+            if term and term not in seen:
+                seen.add(term)
+                terms.append(term)
+    return terms
+
+def _is_word_char(ch):
+    return ch.isalnum()
+
+# A reduced copy of the punctuation rules of spaCy's English tokenizer, used to
+# decide where tokens start and end inside a whitespace-separated chunk.
+_QUOTES = "'\"”“`‘´’‚,„»«「」『』（）〔〕【】《》〈〉⟦⟧"
+_PUNCT = "…,:;!?¿؟¡()[]{}<>_#*&。？！，、；：～·।،۔؛٪"
+_PREFIX_CHARS = set("§%=—–…$£€¥฿₽₹₩₪₫₱₴₦" + _PUNCT + _QUOTES)
+_SUFFIX_CHARS = set("—–…" + _PUNCT + _QUOTES)
+_SUFFIX_DOT_AFTER = set("%²-+" + _PUNCT + _QUOTES)
+_INFIX = re.compile(
+    r"\.\.+|…"
+    r"|(?<=[0-9])[+\-*^](?=[0-9-])"
+    r"|(?<=[a-z" + _QUOTES + r"])\.(?=[A-Z" + _QUOTES + r"])"
+    r"|(?<=[^\W\d_]),(?=[^\W\d_])"
+    r"|(?<=[^\W_])(?:---|--|——|-|–|—|~)(?=[^\W\d_])"
+    r"|(?<=[^\W_])[:<>=/](?=[^\W\d_])")
+# spaCy's URL pattern: chunks that look like a URL or an e-mail address are
+# one token. The top-level domain must be lower case, which is checked apart.
+_URL = re.compile(
+    r"(?:[\w+\-.]{2,}://)?(?:\S+(?::\S*)?@)?"
+    r"(?:(?:[A-Za-z0-9\u00a1-\uffff][A-Za-z0-9\u00a1-\uffff_-]{0,62})?[A-Za-z0-9\u00a1-\uffff]\.)+"
+    r"([^\W\d_]{2,63})(?::\d{2,5})?(?:[/?#]\S*)?$")
+
+def _is_url(chunk, start, end):
+    match = _URL.match(chunk, start, end)
+    return match is not None and match.group(1).islower()
+
+def _prefix_length(chunk, start, end):
+    if chunk.startswith("..", start):
+        size = 2
+        while start + size < end and chunk[start + size] == ".":
+            size += 1
+        return size
+    for currency in ("US$", "C$", "A$"):
+        if chunk.startswith(currency, start, end):
+            return len(currency)
+    ch = chunk[start]
+    if ch in _PREFIX_CHARS or (ch == "+" and not (start + 1 < end and chunk[start + 1].isdigit())):
+        return 1
+    return 0
+
+def _suffix_length(chunk, start, end):
+    if end - start >= 2 and chunk[end - 1] in "sS" and chunk[end - 2] in "'’":
+        return 2
+    ch = chunk[end - 1]
+    if ch == ".":
+        size = 1
+        while end - size > start and chunk[end - size - 1] == ".":
+            size += 1
+        if size > 1:
+            return size
+        before = chunk[end - 2] if end - 2 >= start else ""
+        if before and (before.islower() or before.isdigit() or before in _SUFFIX_DOT_AFTER):
+            return 1
+        if end - 3 >= start and before.isupper() and chunk[end - 3].isupper():
+            return 1
+        return 0
+    return 1 if ch in _SUFFIX_CHARS else 0
+
+def token_boundaries(chunk):
+    """
+    Find the token boundaries of a chunk of text without whitespace, the way
+    spaCy's English tokenizer splits it.
+
+    Leading and trailing punctuation is split off as in spaCy, and the rest is
+    split on spaCy's infixes (hyphens and slashes between letters, commas
+    between letters, ellipses and so on) unless it looks like a URL. Unlike
+    spaCy, tokenizer exceptions are not applied, so contractions such as
+    "cannot" stay one token.
+
+    Args:
+        chunk (str): The chunk.
+
+    Returns:
+        set of int: The offsets at which a token starts or ends, including 0 and len(chunk).
+    """
+    start, end = 0, len(chunk)
+    boundaries = {start, end}
+    while start < end:
+        prefix = _prefix_length(chunk, start, end)
+        suffix = _suffix_length(chunk, start + prefix, end) if start + prefix < end else 0
+        if not prefix and not suffix:
+            break
+        start += prefix
+        end -= suffix
+        boundaries.update((start, end))
+    if start < end and not _is_url(chunk, start, end):
+        for match in _INFIX.finditer(chunk, start, end):
+            boundaries.update(match.span())
+    return boundaries
+
+class KeywordMatcher:
+    """
+    spaCy-free phrase matcher built on an Aho-Corasick automaton.
+
+    The text is scanned once, and a hit is kept only if it starts and ends on a
+    token boundary, so "ant" does not match inside "ants" or "elephant". Token
+    boundaries follow spaCy's English tokenizer (see token_boundaries): "rat-2",
+    "e.g.rat" and URLs such as "http://rat.org/mouse" are single tokens, while
+    "rat-like" and "mice/rats" are split. Like the spaCy PhraseMatcher on ORTH,
+    matching is case-sensitive and a space in a term only matches a single
+    space in the text.
+
+    Args:
+        terms (iterable of str): The phrases to match.
+    """
+    def __init__(self, terms):
+        self.terms = list(terms)
+        # Node 0 is the root. goto[n] maps a character to the next node,
+        # fail[n] is the longest proper suffix that is also a node, and
+        # output[n] lists the lengths of the terms ending at n.
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for term in self.terms:
+            self._add(term)
+        self._build_failure_links()
+
+    def _add(self, term):
+        node = 0
+        for ch in term:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = nxt
+        if len(term) not in self.output[node]:
+            self.output[node].append(len(term))
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                fail = self.fail[node]
+                while fail and ch not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[nxt] = self.goto[fail].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def find(self, text):
+        """
+        Find all term occurrences that fall on token boundaries.
+
+        Args:
+            text (str): The text to scan.
+
+        Returns:
+            list of tuple: (start, end) character offsets, ordered by start and then end,
+                which is the order the spaCy PhraseMatcher reports matches in.
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        matches = []
+        node = 0
+        length = len(text)
+        chunks = {}
+
+        def on_boundary(position):
+            # Whitespace always separates tokens; next to punctuation the
+            # chunk around the position is tokenized, once per chunk.
+            if position == 0 or position == length or text[position - 1].isspace() or text[position].isspace():
+                return True
+            chunk_start = position
+            while chunk_start and not text[chunk_start - 1].isspace():
+                chunk_start -= 1
+            boundaries = chunks.get(chunk_start)
+            if boundaries is None:
+                chunk_end = position
+                while chunk_end < length and not text[chunk_end].isspace():
+                    chunk_end += 1
+                boundaries = chunks[chunk_start] = token_boundaries(text[chunk_start:chunk_end])
+            return position - chunk_start in boundaries
+
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node]:
+                end = i + 1
+                if end < length and _is_word_char(text[end]) and _is_word_char(ch):
+                    continue
+                if end < length and not text[end].isspace() and not on_boundary(end):
+                    continue
+                for size in output[node]:
+                    start = end - size
+                    if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                        continue
+                    if start == 0 or text[start - 1].isspace() or on_boundary(start):
+                        matches.append((start, end))
+        matches.sort()
+        return matches
+
+    def match(self, text):
+        """
+        Match the terms in a text.
+
+        Args:
+            text (str): The text in which phrases will be matched.
+
+        Returns:
+            list of str: A list of matched phrases found in the input text.
+        """
+        return [text[start:end] for start, end in self.find(text)]
+
+def load_keyword_matcher(classes_path="classes"):
+    """
+    Build a KeywordMatcher from the terms of a classes file.
+
+    Args:
+        classes_path (str): The path to the file with one term per line.
+
+    Returns:
+        KeywordMatcher: The matcher.
+    """
+    return KeywordMatcher(load_terms(classes_path))
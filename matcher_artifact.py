@@ -0,0 +1,233 @@
+import os
+import sys
+import pickle
+import hashlib
+import tempfile
+from keyword_engine import KeywordMatcher, load_terms
+
+# Bump when the artifact layout changes; older artifacts are then rebuilt.
+ARTIFACT_VERSION = 2
+MODEL_NAME = "en_core_web_sm"
+
+# Components of en_core_web_sm. The PhraseMatcher matches on ORTH, which only
+# the tokenizer sets, so fast mode excludes all of them.
+PIPELINE_COMPONENTS = ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
+
+BACKENDS = ["spacy", "aho-corasick"]
+
+# (classes path, backend, fast) -> (classes stat signature, nlp, matcher)
+_matchers = {}
+
+def classes_hash(classes_path):
+    """
+    Compute the SHA-256 digest of a classes file.
+
+    Args:
+        classes_path (str): The path to the classes file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    with open(classes_path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def default_artifact_dir(classes_path):
+    """
+    Return the directory where artifacts for a classes file are kept:
+    a .matcher_cache directory next to it.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(classes_path)), ".matcher_cache")
+
+def artifact_path(classes_path, backend, artifact_dir=None):
+    """
+    Return the path of the artifact for a classes file and backend. The name
+    contains the hash of the classes file, so editing the file makes the
+    old artifact unreachable.
+    """
+    if artifact_dir is None:
+        artifact_dir = default_artifact_dir(classes_path)
+    name = f"{backend}-v{ARTIFACT_VERSION}-{classes_hash(classes_path)[:16]}.pkl"
+    return os.path.join(artifact_dir, name)
+
+def load_nlp(fast=True):
+    """
+    Load en_core_web_sm, with only the tokenizer when fast is True.
+    """
+    import spacy
+    if fast:
+        return spacy.load(MODEL_NAME, exclude=PIPELINE_COMPONENTS)
+    return spacy.load(MODEL_NAME)
+
+def model_version():
+    """
+    Return the version of the installed MODEL_NAME, which may also be the path
+    of a model directory, or None if it cannot be found without loading it.
+    """
+    import spacy
+    version = spacy.util.get_package_version(MODEL_NAME)
+    if version is None and os.path.isdir(MODEL_NAME):
+        version = spacy.util.load_meta(os.path.join(MODEL_NAME, "meta.json")).get("version")
+    return version
+
+def _tokenizer_nlp(artifact):
+    # A blank pipeline of the model's language with the model's tokenizer, 
+    # which is all fast mode runs, without loading the model itself.
+    import spacy
+    nlp = spacy.blank(artifact["lang"])
+    nlp.tokenizer.from_bytes(artifact["tokenizer"])
+    return nlp
+
+def _spacy_matcher(nlp, patterns):
+    from spacy.matcher import PhraseMatcher
+    matcher = PhraseMatcher(nlp.vocab)
+    matcher.add("ANIMAL", patterns)
+    return matcher
+
+def build_artifact(classes_path="classes", backend="spacy", artifact_dir=None):
+    """
+    Compile the vocabulary of a classes file into an on-disk artifact.
+
+    For the spaCy backend the artifact holds the model's tokenizer and the
+    tokenized patterns as a DocBin, so fast mode loads neither the model nor
+    the vocabulary's tokenization. For the aho-corasick backend it holds the
+    whole automaton.
+
+    Args:
+        classes_path (str): The path to the file with one term per line.
+        backend (str): "spacy" or "aho-corasick".
+        artifact_dir (str, optional): Where to write the artifact. Defaults to
+            default_artifact_dir(classes_path).
+
+    Returns:
+        str: The path of the written artifact.
+    """
+    terms = load_terms(classes_path)
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "backend": backend,
+        "classes_sha256": classes_hash(classes_path),
+    }
+    if backend == "spacy":
+        import spacy
+        from spacy.tokens import DocBin
+        nlp = load_nlp(fast=True)
+        doc_bin = DocBin(attrs=["ORTH"])
+        for doc in nlp.tokenizer.pipe(terms):
+            doc_bin.add(doc)
+        artifact["spacy_version"] = spacy.__version__
+        artifact["model"] = MODEL_NAME
+        artifact["model_version"] = model_version()
+        artifact["lang"] = nlp.lang
+        artifact["tokenizer"] = nlp.tokenizer.to_bytes()
+        artifact["patterns"] = doc_bin.to_bytes()
+    elif backend == "aho-corasick":
+        artifact["matcher"] = KeywordMatcher(terms)
+    else:
+        raise ValueError(f"Unknown matching backend: {backend}")
+
+    path = artifact_path(classes_path, backend, artifact_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as file:
+        pickle.dump(artifact, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+def _read_artifact(path, backend):
+    try:
+        with open(path, "rb") as file:
+            artifact = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if artifact.get("version") != ARTIFACT_VERSION or artifact.get("backend") != backend:
+        return None
+    if backend == "spacy":
+        import spacy
+        if artifact.get("spacy_version") != spacy.__version__:
+            return None
+        if (artifact.get("model"), artifact.get("model_version")) != (MODEL_NAME, model_version()):
+            return None
+    return artifact
+
+def load_matcher(classes_path="classes", backend="spacy", fast=True, artifact_dir=None):
+    """
+    Load the nlp pipeline and matcher for a classes file from its artifact,
+    building the artifact first if it is missing or stale.
+
+    Args:
+        classes_path (str): The path to the file with one term per line.
+        backend (str): "spacy" or "aho-corasick".
+        fast (bool): For the spaCy backend, use only the tokenizer saved in the
+            artifact instead of loading the model.
+        artifact_dir (str, optional): Where artifacts are kept.
+
+    Returns:
+        tuple: The spaCy pipeline (None for the aho-corasick backend) and the matcher.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown matching backend: {backend}")
+    path = artifact_path(classes_path, backend, artifact_dir)
+    artifact = _read_artifact(path, backend)
+    if artifact is None:
+        try:
+            build_artifact(classes_path, backend, artifact_dir)
+        except OSError:
+            # Read-only checkouts still work, just without the saved artifact.
+            return _compile(classes_path, backend, fast)
+        artifact = _read_artifact(path, backend)
+        if artifact is None:
+            # Written but not readable back, e.g. replaced meanwhile by another process.
+            return _compile(classes_path, backend, fast)
+
+    if backend == "aho-corasick":
+        return None, artifact["matcher"]
+
+    from spacy.tokens import DocBin
+    nlp = _tokenizer_nlp(artifact) if fast else load_nlp(fast=False)
+    patterns = list(DocBin().from_bytes(artifact["patterns"]).get_docs(nlp.vocab))
+    return nlp, _spacy_matcher(nlp, patterns)
+
+def _compile(classes_path, backend, fast):
+    terms = load_terms(classes_path)
+    if backend == "aho-corasick":
+        return None, KeywordMatcher(terms)
+    nlp = load_nlp(fast)
+    return nlp, _spacy_matcher(nlp, list(nlp.tokenizer.pipe(terms)))
+
+def get_matcher(classes_path="classes", backend="spacy", fast=True, artifact_dir=None):
+    """
+    Return the shared nlp pipeline and matcher for a classes file.
+
+    The pair is loaded lazily on first use and then reused by every caller in
+    the process. It is reloaded when the classes file changes on disk.
+
+    Args:
+        classes_path (str): The path to the file with one term per line.
+        backend (str): "spacy" or "aho-corasick".
+        fast (bool): For the spaCy backend, load only the tokenizer.
+        artifact_dir (str, optional): Where artifacts are kept.
+
+    Returns:
+        tuple: The spaCy pipeline (None for the aho-corasick backend) and the matcher.
+    """
+    key = (os.path.abspath(classes_path), backend, fast)
+    stat = os.stat(classes_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _matchers.get(key)
+    if cached is None or cached[0] != signature:
+        nlp, matcher = load_matcher(classes_path, backend, fast, artifact_dir)
+        _matchers[key] = (signature, nlp, matcher)
+        cached = _matchers[key]
+    return cached[1], cached[2]
+
+def clear_matchers():
+    """
+    Drop every shared matcher, so the next get_matcher call loads again.
+    """
+    _matchers.clear()
+
+if __name__ == "__main__":
+    # Build step: python matcher_artifact.py [classes_path] [backend ...]
+    classes_path = sys.argv[1] if len(sys.argv) > 1 else "classes"
+    for backend in sys.argv[2:] or BACKENDS:
+        print("Built", build_artifact(classes_path, backend))
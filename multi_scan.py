@@ -0,0 +1,141 @@
+from collections import Counter, defaultdict
+import instrumentation
+from keyword_engine import KeywordMatcher, load_terms
+from matcher_artifact import get_matcher
+from pdf_sections import SectionIndex, HEADING_NAMES
+
+TOOL_TERMS = ["DeepLabCut"]
+# Label of text outside any named section, such as the title page.
+OTHER_SECTION = "Other"
+
+# Term lists registered with register_vocabulary, added to every default scanner.
+_registered = {}
+
+def register_vocabulary(name, terms):
+    """
+    Register an extra term list to be scanned for alongside the tools and animals.
+
+    Args:
+        name (str): The vocabulary name used in scan results.
+        terms (iterable of str): The terms to match.
+    """
+    _registered[name] = list(terms)
+
+def default_vocabularies(classes_path="classes"):
+    """
+    Return the tool names, the animals of the classes file and every registered
+    vocabulary.
+
+    Returns:
+        dict: Vocabulary names mapped to term lists.
+    """
+    vocabularies = {"tools": list(TOOL_TERMS), "animals": load_terms(classes_path)}
+    vocabularies.update(_registered)
+    return vocabularies
+
+class MultiVocabularyScanner:
+    """
+    Match several vocabularies in one tokenization pass.
+
+    All vocabularies share one matcher: a spaCy PhraseMatcher with one label
+    per vocabulary, or one KeywordMatcher over the union of the terms. Each
+    text is tokenized once whatever the number of vocabularies.
+
+    Args:
+        vocabularies (dict): Vocabulary names mapped to term lists.
+        backend (str): "spacy" or "aho-corasick".
+        classes_path (str): The classes file whose shared spaCy pipeline is reused.
+        substring_vocabularies (iterable of str): Vocabularies whose terms are found
+            anywhere in the text, also inside longer tokens, as the original
+            DeepLabCut check did: "DeepLabCut" is then found in "DeepLabCut2.0".
+    """
+    def __init__(self, vocabularies, backend="spacy", classes_path="classes", substring_vocabularies=()):
+        self.vocabularies = {name: list(terms) for name, terms in vocabularies.items()}
+        self.backend = backend
+        self.substring_vocabularies = {name: self.vocabularies[name] for name in substring_vocabularies}
+        token_vocabularies = {name: terms for name, terms in self.vocabularies.items()
+                              if name not in self.substring_vocabularies}
+        self.term_vocabularies = defaultdict(list)
+        for name, terms in token_vocabularies.items():
+            for term in terms:
+                if name not in self.term_vocabularies[term]:
+                    self.term_vocabularies[term].append(name)
+        if backend == "aho-corasick":
+            self.nlp = None
+            self.matcher = KeywordMatcher(self.term_vocabularies)
+        elif backend == "spacy":
+            from spacy.matcher import PhraseMatcher
+            self.nlp, _ = get_matcher(classes_path, "spacy")
+            self.matcher = PhraseMatcher(self.nlp.vocab)
+            for name, terms in token_vocabularies.items():
+                self.matcher.add(name, list(self.nlp.tokenizer.pipe(terms)))
+        else:
+            raise ValueError(f"Unknown matching backend: {backend}")
+
+    def match(self, text):
+        """
+        Match every vocabulary in a text.
+
+        Args:
+            text (str): The text to scan.
+
+        Returns:
+            list of tuple: (vocabulary name, matched text) for each hit.
+        """
+        with instrumentation.stage("matching"):
+            hits = [(name, term) for name, terms in self.substring_vocabularies.items()
+                    for term in terms for _ in range(text.count(term))]
+        if self.nlp is None:
+            with instrumentation.stage("matching"):
+                return hits + [(name, term) for term in self.matcher.match(text)
+                               for name in self.term_vocabularies[term]]
+        with instrumentation.stage("tokenization"):
+            doc = self.nlp(text)
+        with instrumentation.stage("matching"):
+            strings = self.nlp.vocab.strings
+            return hits + [(strings[match_id], doc[start:end].text) for match_id, start, end in self.matcher(doc)]
+
+    def scan_pdf(self, pdf_path, sections=HEADING_NAMES):
+        """
+        Scan a PDF once for every vocabulary.
+
+        The document is split into sections (from the table of contents or the
+        detected headings), every page is extracted once and every chunk is
+        tokenized once.
+
+        Args:
+            pdf_path (str): The path to the PDF file.
+            sections (list of str): Section names to report hits under.
+
+        Returns:
+            dict: Vocabulary names mapped to {section name: Counter of terms}. Text
+                outside the named sections is reported under OTHER_SECTION. Every
+                section found is present, with an empty Counter if it has no hits.
+        """
+        hits = {name: defaultdict(Counter) for name in self.vocabularies}
+        with instrumentation.document(pdf_path), SectionIndex(pdf_path, cache_pages=False) as index:
+            for section, text in index.iter_document_chunks(sections):
+                section = section or OTHER_SECTION
+                for by_section in hits.values():
+                    by_section[section]
+                for name, term in self.match(text):
+                    hits[name][section][term] += 1
+        return {name: dict(by_section) for name, by_section in hits.items()}
+
+def total_hits(scan, vocabulary, sections=None):
+    """
+    Sum the hits of one vocabulary over a set of sections.
+
+    Args:
+        scan (dict): A result of MultiVocabularyScanner.scan_pdf.
+        vocabulary (str): The vocabulary name.
+        sections (iterable of str, optional): The sections to include; all if None.
+
+    Returns:
+        Counter: Terms and their number of hits.
+    """
+    total = Counter()
+    for section, counts in scan.get(vocabulary, {}).items():
+        if sections is None or section in sections:
+            total.update(counts)
+    return total
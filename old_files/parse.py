@@ -1,9 +1,15 @@
-import rispy
-from bs4 import BeautifulSoup
-import spacy
-from spacy.matcher import PhraseMatcher
+import os
+import re
+import sys
+import html
+import itertools
 from collections import Counter
 
+# The shared matcher lives at the repository root.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from matcher_artifact import get_matcher
+import instrumentation
+
 def clean_html(raw_html):
     """
     Clean HTML content and extract plain text.
@@ -14,6 +20,7 @@ def clean_html(raw_html):
     Returns:
         str: The plain text extracted from the HTML content.
     """
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(raw_html, "html.parser")
     cleantext = soup.get_text()
     return cleantext
@@ -28,16 +35,12 @@ def tokenize_and_match(text):
     Returns:
         list of str: A list of matched phrases found in the input text.
     """    
-    nlp = spacy.load('en_core_web_sm')
-    matcher = PhraseMatcher(nlp.vocab)
-
-    with open("classes", "r") as file:
-        animals = [line.strip() for line in file]
-
-    patterns = [nlp(animal) for animal in animals]
-    matcher.add("ANIMAL", patterns)
-    doc = nlp(text)
-    matches = matcher(doc)
+    with instrumentation.stage("load_matcher"):
+        nlp, matcher = get_matcher("classes")
+    with instrumentation.stage("tokenization"):
+        doc = nlp(text)
+    with instrumentation.stage("matching"):
+        matches = matcher(doc)
 
     matched_texts = []
     for match_id, start, end in matches:
@@ -47,10 +50,144 @@ def tokenize_and_match(text):
     return matched_texts
 
 
-def count_keywords(file_name='madlc_citations.ris', exclude_others=True, include_titles=False):
+# Tags such as <i> or </sub>. A "<" not followed by a letter, as in "p < 0.05",
+# is text, as it is for the html.parser BeautifulSoup uses.
+_HTML_TAG = re.compile(r"</?[A-Za-z][^>]*>")
+_RIS_LINE = re.compile(r"^([A-Z][A-Z0-9])  -(?: (.*))?$")
+# The RIS tags rispy maps to the fields count_keywords reads.
+RIS_FIELDS = {"TI": "title", "AB": "abstract"}
+
+def strip_html(raw_html):
+    """
+    Extract plain text from the small HTML fragments found in RIS titles and
+    abstracts, such as <i>Mus musculus</i> or &amp;, without building a parse tree.
+
+    Args:
+        raw_html (str): The raw HTML content to be cleaned.
+
+    Returns:
+        str: The plain text.
+    """
+    if "<" not in raw_html and "&" not in raw_html:
+        return raw_html
+    return html.unescape(_HTML_TAG.sub("", raw_html))
+
+def iter_ris_entries(file_name, fields=RIS_FIELDS):
+    """
+    Read a RIS file one entry at a time, keeping only the wanted fields.
+
+    Unlike rispy.load, the file is never held in memory as a whole, so exports
+    of any size can be read.
+
+    Args:
+        file_name (str): The path to the RIS file.
+        fields (dict): RIS tags mapped to the keys of the yielded entries.
+
+    Yields:
+        dict: The wanted fields of each entry, as strings. Missing fields are empty.
+    """
+    entry = None
+    last_key = None
+    with open(file_name, 'r', encoding='utf-8-sig') as file:
+        for line in file:
+            line = line.rstrip("\r\n")
+            match = _RIS_LINE.match(line)
+            if match is None:
+                # Continuation of the previous field.
+                if entry is not None and last_key is not None and line.strip():
+                    entry[last_key] += " " + line.strip()
+                continue
+            tag, value = match.group(1), (match.group(2) or "").strip()
+            if tag == "TY":
+                entry = {key: "" for key in fields.values()}
+                last_key = None
+            elif tag == "ER":
+                if entry is not None:
+                    yield entry
+                entry = None
+                last_key = None
+            elif entry is not None:
+                last_key = fields.get(tag)
+                if last_key is not None and not entry[last_key]:
+                    entry[last_key] = value
+                else:
+                    last_key = None
+
+def _match_batch(texts, nlp, matcher, batch_size):
+    # Matches for each text, tokenizing the whole batch through nlp.pipe.
+    if nlp is None:
+        with instrumentation.stage("matching"):
+            return [matcher.match(text) for text in texts]
+    results = []
+    with instrumentation.stage("tokenization"):
+        docs = list(nlp.pipe(texts, batch_size=batch_size))
+    with instrumentation.stage("matching"):
+        for doc in docs:
+            results.append([doc[start:end].text for match_id, start, end in matcher(doc)])
+    return results
+
+def _top_keyword(keywords):
+    return min(keywords, key=lambda x: (-keywords[x], x))
+
+def classify_ris_entries(entries, batch_size=256, backend="spacy", classes_path="classes"):
+    """
+    Classify RIS entries by their top keyword, in batches.
+
+    Titles of a batch are matched together; the abstracts of the entries whose
+    title has no match are then matched together. Only one batch of entries is
+    held at a time.
+
+    Args:
+        entries (iterable of dict): Entries with title and abstract keys.
+        batch_size (int): Number of entries per batch.
+        backend (str): "spacy" or "aho-corasick".
+        classes_path (str): The path to the classes file with the keywords.
+
+    Yields:
+        tuple: (entry, top keyword) for each entry, in order. The top keyword is
+            'others' when neither the title nor the abstract has a match.
+    """
+    with instrumentation.stage("load_matcher"):
+        nlp, matcher = get_matcher(classes_path, backend)
+    entries = iter(entries)
+    while True:
+        batch = list(itertools.islice(entries, batch_size))
+        if not batch:
+            return
+        with instrumentation.stage("clean_html"):
+            titles = [strip_html(entry['title']) for entry in batch]
+        top_keywords = [None] * len(batch)
+        misses = []
+        for number, matches in enumerate(_match_batch(titles, nlp, matcher, batch_size)):
+            keywords = Counter(set(matches))
+            if keywords:
+                instrumentation.record_path("title")
+                top_keywords[number] = _top_keyword(keywords)
+            else:
+                misses.append(number)
+
+        with instrumentation.stage("clean_html"):
+            abstracts = [strip_html(batch[number]['abstract']) for number in misses]
+        for number, matches in zip(misses, _match_batch(abstracts, nlp, matcher, batch_size)):
+            keywords = Counter(matches)
+            if keywords:
+                instrumentation.record_path("abstract")
+                top_keywords[number] = _top_keyword(keywords)
+            else:
+                instrumentation.record_path("skip")
+                top_keywords[number] = 'others'
+
+        for entry, top_keyword in zip(batch, top_keywords):
+            yield entry, top_keyword
+
+def count_keywords(file_name='madlc_citations.ris', exclude_others=True, include_titles=False,
+                   batch_size=256, backend="spacy", classes_path="classes"):
     """
     Count occurrences of keywords in the titles and abstracts of RIS entries.
 
+    The file is streamed and classified in batches, so memory use does not
+    grow with the size of the export.
+
     Args:
         file_name (str, optional): The name of the RIS file to process.
         exclude_others (bool, optional): If True, exclude the "others" category from the results. Default False. 
@@ -58,31 +195,18 @@ def count_keywords(file_name='madlc_citations.ris', exclude_others=True, include
         include_titles (bool, optional): If True, include titles in the output, otherwise only include counts.
             Default False. This option is interesting if you want to check specifically which items are counted in which 
             in each category.
+        batch_size (int, optional): Number of entries matched together.
+        backend (str, optional): "spacy" or "aho-corasick".
+        classes_path (str, optional): The path to the classes file with the keywords.
 
     Returns:
         dict: A dictionary where keys are keywords, and values are dictionaries with counts and lists of titles.
     """
-    entries = []
-    with open(file_name, 'r', encoding='utf-8') as file:
-        entries = list(rispy.load(file))
-
-    entries = [dict(i) for i in entries]
     keys = {}
+    total_entries = 0
 
-    for entry in entries:
-        title = clean_html(entry['title'])
-        abstract = clean_html(entry['abstract'])
-        keywords = Counter(set(tokenize_and_match(title)))
-
-        if len(keywords) < 1:
-            keywords = Counter(tokenize_and_match(abstract))
-            if len(keywords) < 1:
-                top_keyword = 'others'
-            else:
-                top_keyword = sorted(keywords, key=lambda x: (-keywords[x], x))[0]
-        else:
-            top_keyword = sorted(keywords, key=lambda x: (-keywords[x], x))[0]
-
+    for entry, top_keyword in classify_ris_entries(iter_ris_entries(file_name), batch_size, backend, classes_path):
+        total_entries += 1
         if top_keyword != 'others' or not exclude_others:
             if top_keyword not in keys:
                 if include_titles:
@@ -96,7 +220,6 @@ def count_keywords(file_name='madlc_citations.ris', exclude_others=True, include
                         keys[top_keyword]['titles'] = []
                     keys[top_keyword]['titles'].append(entry['title'])
 
-    total_entries = len(entries) 
     print(f"Total number of entries in the RIS file: {total_entries}")
 
-    return keys
\ No newline at end of file
+    return keys
@@ -0,0 +1,331 @@
+import re
+from collections import Counter
+import instrumentation
+from input_sources import open_pdf
+
+# Headings recognized by layout detection. Any of them ends the section
+# before it; the wanted sections are passed by the caller.
+HEADING_NAMES = ["Abstract", "Summary", "Keywords", "Introduction", "Background", "Methodology", 
+                 "Materials and Methods", "Methods", "Materials and Equipment", "Experimental Procedures", 
+                 "Results", "Discussion", "Conclusion", "Acknowledgements", "Acknowledgments", "Funding", 
+                 "Author Contributions", "Supplementary", "References", "Bibliography"]
+# Nothing after these is read once a wanted section has been found.
+END_HEADINGS = ["References", "Bibliography"]
+# Layout detection gives up when none of HEADING_NAMES shows up in this many
+# first pages; papers with recognizable headings have one on their first pages.
+LAYOUT_PROBE_PAGES = 3
+
+_NUMBERING = re.compile(r"^\s*(?:\d+(?:\.\d+)*|[IVX]+)[.)]?\s+")
+_MAX_HEADING_CHARS = 60
+_BOLD_FLAG = 16
+
+
+class SectionIndex:
+    """
+    Index of the sections of one PDF, shared by every extractor.
+
+    The PDF is opened once and its table of contents read once. Page ranges
+    can then be resolved for any set of section titles, and each page's text
+    is extracted at most once however many sections or callers ask for it.
+
+    Args:
+        source (str or fitz.Document): The path to the PDF file or archive member (see 
+            input_sources), or an open document.
+            A document passed in is not closed by the index.
+        cache_pages (bool): If True, keep extracted page texts for reuse.
+    """
+    def __init__(self, source, cache_pages=True):
+        if isinstance(source, str):
+            with instrumentation.stage("open"):
+                self.document = open_pdf(source)
+            self._owns_document = True
+        else:
+            self.document = source
+            self._owns_document = False
+        self.cache_pages = cache_pages
+        with instrumentation.stage("toc"):
+            self.toc = self.document.get_toc()
+        self._pages = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._owns_document:
+            self.document.close()
+
+    def __len__(self):
+        return len(self.document)
+
+    def has_usable_toc(self):
+        """
+        Return True if the table of contents has at least one entry that
+        points past the first page.
+        """
+        return len(self.toc) > 0 and not all(entry[2] == 0 for entry in self.toc)
+
+    def section_ranges(self, sections, end_at_next_entry=False):
+        """
+        Resolve the page ranges of sections from the table of contents.
+
+        A table of contents entry belongs to the first of the given sections
+        whose name appears in the entry title. A section runs until the next
+        entry of a given section, or with end_at_next_entry until the next
+        entry of any kind. The last open section runs to the end of the document.
+        If a section appears twice, the later entry wins.
+
+        Args:
+            sections (list of str): Section names to look for.
+            end_at_next_entry (bool): If True, end each section at the next entry.
+
+        Returns:
+            dict: Section names mapped to {'start': int, 'end': int} page ranges,
+                ordered by first appearance.
+        """
+        ranges = {}
+        current_section = None
+        for toc_entry in self.toc:
+            level, title, page_num = toc_entry
+            page_num -= 1
+            if page_num < 0:
+                continue
+            for section in sections:
+                if section in title:
+                    if current_section is not None:
+                        ranges[current_section]['end'] = page_num
+                    current_section = section
+                    ranges[current_section] = {'start': page_num, 'end': None}
+                    break
+            else:
+                if end_at_next_entry and current_section is not None:
+                    ranges[current_section]['end'] = page_num
+                    current_section = None
+        if current_section is not None:
+            ranges[current_section]['end'] = len(self.document)
+        return ranges
+
+    def section_pages(self, sections, end_at_next_entry=False):
+        """
+        Return the page numbers of sections in section order.
+
+        Args:
+            sections (list of str): Section names to look for.
+            end_at_next_entry (bool): See section_ranges.
+
+        Returns:
+            list of int: The page numbers, possibly empty.
+        """
+        page_numbers = []
+        for pages in self.section_ranges(sections, end_at_next_entry).values():
+            page_numbers.extend(range(pages['start'], pages['end']))
+        return page_numbers
+
+    def page_text(self, page_num):
+        """
+        Return the text of a page, extracting it only on first use.
+
+        Args:
+            page_num (int): The zero-based page number.
+
+        Returns:
+            str: The text of the page.
+        """
+        text = self._pages.get(page_num)
+        if text is None:
+            with instrumentation.stage("extraction"):
+                text = self.document.load_page(page_num).get_text("text")
+            instrumentation.count("pages")
+            if self.cache_pages:
+                self._pages[page_num] = text
+        return text
+
+    def iter_page_texts(self, page_numbers):
+        """
+        Yield the text of pages lazily, in the given order.
+        """
+        for page_num in page_numbers:
+            yield self.page_text(page_num)
+
+    def pages_text(self, page_numbers):
+        """
+        Return the text of pages, each preceded by a newline.
+        """
+        return "".join("\n" + self.page_text(page_num) for page_num in page_numbers)
+
+    def section_text(self, sections, end_at_next_entry=False):
+        """
+        Return the text of the pages of sections, each page preceded by a newline.
+
+        Args:
+            sections (list of str): Section names to look for.
+            end_at_next_entry (bool): See section_ranges.
+
+        Returns:
+            str: The text, or an empty string if no section is in the table of contents.
+        """
+        return self.pages_text(self.section_pages(sections, end_at_next_entry))
+
+    def sections_text(self, sections, end_at_next_entry=False):
+        """
+        Return the text of each section separately.
+
+        Args:
+            sections (list of str): Section names to look for.
+            end_at_next_entry (bool): See section_ranges.
+
+        Returns:
+            dict: Section names mapped to their text, for the sections found.
+        """
+        return {name: self.pages_text(range(pages['start'], pages['end']))
+                for name, pages in self.section_ranges(sections, end_at_next_entry).items()}
+
+    def page_lines(self, page_num):
+        """
+        Return the text lines of a page with their font size and weight.
+
+        Args:
+            page_num (int): The zero-based page number.
+
+        Returns:
+            list of tuple: (text, size, bold) for each line, in reading order.
+        """
+        lines = []
+        with instrumentation.stage("layout"):
+            page_dict = self.document.load_page(page_num).get_text("dict")
+        instrumentation.count("layout_pages")
+        for block in page_dict["blocks"]:
+            if block.get("type", 0) != 0:
+                continue
+            for line in block["lines"]:
+                spans = [span for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                text = "".join(span["text"] for span in line["spans"])
+                size = max(span["size"] for span in spans)
+                bold = all(span["flags"] & _BOLD_FLAG or "Bold" in span["font"] for span in spans)
+                lines.append((text, size, bold))
+        return lines
+
+    def iter_layout_chunks(self, sections, whole_document=False, probe_pages=None, keep_pages=()):
+        """
+        Find section headings from the page layout and yield the text under
+        the wanted ones. Meant for PDFs without a usable table of contents.
+
+        A line is a heading when it is short, names one of HEADING_NAMES or the
+        wanted sections (ignoring case and leading numbering such as "2." or
+        "II."), and stands out from the body text of its page by being bold,
+        larger or all capitals. A wanted section runs until the next heading.
+        Scanning stops at the references once a wanted section has been seen.
+
+        Args:
+            sections (list of str): Section names to extract.
+            whole_document (bool): If True, yield every line of the document, under the 
+                heading it follows (None before the first heading), and do not stop 
+                at the references.
+            probe_pages (int, optional): Stop if no heading at all is found in this 
+                many first pages, instead of reading the layout of every page.
+            keep_pages (container of int): Pages whose text is kept for page_text, so 
+                a caller falling back to reading them does not extract them again.
+
+        Yields:
+            tuple: (section name, page number, text) for each page a wanted section spans.
+        """
+        names = list(sections) + [name for name in HEADING_NAMES if name not in sections]
+        current_section = None
+        found = False
+        any_heading = False
+        for page_num in range(len(self.document)):
+            if probe_pages is not None and page_num >= probe_pages and not any_heading and not whole_document:
+                return
+            lines = self.page_lines(page_num)
+            if page_num in keep_pages:
+                self._pages[page_num] = "".join(text + "\n" for text, size, bold in lines)
+            sizes = Counter()
+            for text, size, bold in lines:
+                sizes[round(size * 2) / 2] += len(text)
+            body_size = sizes.most_common(1)[0][0] if sizes else 0
+            chunk = []
+            for text, size, bold in lines:
+                heading = _heading_name(text, size, bold, body_size, names)
+                if heading is None:
+                    if current_section is not None or whole_document:
+                        chunk.append(text)
+                    continue
+                any_heading = True
+                if chunk:
+                    yield current_section, page_num, "\n".join(chunk)
+                    chunk = []
+                if found and heading in END_HEADINGS and not whole_document:
+                    return
+                current_section = heading if heading in sections or whole_document else None
+                found = found or current_section is not None
+            if chunk:
+                yield current_section, page_num, "\n".join(chunk)
+
+    def iter_document_chunks(self, sections=HEADING_NAMES):
+        """
+        Split the whole document into chunks labelled with their section, reading
+        every page once. The table of contents is used when it has any of the
+        sections, otherwise headings are detected from the layout.
+
+        Args:
+            sections (list of str): Section names to label the chunks with.
+
+        Yields:
+            tuple: (section name or None, text). None marks text outside the named
+                sections, such as the title page.
+        """
+        ranges = self.section_ranges(sections, end_at_next_entry=True) if self.has_usable_toc() else {}
+        if ranges:
+            page_sections = {}
+            for name, pages in ranges.items():
+                for page_num in range(pages['start'], pages['end']):
+                    page_sections[page_num] = name
+            for page_num in range(len(self.document)):
+                yield page_sections.get(page_num), self.page_text(page_num)
+            return
+        for section, page_num, text in self.iter_layout_chunks(sections, whole_document=True):
+            yield section, text
+
+    def layout_sections_text(self, sections, probe_pages=None, keep_pages=()):
+        """
+        Return the text of each wanted section found by layout detection.
+
+        Args:
+            sections (list of str): Section names to extract.
+            probe_pages (int, optional): See iter_layout_chunks.
+            keep_pages (container of int): See iter_layout_chunks.
+
+        Returns:
+            dict: Section names mapped to their text, for the sections found.
+        """
+        texts = {}
+        for section, page_num, text in self.iter_layout_chunks(sections, probe_pages=probe_pages,
+                                                                keep_pages=keep_pages):
+            texts[section] = texts.get(section, "") + "\n" + text
+        return texts
+
+    def full_text(self):
+        """
+        Return the text of every page, each preceded by a newline.
+        """
+        return self.pages_text(range(len(self.document)))
+
+def _heading_name(text, size, bold, body_size, names):
+    # Returns the name a line is a heading for, or None if it is body text.
+    title = _NUMBERING.sub("", text).strip().rstrip(".:").strip()
+    if not title or len(title) > _MAX_HEADING_CHARS:
+        return None
+    if not (bold or size >= body_size + 1 or (title.isupper() and len(title) > 3)):
+        return None
+    folded = title.casefold()
+    for name in names:
+        name_folded = name.casefold()
+        # Allow "Materials and methods" or "Methods and Analysis", but not a 
+        # sentence that happens to contain the word.
+        if folded == name_folded or (folded.startswith(name_folded) and len(folded.split()) <= 5):
+            return name
+    return None
@@ -0,0 +1,113 @@
+import re
+import unicodedata
+from collections import Counter
+
+# Bump when the rules change, so cached verdicts are recomputed.
+PREFILTER_VERSION = 2
+
+# Frequent function words of the languages seen in the corpora. A handful of
+# words per language is enough to tell them apart on a full page of text.
+STOPWORDS = {
+    "en": ["the", "of", "and", "to", "in", "is", "that", "for", "with", "was", "were", "are", "this", "by",
+           "from", "which", "we", "these", "have", "be"],
+    "es": ["el", "la", "los", "las", "del", "que", "en", "y", "por", "para", "con", "una", "se", "es",
+           "como", "más", "entre", "sobre", "este", "fue"],
+    "pt": ["o", "os", "da", "do", "das", "dos", "que", "em", "e", "para", "com", "uma", "não", "é", "foi",
+           "como", "mais", "entre", "sobre", "pelo"],
+    "fr": ["le", "la", "les", "des", "du", "et", "en", "est", "que", "une", "pour", "dans", "par", "sur",
+           "qui", "au", "pas", "avec", "ce", "sont"],
+    "de": ["der", "die", "das", "und", "ist", "von", "mit", "den", "dem", "nicht", "ein", "eine", "zu",
+           "auf", "für", "sich", "wird", "auch", "werden", "bei"],
+    "it": ["il", "di", "che", "della", "delle", "degli", "nel", "per", "con", "una", "sono", "è", "del",
+           "gli", "alla", "anche", "come", "più", "tra", "questo"],
+}
+_STOPWORD_SETS = {language: set(words) for language, words in STOPWORDS.items()}
+
+# Words that any paper about animals or behavior contains on its first page,
+# as regular expressions matched as whole words. Bare stems are too loose:
+# "rat" would match "rate" and "ratio", "cell" "cellphone", and "pose" or
+# "motor" are common outside biology, so only their biology phrases count.
+BIOLOGY_WORDS = [r"animals?", r"behaviou?r\w*", r"neur\w+", r"brains?", r"species", r"mouse", r"mice",
+                 r"rats?", r"rodents?", r"primates?", r"insects?", r"fish(?:es)?", r"birds?", r"cells",
+                 r"cellular", r"genes?", r"genetics?", r"genom\w*", r"proteins?", r"biolog\w*",
+                 r"ecolog\w*", r"physiolog\w*", r"zoolog\w*", r"organisms?", r"muscles?",
+                 r"motor (?:cortex|neurons?|behaviou?r|control)", r"locomot\w*", r"pose estimation",
+                 r"(?:animal|behaviou?ral) tracking", r"vertebrates?", r"larva[el]?", r"cortex",
+                 r"cortical", r"evolutionary", r"clinical", r"patients?", r"veterinar\w*"]
+_BIOLOGY = re.compile(r"\b(?:" + "|".join(BIOLOGY_WORDS) + r")\b", re.IGNORECASE)
+_WORD = re.compile(r"[^\W\d_]+")
+
+# Below this many letters (a scanned page, a cover image) no verdict is given.
+MIN_LETTERS = 200
+MIN_LATIN_FRACTION = 0.5
+
+def script_of(ch):
+    """
+    Return the script of a letter from its Unicode name, such as "LATIN",
+    "CJK", "HIRAGANA" or "CYRILLIC".
+    """
+    name = unicodedata.name(ch, "")
+    if name.startswith("CJK"):
+        return "CJK"
+    return name.split(" ", 1)[0] if name else "UNKNOWN"
+
+def script_profile(text):
+    """
+    Count the letters of a text by script.
+
+    Returns:
+        Counter: Script names mapped to numbers of letters.
+    """
+    return Counter(script_of(ch) for ch in text if ch.isalpha())
+
+def detect_language(text):
+    """
+    Guess the language of a Latin-script text from its function words.
+
+    Returns:
+        tuple: (language code, share of the words that are its function words),
+            or (None, 0.0) if the text has no words.
+    """
+    words = [word.lower() for word in _WORD.findall(text)]
+    if not words:
+        return None, 0.0
+    scores = {language: sum(word in stopwords for word in words) / len(words)
+              for language, stopwords in _STOPWORD_SETS.items()}
+    language = max(scores, key=scores.get)
+    return language, scores[language]
+
+def biology_signal(text):
+    """
+    Count the biology words in a text.
+    """
+    return len(_BIOLOGY.findall(text))
+
+def skip_reason(first_page, metadata=None, languages=("en",)):
+    """
+    Decide from the first page and the metadata whether a paper can be tagged.
+
+    Args:
+        first_page (str): The text of the first page.
+        metadata (dict, optional): The PDF metadata; its title, subject and keywords
+            are read along with the page.
+        languages (iterable of str): Languages the classes file is written in.
+
+    Returns:
+        str: Why the paper should be skipped, such as "script: CJK", "language: es"
+            or "no biology signal", or None if it should be read.
+    """
+    metadata = metadata or {}
+    text = " ".join([first_page] + [metadata.get(key) or "" for key in ("title", "subject", "keywords")])
+    profile = script_profile(text)
+    letters = sum(profile.values())
+    if letters < MIN_LETTERS:
+        return None
+    if profile["LATIN"] / letters < MIN_LATIN_FRACTION:
+        script = max((script for script in profile if script != "LATIN"), key=profile.get)
+        return f"script: {script}"
+    language, share = detect_language(text)
+    if language not in languages and share > 0.05:
+        return f"language: {language}"
+    if biology_signal(text) == 0:
+        return "no biology signal"
+    return None
@@ -1,6 +1,8 @@
-import os
-import fitz  
+import instrumentation
+from pdf_sections import LAYOUT_PROBE_PAGES, SectionIndex
+from input_sources import list_pdfs
 from parse import tokenize_and_match
+from multi_scan import MultiVocabularyScanner, default_vocabularies, total_hits
 
 def check_deeplabcut_citation(pdf_path):
     """
@@ -13,43 +15,27 @@ def check_deeplabcut_citation(pdf_path):
         bool: True if "DeepLabCut" is mentioned in the Methodology, Materials and Methods, or Results, False otherwise.
     """
     if "Supplementary" in pdf_path:
+        instrumentation.record_path("skip")
         return False
     print(f"Reading {pdf_path}...")
-    full_text = ""
     sections_for_checking = ["Methodology","Materials and Methods","Results","Methods"]
 
-    with fitz.open(pdf_path) as pdf_document:
-        toc = pdf_document.get_toc()
-        if len(toc) == 0 or all(entry[2] == 0 for entry in toc):
-            print("No table of contents found, reading full document.")
-            full_text = pdf_document.load_page(0).get_text("text")  
-            for page_num in range(len(pdf_document)): 
-                page_text = pdf_document.load_page(page_num).get_text("text")
-                full_text += "\n" + page_text
+    with instrumentation.document(pdf_path), SectionIndex(pdf_path) as index:
+        if not index.has_usable_toc():
+            # The fallback reads every page, so the pages searched keep their text.
+            full_text = "".join(index.layout_sections_text(sections_for_checking, probe_pages=LAYOUT_PROBE_PAGES, 
+                                                           keep_pages=range(len(index))).values())
+            if full_text:
+                instrumentation.record_path("layout")
+                print("No table of contents found, reading sections found from headings.")
+            else:
+                instrumentation.record_path("fallback")
+                print("No table of contents found, reading full document.")
+                full_text = index.page_text(0) + index.full_text()
         else:
+            instrumentation.record_path("toc")
             print("Table of contents found.")
-            sections = {}
-            current_section = None
-            for toc_entry in toc:
-                level, title, page_num = toc_entry
-                page_num -= 1
-                if page_num < 0: 
-                    continue
-                for section in sections_for_checking:
-                    if section in title:
-                        if current_section is not None:
-                            sections[current_section]['end'] = page_num
-                        current_section = section
-                        sections[current_section] = {'start': page_num, 'end': None}
-                        break
-            if current_section is not None:
-                sections[current_section]['end'] = len(pdf_document)
-            
-            for sec_name, pages in sections.items():
-                start, end = pages['start'], pages['end']
-                for page_num in range(start, end):
-                    page_text = pdf_document.load_page(page_num).get_text("text")
-                    full_text += "\n" + page_text
+            full_text = index.section_text(sections_for_checking)
 
     deeplabcut_cited = "DeepLabCut" in full_text
     return deeplabcut_cited, full_text
@@ -60,7 +46,7 @@ def analyze_papers(directory):
     and the number of papers that do not cite DeepLabCut.
 
     Args:
-        directory (str): The path to the directory containing the PDF files.
+        directory (str): The path to the directory containing the PDF files, or to a zip or tar archive of them.
 
     Returns:
         tuple: A tuple containing four elements:
@@ -75,16 +61,14 @@ def analyze_papers(directory):
     papers_with_deeplabcut_dict = {}
     papers_without_deeplabcut_dict = {}
 
-    for filename in os.listdir(directory):
-        if filename.endswith(".pdf"):
-            file_path = os.path.join(directory, filename)
-            deeplabcut_cited = check_deeplabcut_citation(file_path)
-            if deeplabcut_cited:
-                papers_with_deeplabcut += 1
-                papers_with_deeplabcut_dict[filename] = file_path
-            else:
-                papers_without_deeplabcut += 1
-                papers_without_deeplabcut_dict[filename] = file_path
+    for filename, file_path in list_pdfs(directory):
+        deeplabcut_cited = check_deeplabcut_citation(file_path)
+        if deeplabcut_cited:
+            papers_with_deeplabcut += 1
+            papers_with_deeplabcut_dict[filename] = file_path
+        else:
+            papers_without_deeplabcut += 1
+            papers_without_deeplabcut_dict[filename] = file_path
 
     return papers_with_deeplabcut, papers_without_deeplabcut, papers_with_deeplabcut_dict, papers_without_deeplabcut_dict
 
@@ -98,16 +82,48 @@ def extract_text_from_pdf(pdf_path):
     Returns:
         str: The full text extracted from the PDF.
     """
-    full_text = ""
     print(f"Reading {pdf_path}...")
 
-    with fitz.open(pdf_path) as pdf_document:
-        for page_num in range(len(pdf_document)): 
-            page_text = pdf_document.load_page(page_num).get_text("text")
-            full_text += "\n" + page_text
+    with SectionIndex(pdf_path) as index:
+        full_text = index.full_text()
 
     return full_text
 
+def iter_page_matches(pdf_path):
+    """
+    Match animals page by page, without building the full text of the document.
+
+    Only one page of text is held at a time, so memory stays flat however long
+    the document is and no text reaches spaCy's max_length. Pages are separated
+    by a newline in the full text, which always ends a token, so the matches are
+    the same as for extract_text_from_pdf.
+
+    Args:
+        pdf_path (str): The path to the PDF file.
+
+    Yields:
+        list of str: The animals mentioned on each page.
+    """
+    with SectionIndex(pdf_path, cache_pages=False) as index:
+        for page_num in range(len(index)):
+            yield tokenize_and_match(index.page_text(page_num))
+
+def get_animals_from_pdf(pdf_path):
+    """
+    Extract the list of animals mentioned in a PDF document, one page at a time.
+
+    Args:
+        pdf_path (str): The path to the PDF file.
+
+    Returns:
+        list of str: The animals mentioned, in document order.
+    """
+    print(f"Reading {pdf_path}...")
+    animals = []
+    for page_animals in iter_page_matches(pdf_path):
+        animals.extend(page_animals)
+    return animals
+
 def get_animals_from_papers(paper_paths):
     """
     Extract a list of animals used in each paper that cites DeepLabCut.
@@ -122,9 +138,7 @@ def get_animals_from_papers(paper_paths):
 
     for title, pdf_path in paper_paths.items():
         print(f"Processing {pdf_path}...")
-        full_text = extract_text_from_pdf(pdf_path)
-        animals = tokenize_and_match(full_text)
-        animals_in_papers[title] = animals
+        animals_in_papers[title] = get_animals_from_pdf(pdf_path)
     
     return animals_in_papers
 
@@ -156,56 +170,50 @@ def get_animals_from_papers(paper_paths):
 
 
 
-import os
-import fitz
-from parse import tokenize_and_match
+def extract_sections_text(pdf_path, section_names):
+    """
+    Extract the text of several sections of a PDF document, opening it once.
+
+    Args:
+        pdf_path (str or SectionIndex): The path to the PDF file, or its section index.
+        section_names (list of str): The names of the sections to extract.
+
+    Returns:
+        dict: Section names mapped to their extracted text. Without a table of contents 
+            the sections are found from their headings; if none is found every section 
+            gets the full document.
+    """
+    if not isinstance(pdf_path, SectionIndex):
+        with SectionIndex(pdf_path) as index:
+            return extract_sections_text(index, section_names)
+
+    index = pdf_path
+    if not index.has_usable_toc():
+        found = index.layout_sections_text(section_names, probe_pages=LAYOUT_PROBE_PAGES, 
+                                           keep_pages=range(len(index)))
+        if found:
+            print("No table of contents found, reading sections found from headings.")
+            return {section_name: found.get(section_name, "") for section_name in section_names}
+        print("No table of contents found, reading full document.")
+        full_text = index.full_text()
+        return {section_name: full_text for section_name in section_names}
+
+    print("Table of contents found.")
+    found = index.sections_text(section_names, end_at_next_entry=True)
+    return {section_name: found.get(section_name, "") for section_name in section_names}
 
 def extract_section_text(pdf_path, section_name):
     """
     Extract text from a specified section of a PDF document.
 
     Args:
-        pdf_path (str): The path to the PDF file.
+        pdf_path (str or SectionIndex): The path to the PDF file, or its section index.
         section_name (str): The name of the section to extract.
 
     Returns:
         str: The extracted text from the specified section.
     """
-    full_text = ""
-    with fitz.open(pdf_path) as pdf_document:
-        toc = pdf_document.get_toc()
-        if len(toc) == 0 or all(entry[2] == 0 for entry in toc):
-            print("No table of contents found, reading full document.")
-            for page_num in range(len(pdf_document)): 
-                page_text = pdf_document.load_page(page_num).get_text("text")
-                full_text += "\n" + page_text
-        else:
-            print("Table of contents found.")
-            sections = {}
-            current_section = None
-            for toc_entry in toc:
-                level, title, page_num = toc_entry
-                page_num -= 1
-                if page_num < 0: 
-                    continue
-                if section_name in title:
-                    if current_section is not None:
-                        sections[current_section]['end'] = page_num
-                    current_section = section_name
-                    sections[current_section] = {'start': page_num, 'end': None}
-                elif current_section is not None:
-                    sections[current_section]['end'] = page_num
-                    current_section = None
-            if current_section is not None:
-                sections[current_section]['end'] = len(pdf_document)
-            
-            if section_name in sections:
-                start, end = sections[section_name]['start'], sections[section_name]['end']
-                for page_num in range(start, end):
-                    page_text = pdf_document.load_page(page_num).get_text("text")
-                    full_text += "\n" + page_text
-
-    return full_text
+    return extract_sections_text(pdf_path, [section_name])[section_name]
 
 def get_animals_from_abstract(pdf_path):
     """
@@ -239,3 +247,48 @@ def analyze_papers_from_abstracts(papers_with_deeplabcut_dict):
         animals_in_papers[filename] = animals
 
     return animals_in_papers
+
+def scan_papers_for_tool(directory, tool="DeepLabCut", classes_path="classes", backend="spacy"):
+    """
+    Check which papers cite a tool and collect their animals, reading each PDF once.
+
+    This replaces running analyze_papers, get_animals_from_papers and
+    analyze_papers_from_abstracts one after the other, which opened and tokenized
+    every citing paper three times.
+
+    Args:
+        directory (str): The path to the directory containing the PDF files, or to a zip or tar archive of them.
+        tool (str): The tool name to look for.
+        classes_path (str): The path to the classes file with the animal terms.
+        backend (str): "spacy" or "aho-corasick".
+
+    Returns:
+        dict: Filenames mapped to a dictionary with the keys:
+            - cited (bool): The tool is mentioned in the Methodology, Materials and Methods,
+              Results or Methods section, or anywhere if no section was found.
+            - animals (list of str): The animals mentioned in the whole paper.
+            - abstract_animals (list of str): The animals mentioned in the Abstract.
+    """
+    vocabularies = default_vocabularies(classes_path)
+    vocabularies["tools"] = [tool]
+    # The tool is found inside longer tokens too, such as "DeepLabCut2.0", as 
+    # the original substring check did.
+    scanner = MultiVocabularyScanner(vocabularies, backend, classes_path, substring_vocabularies=["tools"])
+    sections_for_checking = ["Methodology","Materials and Methods","Results","Methods"]
+
+    papers = {}
+    for filename, file_path in sorted(list_pdfs(directory)):
+        if "Supplementary" in filename:
+            continue
+        print(f"Reading {file_path}...")
+        scan = scanner.scan_pdf(file_path)
+        if any(section in sections_for_checking for section in scan["tools"]):
+            cited = bool(total_hits(scan, "tools", sections_for_checking))
+        else:
+            cited = bool(total_hits(scan, "tools"))
+        papers[filename] = {
+            "cited": cited,
+            "animals": list(total_hits(scan, "animals").elements()),
+            "abstract_animals": list(total_hits(scan, "animals", ["Abstract"]).elements()),
+        }
+    return papers
@@ -0,0 +1,199 @@
+import os
+import json
+import sqlite3
+from text_cache import file_content_hash
+from input_sources import is_archive, source_stat, MEMBER_SEPARATOR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    config TEXT NOT NULL,
+    top_keyword TEXT,
+    source TEXT NOT NULL,
+    counts TEXT NOT NULL
+)
+"""
+
+# First-page signatures of dedup.plan_unique, kept so incremental runs do not
+# reopen every paper. A row applies while the file keeps its size and mtime.
+SIGNATURE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    signature TEXT
+)
+"""
+TABLES = ["papers", "signatures"]
+
+class ResultsStore:
+    """
+    SQLite store of per-paper classification results, one row per PDF.
+
+    A row is reused while the file and the classification settings are
+    unchanged. A file whose size or modification time changed is rehashed,
+    and its row is still reused if the content is the same.
+
+    Args:
+        db_path (str): The path to the SQLite database file.
+        commit_every (int): Number of saved rows between commits.
+    """
+    def __init__(self, db_path, commit_every=50):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self._pending = 0
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(SCHEMA)
+        self.connection.execute(SIGNATURE_SCHEMA)
+        self.connection.commit()
+
+    def lookup(self, path, config):
+        """
+        Return the stored result of a file if it is still current.
+
+        Args:
+            path (str): The path to the PDF file.
+            config (str): The signature of the classification settings.
+
+        Returns:
+            dict: The stored result with keys top_keyword, source and counts,
+                or None if the file has to be classified again.
+        """
+        row = self.connection.execute(
+            "SELECT size, mtime, content_hash, config, top_keyword, source, counts FROM papers WHERE path = ?",
+            (os.path.abspath(path),)).fetchone()
+        if row is None:
+            return None
+        size, mtime, content_hash, row_config, top_keyword, source, counts = row
+        if row_config != config:
+            return None
+        current_size, current_mtime = source_stat(path)
+        if current_size != size:
+            return None
+        if current_mtime != mtime:
+            if file_content_hash(path) != content_hash:
+                return None
+            self.connection.execute("UPDATE papers SET mtime = ? WHERE path = ?",
+                                    (current_mtime, os.path.abspath(path)))
+            self._count_write()
+        return {
+            "top_keyword": top_keyword if top_keyword is not None else False,
+            "source": source,
+            "counts": json.loads(counts),
+        }
+
+    def save(self, path, config, result):
+        """
+        Store the result of a file.
+
+        Args:
+            path (str): The path to the PDF file.
+            config (str): The signature of the classification settings.
+            result (dict): The result with keys top_keyword, source and counts.
+        """
+        size, mtime = source_stat(path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO papers (path, size, mtime, content_hash, config, top_keyword, source, counts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(path), size, mtime, file_content_hash(path), config,
+             result["top_keyword"] or None, result["source"], json.dumps(dict(result["counts"]))))
+        self._count_write()
+
+    def lookup_signature(self, path):
+        """
+        Return the stored first-page signature of a file if it is still current.
+
+        Returns:
+            tuple: (found, signature). signature is None when the first page has no text.
+        """
+        row = self.connection.execute("SELECT size, mtime, signature FROM signatures WHERE path = ?",
+                                      (os.path.abspath(path),)).fetchone()
+        if row is None or (row[0], row[1]) != source_stat(path):
+            return False, None
+        return True, tuple(json.loads(row[2])) if row[2] is not None else None
+
+    def save_signature(self, path, signature):
+        """
+        Store the first-page signature of a file, or None if its first page has no text.
+        """
+        size, mtime = source_stat(path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO signatures (path, size, mtime, signature) VALUES (?, ?, ?, ?)",
+            (os.path.abspath(path), size, mtime, json.dumps(signature) if signature is not None else None))
+        self._count_write()
+
+    def iter_results(self, directory=None):
+        """
+        Yield the stored results without checking whether the files changed, so
+        they can be read without opening any PDF.
+
+        Args:
+            directory (str, optional): Only yield the rows of this directory or archive.
+
+        Yields:
+            tuple: (path, result), with result as returned by lookup.
+        """
+        query = "SELECT path, top_keyword, source, counts FROM papers"
+        parameters = ()
+        if directory is not None:
+            prefix = _prefix(directory)
+            query += " WHERE substr(path, 1, ?) = ?"
+            parameters = (len(prefix), prefix)
+        for path, top_keyword, source, counts in self.connection.execute(query + " ORDER BY path", parameters):
+            yield path, {
+                "top_keyword": top_keyword if top_keyword is not None else False,
+                "source": source,
+                "counts": json.loads(counts),
+            }
+
+    def prune(self, directory, paths):
+        """
+        Delete the rows of files in a directory that are no longer present.
+
+        Args:
+            directory (str): The corpus directory or archive.
+            paths (iterable of str): The paths of the PDF files still in the directory.
+        """
+        keep = {os.path.abspath(path) for path in paths}
+        prefix = _prefix(directory)
+        for table in TABLES:
+            stored = self.connection.execute(f"SELECT path FROM {table} WHERE substr(path, 1, ?) = ?",
+                                             (len(prefix), prefix)).fetchall()
+            for (path,) in stored:
+                # Files of subdirectories are not listed, so they are left alone; 
+                # every member of an archive is listed.
+                if path not in keep and (prefix.endswith(MEMBER_SEPARATOR) or
+                                         os.path.dirname(path) == prefix.rstrip(os.sep)):
+                    self.connection.execute(f"DELETE FROM {table} WHERE path = ?", (path,))
+        self.connection.commit()
+
+    def clear(self, directory=None):
+        """
+        Delete the rows of a directory, or every row if directory is None.
+        """
+        for table in TABLES:
+            if directory is None:
+                self.connection.execute(f"DELETE FROM {table}")
+            else:
+                prefix = _prefix(directory)
+                self.connection.execute(f"DELETE FROM {table} WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def _count_write(self):
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.connection.commit()
+            self._pending = 0
+
+def _prefix(directory):
+    # Stored paths of the files of a directory or the members of an archive start with this.
+    if is_archive(directory):
+        return os.path.abspath(directory) + MEMBER_SEPARATOR
+    return os.path.join(os.path.abspath(directory), "")
@@ -1,12 +1,20 @@
-import os
-import fitz  
-import pickle
-import spacy
-from spacy.matcher import PhraseMatcher
+import json
+import itertools
+import multiprocessing
 from collections import Counter
+import instrumentation
+from text_cache import TextCache
+from pdf_sections import LAYOUT_PROBE_PAGES, SectionIndex
+from matcher_artifact import get_matcher, classes_hash
+from results_store import ResultsStore
+from worker_pool import SupervisedPool, Quarantine
+from input_sources import list_pdfs, open_pdf, source_stat
+from dedup import SUPPLEMENT_KEYWORDS, first_page_signature, plan_unique
+from prefilter import PREFILTER_VERSION, skip_reason
 
 
 WATCHLIST = ["rodent","pupa"]
+SECTIONS_FOR_CHECKING = ["Abstract", "Methodology","Materials and Methods","Results","Methods", "Materials and Equipment"]
 
 def tokenize_and_match(text,matcher,nlp):
     """
@@ -14,13 +22,20 @@ def tokenize_and_match(text,matcher,nlp):
 
     Args:
         text (str): The text in which phrases will be matched.
+        matcher: A spaCy PhraseMatcher, or a KeywordMatcher when nlp is None.
+        nlp: The spaCy pipeline, or None for the spaCy-free backend.
 
     Returns:
         list of str: A list of matched phrases found in the input text.
     """    
+    if nlp is None:
+        with instrumentation.stage("matching"):
+            return matcher.match(text)
 
-    doc = nlp(text)
-    matches = matcher(doc)
+    with instrumentation.stage("tokenization"):
+        doc = nlp(text)
+    with instrumentation.stage("matching"):
+        matches = matcher(doc)
 
     matched_texts = []
     for match_id, start, end in matches:
@@ -29,6 +44,24 @@ def tokenize_and_match(text,matcher,nlp):
     
     return matched_texts
 
+def match_texts(texts, matcher, nlp, batch_size=64):
+    """
+    Tokenize and match phrases in many texts, batched through nlp.pipe.
+
+    Args:
+        texts (iterable of str): The texts in which phrases will be matched.
+        batch_size (int): Number of texts processed per batch.
+
+    Returns:
+        list of list of str: The matched phrases of each text, in input order.
+    """
+    if nlp is None:
+        return [matcher.match(text) for text in texts]
+    results = []
+    for doc in nlp.pipe(texts, batch_size=batch_size):
+        results.append([doc[start:end].text for match_id, start, end in matcher(doc)])
+    return results
+
 def get_top_keyword(animals):
     """
       This function identifies the most frequent animal term 
@@ -44,15 +77,24 @@ def get_top_keyword(animals):
     #watch_terms = ["egg","python","rodent","pupa","larva","primate","insect","bug"]
     # animals = [a for a in aanimals if a not in watch_terms]
 
-    top_keyword = ""
-    if len(animals) > 1:
-        _animals = Counter(animals)
-        top_keyword = sorted(_animals, key=lambda x: (-_animals[x], x))[0]
-    elif len(animals) == 1:
-        top_keyword = animals[0]
-    else:
+    if len(animals) == 0:
         return False
-    return top_keyword
+    return get_top_keyword_from_counts(Counter(animals))
+
+def get_top_keyword_from_counts(counts):
+    """
+      This function picks the most frequent term of a Counter in one linear pass. 
+      Ties go to the alphabetically first term, as in get_top_keyword.
+
+      Args:
+          counts (Counter): Animal terms and their number of mentions.
+
+      Returns:
+          str: The most frequent animal term, or False if counts is empty.
+    """
+    if not counts:
+        return False
+    return min(counts.items(), key=lambda item: (-item[1], item[0]))[0]
 
 def isSupplementary(pdf_path):
     """
@@ -65,13 +107,230 @@ def isSupplementary(pdf_path):
       Returns:
           bool: True if the filename suggests it's a supplementary file, False otherwise.
     """
-    keywords = ["_supplement"]
+    keywords = SUPPLEMENT_KEYWORDS
     for i in keywords:
         if i in pdf_path:
             return True
     return False
 
-def get_top_keyword_from_pdf(pdf_path, matcher,nlp):
+def plan_pdf_pages(index, sections_for_checking=SECTIONS_FOR_CHECKING):
+    """
+      This function chooses which pages of a PDF to read: the pages of 
+      the relevant sections of the table of contents or, when there is none, 
+      the first pages and a few pages around the middle of the document.
+
+      Args:
+          index (SectionIndex): The section index of the PDF.
+          sections_for_checking (list of str): Section titles to look for in the table of contents.
+
+      Returns:
+          list of int: Page numbers in reading order, or None if the PDF is too short to classify.
+    """
+    # print("Table of contents found.")
+    page_numbers = index.section_pages(sections_for_checking)
+
+    if len(page_numbers) == 0:
+        pdf_length = len(index)
+        if pdf_length > 6:
+            mid_page = pdf_length//2
+            # print("No table of contents found, reading selected pages 1",",".join([str(a) for a in range(mid_page-2,mid_page+2,1)]))
+            page_numbers = [0, 1] + [page_num for page_num in range(mid_page-2,mid_page+2,1) if page_num < pdf_length]
+        elif pdf_length > 2:
+            page_numbers = list(range(pdf_length))
+        else:
+            return None
+
+    return page_numbers
+
+def plan_pdf_texts(index, sections_for_checking=SECTIONS_FOR_CHECKING, detect_headings=True):
+    """
+      This function chooses the text to match in a PDF. When the table of 
+      contents has none of the relevant sections, the headings are first 
+      looked for in the page layout and only the text under the relevant 
+      ones is read; plan_pdf_pages is the fallback when none is found. The 
+      search gives up after LAYOUT_PROBE_PAGES pages without any heading.
+
+      Args:
+          index (SectionIndex): The section index of the PDF.
+          sections_for_checking (list of str): Section titles to look for.
+          detect_headings (bool): If True, detect headings from the layout of PDFs 
+              whose table of contents has none of the sections.
+
+      Returns:
+          iterator of str: The texts to match, extracted lazily, or None if the PDF 
+              is too short to classify.
+    """
+    page_numbers = index.section_pages(sections_for_checking)
+    if page_numbers:
+        instrumentation.record_path("toc")
+        return index.iter_page_texts(page_numbers)
+    if detect_headings and len(index) > 2:
+        # The layout is only searched past the first pages if they have headings, 
+        # and the pages the fallback reads keep their text from the search.
+        chunks = index.iter_layout_chunks(sections_for_checking, probe_pages=LAYOUT_PROBE_PAGES, 
+                                          keep_pages=set(plan_pdf_pages(index, sections_for_checking)))
+        first = next(chunks, None)
+        if first is not None:
+            instrumentation.record_path("layout")
+            return itertools.chain([first[2]], (text for section, page_num, text in chunks))
+    page_numbers = plan_pdf_pages(index, sections_for_checking)
+    if page_numbers is None:
+        instrumentation.record_path("skip")
+        return None
+    instrumentation.record_path("fallback")
+    return index.iter_page_texts(page_numbers)
+
+def extract_pdf_pages(pdf_path, sections_for_checking=SECTIONS_FOR_CHECKING, detect_headings=True):
+    """
+      This function extracts the texts chosen by plan_pdf_texts.
+
+      Args:
+          pdf_path (str): The path to the PDF file.
+          sections_for_checking (list of str): Section titles to look for.
+          detect_headings (bool): See plan_pdf_texts.
+
+      Returns:
+          list of str: The text of each page or section chunk, or None if the PDF 
+              is too short to classify.
+    """
+    with SectionIndex(pdf_path) as index:
+        texts = plan_pdf_texts(index, sections_for_checking, detect_headings)
+        if texts is None:
+            return None
+        return list(texts)
+
+def extract_pdf_text(pdf_path, sections_for_checking=SECTIONS_FOR_CHECKING, detect_headings=True):
+    """
+      This function extracts the text of the relevant sections of a PDF 
+      as one string.
+
+      Args:
+          pdf_path (str): The path to the PDF file.
+          sections_for_checking (list of str): Section titles to look for.
+          detect_headings (bool): See plan_pdf_texts.
+
+      Returns:
+          str: The extracted text, or None if the PDF is too short to classify.
+    """
+    pages = extract_pdf_pages(pdf_path, sections_for_checking, detect_headings)
+    if pages is None:
+        return None
+    return "\n".join(pages)
+
+def _cut_at_whitespace(text, limit):
+    # The longest prefix of text within limit characters that does not end 
+    # inside a word, so a cut "rats" never becomes a match for "rat".
+    if len(text) <= limit:
+        return text
+    cut = limit
+    while cut > 0 and not text[cut].isspace():
+        cut -= 1
+    return text[:cut]
+
+def _max_mentions(chars):
+    # A mention takes at least one character and is set apart from the next 
+    # one by at least one more, so this many characters hold no more mentions.
+    return (chars + 1) // 2
+
+def count_matches_in_pages(pages, matcher, nlp, max_pages=None, max_chars=None):
+    """
+      This function matches animal terms page by page and stops early once 
+      the leading term cannot be overtaken within the remaining budget. 
+      Pages are separated by a newline in the original full text, which always 
+      ends a token, so matching page by page finds the same terms.
+
+      The early exit needs a budget and a bound on the text still to be read: 
+      the characters left of max_chars, or the remaining pages when pages is 
+      a list. No term can gain more mentions than fit in that text, so the 
+      search ends once the lead is larger and the top keyword is the same as 
+      after reading the whole budget. Without a budget every page is read, so 
+      the counts are exact.
+
+      Args:
+          pages (iterable of str): Page texts, read lazily.
+          max_pages (int, optional): Maximum number of pages to read.
+          max_chars (int, optional): Maximum number of characters to match. 
+              The page that crosses the budget is cut at the last whitespace 
+              before it.
+
+      Returns:
+          Counter: Animal terms and their number of mentions.
+    """
+    counts = Counter()
+    chars_left = max_chars
+    budget = max_pages is not None or max_chars is not None
+    # Most mentions the pages after each page can hold, when the pages are known.
+    mentions_after = None
+    if budget and hasattr(pages, "__len__"):
+        last = len(pages) if max_pages is None else min(len(pages), max_pages)
+        mentions_after = [0] * max(last, 0)
+        for page_index in range(last - 2, -1, -1):
+            mentions_after[page_index] = mentions_after[page_index + 1] + _max_mentions(len(pages[page_index + 1]))
+    for page_index, page_text in enumerate(pages):
+        if max_pages is not None and page_index >= max_pages:
+            break
+        if chars_left is not None:
+            cut_text = _cut_at_whitespace(page_text, chars_left)
+            chars_left = 0 if len(cut_text) < len(page_text) else chars_left - len(cut_text)
+            page_text = cut_text
+        instrumentation.count("chars", len(page_text))
+        counts.update(tokenize_and_match(page_text, matcher, nlp))
+        if chars_left is not None and chars_left <= 0:
+            break
+        bounds = []
+        if chars_left is not None:
+            bounds.append(_max_mentions(chars_left))
+        if mentions_after is not None:
+            bounds.append(mentions_after[page_index])
+        top_two = counts.most_common(2)
+        if bounds and top_two:
+            lead = top_two[0][1] - (top_two[1][1] if len(top_two) > 1 else 0)
+            if lead > min(bounds):
+                break
+    return counts
+
+def count_pdf_matches(pdf_path, matcher, nlp, cache=None, max_pages=None, max_chars=None, detect_headings=True):
+    """
+      This function counts the animal terms in the relevant sections of a PDF.
+
+      Args:
+          pdf_path (str): The path to the PDF file.
+          cache (TextCache, optional): Cache of extracted text. On a hit the PDF is not opened.
+          max_pages (int, optional): Page budget per document.
+          max_chars (int, optional): Character budget per document.
+          detect_headings (bool): Find sections from the layout when the table of contents 
+              has none; see plan_pdf_texts.
+
+      Returns:
+          Counter: Animal terms and their number of mentions, or None if the PDF 
+              is too short to classify.
+    """
+    if cache is not None:
+        # On a miss plan_pdf_texts records the path taken while extracting; a 
+        # hit, including a cached skip, is recorded as the cache path.
+        key = cache.key(pdf_path, (SECTIONS_FOR_CHECKING, detect_headings))
+        found, pages = cache.get(key)
+        if found:
+            instrumentation.record_path("cache")
+        else:
+            pages = extract_pdf_pages(pdf_path, SECTIONS_FOR_CHECKING, detect_headings)
+            cache.put(key, pages)
+        if pages is None:
+            print("Skip",pdf_path)
+            return None
+        return count_matches_in_pages(pages, matcher, nlp, max_pages, max_chars)
+
+    # Page texts are not kept, so only the page being matched is in memory.
+    with SectionIndex(pdf_path, cache_pages=False) as index:
+        texts = plan_pdf_texts(index, SECTIONS_FOR_CHECKING, detect_headings)
+        if texts is None:
+            print("Skip",pdf_path)
+            return None
+        # Pages are only extracted when the matcher asks for them, so an 
+        # early exit also saves the extraction.
+        return count_matches_in_pages(texts, matcher, nlp, max_pages, max_chars)
+
+def get_top_keyword_from_pdf(pdf_path, matcher,nlp, cache=None, max_pages=None, max_chars=None, detect_headings=True):
     """
       This function analyzes a PDF to find the most frequent animal term 
       (excluding terms from a watchlist) from the relevant sections 
@@ -80,6 +339,10 @@ def get_top_keyword_from_pdf(pdf_path, matcher,nlp):
 
       Args:
           pdf_path (str): The path to the PDF file.
+          cache (TextCache, optional): Cache of extracted text. On a hit the PDF is not opened.
+          max_pages (int, optional): Page budget per document.
+          max_chars (int, optional): Character budget per document.
+          detect_headings (bool): See plan_pdf_texts.
 
       Returns:
           str: The most frequent animal term (excluding watchlist terms), 
@@ -88,109 +351,318 @@ def get_top_keyword_from_pdf(pdf_path, matcher,nlp):
     # if isSupplementary(pdf_path):
     #     print("Supplementary doc -- skip")
     #     return False
-    full_text = ""
-    sections_for_checking = ["Abstract", "Methodology","Materials and Methods","Results","Methods", "Materials and Equipment"]
-
-    with fitz.open(pdf_path) as pdf_document:
-        toc = pdf_document.get_toc()
-        if len(toc) > 0:
-            # print("Table of contents found.")
-            sections = {}
-            current_section = None
-            for toc_entry in toc:
-                level, title, page_num = toc_entry
-                page_num -= 1
-                if page_num < 0: 
-                    continue
-                for section in sections_for_checking:
-                    if section in title:
-                        if current_section is not None:
-                            sections[current_section]['end'] = page_num
-                        current_section = section
-                        sections[current_section] = {'start': page_num, 'end': None}
-                        break
-            if current_section is not None:
-                sections[current_section]['end'] = len(pdf_document)
-            
-            for sec_name, pages in sections.items():
-                start, end = pages['start'], pages['end']
-                for page_num in range(start, end):
-                    page_text = pdf_document.load_page(page_num).get_text("text")
-                    full_text += "\n" + page_text
-
-        if len(full_text) == 0:
-            pdf_length = len(pdf_document)
-            if pdf_length > 6:
-                mid_page = pdf_length//2
-                # print("No table of contents found, reading selected pages 1",",".join([str(a) for a in range(mid_page-2,mid_page+2,1)]))
-                full_text = pdf_document.load_page(0).get_text("text") + "\n" + pdf_document.load_page(1).get_text("text")
-                for page_num in range(mid_page-2,mid_page+2,1): 
-                    if page_num < pdf_length:
-                        page_text = pdf_document.load_page(page_num).get_text("text")
-                        full_text += "\n" + page_text
-            elif pdf_length > 2:
-                full_text = pdf_document.load_page(0).get_text("text")
-                for page_num in range(1,pdf_length): 
-                        page_text = pdf_document.load_page(page_num).get_text("text")
-                        full_text += "\n" + page_text
-            else:
-                print("Skip",pdf_path)
-                return False
-
-
-    animals = tokenize_and_match(full_text, matcher,nlp)
-    top_keyword = get_top_keyword(animals)
+    counts = count_pdf_matches(pdf_path, matcher, nlp, cache, max_pages, max_chars, detect_headings)
+    if counts is None:
+        return False
+    top_keyword = get_top_keyword_from_counts(counts)
     # print(pdf_path, top_keyword, animals)
 
     return top_keyword
 
-def analyze_papers(directory):
+def load_nlp_and_matcher(classes_path="classes", fast=True, backend="spacy"):
     """
-      This function analyzes all PDF files in a given directory to identify 
-      the most frequent animal term (excluding terms from a watchlist) 
-      for each paper. It extracts text from relevant sections 
-      ("Methodology", "Materials and Methods", "Results", "Methods") 
-      and skips supplementary files.
+      This function returns the spaCy English model and a PhraseMatcher built 
+      from the animal terms listed in the classes file. The pair is loaded once 
+      per process from a precompiled artifact and shared by every caller; 
+      it is rebuilt automatically when the classes file changes.
 
       Args:
-          directory (str): The path to the directory containing PDF files.
+          classes_path (str): The path to the file with one animal term per line.
+          fast (bool): If True, load only the tokenizer. The matcher compares token 
+              text, so the matches are the same as with the full pipeline; 
+              tests/test_matching.py checks this on recorded sample texts.
+          backend (str): "spacy" for the spaCy PhraseMatcher, or "aho-corasick" for 
+              the spaCy-free KeywordMatcher. spaCy is not imported for the latter.
 
       Returns:
-          tuple: A tuple containing three elements:
-              - total_counter (dict): A dictionary where keys are animal terms 
-                  (excluding watchlist terms) and values are their total counts across all papers.
-              - tot (int): The total number of animal terms found (excluding watchlist terms).
-              - skipped (int): The number of PDF files skipped (e.g., supplementary files).
+          tuple: A tuple containing the spaCy pipeline (None for the aho-corasick 
+              backend) and the matcher.
+    """
+    with instrumentation.stage("load_matcher"):
+        return get_matcher(classes_path, backend, fast)
+
+def compare_fast_match(texts, classes_path="classes"):
+    """
+      This function checks that fast (tokenizer-only) matching returns the same 
+      phrases as matching with the full spaCy pipeline.
+
+      Args:
+          texts (list of str): Sample texts to compare on.
+          classes_path (str): The path to the file listing the animal terms.
+
+      Returns:
+          list of tuple: (text, full_matches, fast_matches) for every text where the two differ.
+    """
+    full_nlp, full_matcher = load_nlp_and_matcher(classes_path, fast=False)
+    fast_nlp, fast_matcher = load_nlp_and_matcher(classes_path, fast=True)
+    fast_results = match_texts(texts, fast_matcher, fast_nlp)
+    mismatches = []
+    for text, fast_matches in zip(texts, fast_results):
+        full_matches = tokenize_and_match(text, full_matcher, full_nlp)
+        if full_matches != fast_matches:
+            mismatches.append((text, full_matches, fast_matches))
+    return mismatches
+
+def compare_backends(texts, classes_path="classes"):
+    """
+      This function checks that the aho-corasick backend returns the same 
+      phrases as the spaCy backend.
+
+      Args:
+          texts (list of str): Sample texts to compare on.
+          classes_path (str): The path to the file listing the animal terms.
+
+      Returns:
+          list of tuple: (text, spacy_matches, aho_matches) for every text where the two differ.
+    """
+    spacy_nlp, spacy_matcher = load_nlp_and_matcher(classes_path, backend="spacy")
+    _, aho_matcher = load_nlp_and_matcher(classes_path, backend="aho-corasick")
+    spacy_results = match_texts(texts, spacy_matcher, spacy_nlp)
+    mismatches = []
+    for text, spacy_matches in zip(texts, spacy_results):
+        aho_matches = aho_matcher.match(text)
+        if spacy_matches != aho_matches:
+            mismatches.append((text, spacy_matches, aho_matches))
+    return mismatches
+
+def normalize_title(file_path):
+    """
+      This function turns a PDF file path into a lower-case title.
+
+      Args:
+          file_path (str): The path to the PDF file.
+
+      Returns:
+          str: The normalized title.
+    """
+    return file_path.replace("papers_full/","").replace("-"," ").replace("_"," ").replace(".pdf","").lower()
+
+def get_top_keyword_from_title(file_path, matcher, nlp):
+    """
+      This function normalizes a PDF file path into a title and returns 
+      the most frequent animal term found in it.
+
+      Args:
+          file_path (str): The path to the PDF file.
+
+      Returns:
+          str: The most frequent animal term in the title, or False if none is found.
+    """
+    matched_texts = tokenize_and_match(normalize_title(file_path), matcher, nlp)
+    return get_top_keyword(matched_texts)
+
+def read_metadata_title(file_path):
+    """
+      This function reads the title stored in a PDF's metadata.
+
+      Args:
+          file_path (str): The path to the PDF file.
+
+      Returns:
+          str: The lower-case title, or an empty string if there is none or 
+              the PDF cannot be opened, such as a corrupt or encrypted file.
+    """
+    try:
+        with instrumentation.stage("open"):
+            with open_pdf(file_path) as document:
+                title = (document.metadata or {}).get("title") or ""
+    except Exception as e:
+        print("Could not read the metadata of", file_path, f"{type(e).__name__}: {e}")
+        return ""
+    return title.lower()
+
+def match_titles(files, matcher, nlp, metadata_titles=False):
+    """
+      This function is the first tier of the classification: it matches the 
+      titles of all files in one batched pass, so papers whose title names 
+      an animal never have their PDF read.
+
+      Args:
+          files (list of tuple): (filename, file_path) pairs.
+          metadata_titles (bool): If True, files whose name has no animal term 
+              are also matched on the title in their PDF metadata, read here one 
+              file after another. The pipeline reads them in the PDF tier instead; 
+              see classify_paper_details.
+
+      Returns:
+          dict: File paths mapped to the details of the title hits, in the 
+              format of classify_paper_details. Files that are not in it must 
+              be read.
+    """
+    hits = {}
+    candidates = [(file_path, normalize_title(file_path)) for filename, file_path in files]
+    for tier in range(2 if metadata_titles else 1):
+        if tier == 1:
+            candidates = [(file_path, read_metadata_title(file_path)) for filename, file_path in files 
+                          if file_path not in hits]
+        with instrumentation.stage("title_matching"):
+            matched = match_texts([title for file_path, title in candidates], matcher, nlp)
+        for (file_path, title), title_matches in zip(candidates, matched):
+            if title_matches:
+                instrumentation.record_path("title")
+                hits[file_path] = {"top_keyword": get_top_keyword(title_matches), "source": "title", 
+                                   "counts": Counter(title_matches)}
+    return hits
+
+def _read_prefilter_reason(file_path):
+    with instrumentation.stage("open"):
+        document = open_pdf(file_path)
+    with document:
+        if len(document) == 0:
+            return None
+        with instrumentation.stage("extraction"):
+            first_page = document.load_page(0).get_text("text")
+        metadata = document.metadata or {}
+    with instrumentation.stage("prefilter"):
+        return skip_reason(first_page, metadata)
+
+def prefilter_reason(file_path, cache=None):
+    """
+      This function checks a paper with the cheap tests of prefilter.skip_reason, 
+      reading only its first page and metadata, so papers in another language 
+      or with no biology content are skipped before their sections are read.
+
+      Args:
+          file_path (str): The path to the PDF file.
+          cache (TextCache, optional): Cache of extracted PDF text. The verdict is 
+              stored there, so re-runs do not open the PDF for it.
+
+      Returns:
+          str: Why the paper is skipped, such as "language: es", or None if it should be read.
+    """
+    if cache is not None:
+        reason = cache.get_or_extract(file_path, ("prefilter", PREFILTER_VERSION), 
+                                      lambda path: _read_prefilter_reason(path) or "")
+        return reason or None
+    return _read_prefilter_reason(file_path)
+
+def classify_paper_details(file_path, matcher, nlp, cache=None, max_pages=None, max_chars=None, detect_headings=True,
+                           check_title=True, prefilter=False, metadata_title=False):
+    """
+      This function tags a single paper like classify_paper and also reports 
+      how the tag was chosen.
+
+      Args:
+          file_path (str): The path to the PDF file.
+          cache (TextCache, optional): Cache of extracted PDF text.
+          max_pages (int, optional): Page budget per document.
+          max_chars (int, optional): Character budget per document.
+          detect_headings (bool): See plan_pdf_texts.
+          check_title (bool): If False, go straight to the PDF, for papers whose 
+              title already missed in match_titles.
+          metadata_title (bool): If True, a paper whose file name has no animal term 
+              is then matched on the title in its PDF metadata before its text is read.
+          prefilter (bool): If True, papers whose title has no animal term are first 
+              checked with prefilter_reason and skipped if they fail.
+
+      Returns:
+          dict: A dictionary with three keys:
+              - top_keyword (str): The most frequent animal term, or False if none is found.
+              - source (str): "title", "pdf", "skip" if the PDF was too short to read, 
+                  or "filtered" if it failed the prefilter, with the reason under a reason key.
+              - counts (Counter): The mentions of each animal term in the title or PDF.
+    """
+    with instrumentation.document(file_path):
+        title_matches = tokenize_and_match(normalize_title(file_path), matcher, nlp) if check_title else []
+        if not title_matches and metadata_title:
+            title_matches = tokenize_and_match(read_metadata_title(file_path), matcher, nlp)
+        if title_matches:
+            instrumentation.record_path("title")
+            return {"top_keyword": get_top_keyword(title_matches), "source": "title", 
+                    "counts": Counter(title_matches)}
+        if prefilter:
+            reason = prefilter_reason(file_path, cache)
+            if reason:
+                instrumentation.record_path("filtered")
+                print("Skip", file_path, reason)
+                return {"top_keyword": False, "source": "filtered", "counts": Counter(), "reason": reason}
+        counts = count_pdf_matches(file_path, matcher, nlp, cache, max_pages, max_chars, detect_headings)
+    if counts is None:
+        return {"top_keyword": False, "source": "skip", "counts": Counter()}
+    return {"top_keyword": get_top_keyword_from_counts(counts), "source": "pdf", "counts": counts}
+
+def classify_pdf_bytes(data, matcher, nlp, filename=None, max_pages=None, max_chars=None, detect_headings=True):
+    """
+      This function tags a paper received in memory, such as an upload, 
+      without writing it to disk. The file name, if given, is matched first 
+      as in classify_paper_details.
+
+      Args:
+          data (bytes): The content of the PDF file.
+          filename (str, optional): The name of the file, used as its title.
+          max_pages (int, optional): Page budget per document.
+          max_chars (int, optional): Character budget per document.
+          detect_headings (bool): See plan_pdf_texts.
+
+      Returns:
+          dict: A dictionary with the keys top_keyword, source and counts, as 
+              returned by classify_paper_details.
+    """
+    import fitz
+    if filename:
+        title_matches = tokenize_and_match(normalize_title(filename), matcher, nlp)
+        if title_matches:
+            instrumentation.record_path("title")
+            return {"top_keyword": get_top_keyword(title_matches), "source": "title", 
+                    "counts": Counter(title_matches)}
+    with instrumentation.stage("open"):
+        document = fitz.open(stream=data, filetype="pdf")
+    with document, SectionIndex(document, cache_pages=False) as index:
+        texts = plan_pdf_texts(index, SECTIONS_FOR_CHECKING, detect_headings)
+        if texts is None:
+            return {"top_keyword": False, "source": "skip", "counts": Counter()}
+        counts = count_matches_in_pages(texts, matcher, nlp, max_pages, max_chars)
+    return {"top_keyword": get_top_keyword_from_counts(counts), "source": "pdf", "counts": counts}
+
+def classify_paper(file_path, matcher, nlp, cache=None, max_pages=None, max_chars=None, detect_headings=True):
+    """
+      This function tags a single paper, first from its file name and, 
+      if the title has no animal term, from the relevant sections of the PDF.
+
+      Args:
+          file_path (str): The path to the PDF file.
+          cache (TextCache, optional): Cache of extracted PDF text.
+          max_pages (int, optional): Page budget per document.
+          max_chars (int, optional): Character budget per document.
+          detect_headings (bool): See plan_pdf_texts.
+
+      Returns:
+          str: The most frequent animal term, or False if none is found.
+    """
+    return classify_paper_details(file_path, matcher, nlp, cache, max_pages, max_chars, 
+                                  detect_headings)["top_keyword"]
+
+def list_pdf_files(directory):
+    """
+      This function lists the PDF files of a directory in os.listdir order, 
+      or the PDF members of a zip or tar archive in archive order.
+
+      Args:
+          directory (str): The path to the directory containing PDF files, or to an archive.
+
+      Returns:
+          list of tuple: (filename, file_path) pairs for every PDF file. Archive 
+              members have a file_path of the form "archive::member".
+    """
+    return list_pdfs(directory)
+
+def aggregate_results(results):
+    """
+      This function merges per-paper top keywords into the totals returned 
+      by analyze_papers. Results must be given in os.listdir order so that 
+      serial and parallel runs produce the same dictionary.
+
+      Args:
+          results (iterable): (filename, top_keyword) pairs.
+
+      Returns:
+          tuple: total_counter (dict), tot (int) and skipped (int).
     """
     tot = 0
     skipped = 0 
     total_counter = {}
-    ctr = 1
-    nlp = spacy.load('en_core_web_sm')
-    # print("English dictionary loaded..")
-    matcher = PhraseMatcher(nlp.vocab)
-
-    with open("classes", "r") as file:
-        animals = [line.strip() for line in file]
-
-    patterns = [nlp(animal) for animal in animals]
-    matcher.add("ANIMAL", patterns)
-
-    for filename in os.listdir(directory):
-        if filename.endswith(".pdf"):
-            # print("Reading",ctr,"of",len(os.listdir(directory)))
-            file_path = os.path.join(directory, filename)
-            _file_path = file_path.replace("papers_full/","").replace("-"," ").replace("_"," ").replace(".pdf","").lower()
-            doc = nlp(_file_path)
-            title_tokens = matcher(doc)
-            matched_texts = []
-            for match_id, start, end in title_tokens:
-                span = doc[start:end]
-                matched_texts.append(span.text)
-            top_keyword = get_top_keyword(matched_texts)
-            if not(top_keyword):
-                top_keyword = get_top_keyword_from_pdf(file_path, matcher,nlp)
-            
+    for filename, top_keyword in results:
+        with instrumentation.stage("aggregation"):
             if top_keyword not in total_counter.keys():
                 total_counter[top_keyword] = 1
                 tot+=1
@@ -200,9 +672,409 @@ def analyze_papers(directory):
             if not(top_keyword):
                 print("No topword",filename)
                 skipped+=1
-        ctr+=1
     return total_counter,tot,skipped
 
+# Set in the parent before forking so that workers share the loaded model 
+# copy-on-write, or by _init_worker when processes are spawned.
+_worker_state = {}
+
+def _init_worker(classes_path, fast, backend, cache_dir, options, instrument):
+    if "matcher" not in _worker_state:
+        _worker_state["nlp"], _worker_state["matcher"] = load_nlp_and_matcher(classes_path, fast, backend)
+    _worker_state["cache"] = TextCache(cache_dir) if cache_dir else None
+    _worker_state["options"] = options
+    _worker_state["instrument"] = instrument
+
+def _classify_in_worker(item):
+    filename, file_path = item
+    # Each task records into a fresh recorder whose snapshot goes back to the 
+    # parent with the result, so the parent's totals cover every worker.
+    if _worker_state["instrument"]:
+        instrumentation.enable()
+    details = classify_paper_details(file_path, _worker_state["matcher"], _worker_state["nlp"], 
+                                     _worker_state["cache"], **_worker_state["options"])
+    snapshot = instrumentation.disable().snapshot() if _worker_state["instrument"] else None
+    return filename, file_path, details, snapshot
+
+def _iter_parallel(files, workers, classes_path, fast=True, backend="spacy", cache_dir=None, options=None, 
+                   ordered=True, chunksize=1):
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        _worker_state["nlp"], _worker_state["matcher"] = load_nlp_and_matcher(classes_path, fast, backend)
+    else:
+        context = multiprocessing.get_context()
+    initargs = (classes_path, fast, backend, cache_dir, options or {}, instrumentation.enabled())
+    try:
+        with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            # imap keeps os.listdir order, which keeps the merged totals identical 
+            # to a serial run; imap_unordered hands results over as soon as they are done.
+            imap = pool.imap if ordered else pool.imap_unordered
+            for filename, file_path, details, snapshot in imap(_classify_in_worker, files, chunksize=chunksize):
+                recorder = instrumentation.get_recorder()
+                if snapshot is not None and recorder is not None:
+                    recorder.merge(snapshot)
+                yield filename, file_path, details
+    finally:
+        _worker_state.clear()
+
+def _quarantined(reason):
+    return {"top_keyword": False, "source": "quarantine", "counts": Counter(), "reason": reason}
+
+def _iter_supervised(files, workers, classes_path, fast=True, backend="spacy", cache_dir=None, options=None, 
+                     ordered=True, supervision=None):
+    # Like _iter_parallel, but each paper runs under the deadline of a 
+    # SupervisedPool and offending files are quarantined instead of stalling the batch.
+    supervision = supervision or {}
+    quarantine = Quarantine(supervision.get("quarantine_path"))
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        _worker_state["nlp"], _worker_state["matcher"] = load_nlp_and_matcher(classes_path, fast, backend)
+    else:
+        context = multiprocessing.get_context()
+    initargs = (classes_path, fast, backend, cache_dir, options or {}, instrumentation.enabled())
+    # Files quarantined by an earlier run are not tried again.
+    buffered = {}
+    todo = []
+    for index, (filename, file_path) in enumerate(files):
+        if file_path in quarantine:
+            instrumentation.record_path("quarantine")
+            buffered[index] = (filename, file_path, _quarantined(quarantine.reason(file_path)))
+        else:
+            todo.append((index, (filename, file_path)))
+    next_index = 0
+    try:
+        if not ordered:
+            yield from (buffered.pop(index) for index in sorted(buffered))
+        with SupervisedPool(workers, _classify_in_worker, _init_worker, initargs, supervision.get("timeout"), 
+                            supervision.get("max_tasks_per_worker"), supervision.get("max_memory_mb"), 
+                            context) as pool:
+            outcomes = pool.imap_unordered([item for index, item in todo])
+            for task_index, (filename, file_path), status, value in outcomes:
+                if status == "ok":
+                    filename, file_path, details, snapshot = value
+                    recorder = instrumentation.get_recorder()
+                    if snapshot is not None and recorder is not None:
+                        recorder.merge(snapshot)
+                else:
+                    reason = f"{status} after {value:.1f}s" if status == "timeout" else f"{status}: {value}"
+                    print("Quarantined", file_path, reason)
+                    instrumentation.record_path("quarantine")
+                    quarantine.add(file_path, reason)
+                    details = _quarantined(reason)
+                if not ordered:
+                    yield filename, file_path, details
+                    continue
+                buffered[todo[task_index][0]] = (filename, file_path, details)
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+        while next_index in buffered:
+            yield buffered.pop(next_index)
+            next_index += 1
+    finally:
+        _worker_state.clear()
+
+def _iter_details(files, workers=1, classes_path="classes", fast=True, backend="spacy", cache_dir=None, 
+                  options=None, ordered=True, supervision=None):
+    # Yields (filename, file_path, details) for each file, serially, from the 
+    # pool or, when a timeout or recycling limit is set, from a SupervisedPool.
+    options = options or {}
+    if files and supervision and any(value is not None for value in supervision.values()):
+        yield from _iter_supervised(files, max(1, min(workers, len(files))), classes_path, fast, backend, 
+                                    cache_dir, options, ordered, supervision)
+    elif workers > 1 and len(files) > 1:
+        yield from _iter_parallel(files, min(workers, len(files)), classes_path, fast, backend, cache_dir, 
+                                  options, ordered)
+    elif files:
+        nlp, matcher = load_nlp_and_matcher(classes_path, fast, backend)
+        cache = TextCache(cache_dir) if cache_dir else None
+        for filename, file_path in files:
+            yield filename, file_path, classify_paper_details(file_path, matcher, nlp, cache, **options)
+
+def _iter_cascade(files, workers=1, classes_path="classes", fast=True, backend="spacy", cache_dir=None, 
+                  options=None, ordered=True, metadata_titles=False, supervision=None):
+    # Title tier for every file first, then the PDF tier for the misses only. 
+    # Unordered, the misses go largest first so a slow paper does not start 
+    # last and leave the other workers idle. Metadata titles need the PDF to be 
+    # opened, so they are read in the PDF tier, under the same deadline and 
+    # quarantine as the text.
+    if not files:
+        return
+    nlp, matcher = load_nlp_and_matcher(classes_path, fast, backend)
+    hits = match_titles(files, matcher, nlp)
+    misses = [(filename, file_path) for filename, file_path in files if file_path not in hits]
+    if not ordered:
+        misses.sort(key=lambda item: source_stat(item[1])[0], reverse=True)
+    pdf_options = dict(options or {}, check_title=False)
+    if metadata_titles:
+        pdf_options["metadata_title"] = True
+    details = _iter_details(misses, workers, classes_path, fast, backend, cache_dir, pdf_options, ordered, 
+                            supervision)
+    if ordered:
+        for filename, file_path in files:
+            yield (filename, file_path, hits[file_path]) if file_path in hits else next(details)
+    else:
+        for filename, file_path in files:
+            if file_path in hits:
+                yield filename, file_path, hits[file_path]
+        yield from details
+
+def iter_classifications(directory, workers=1, classes_path="classes", cache_dir=None, fast=True, backend="spacy",
+                         max_pages=None, max_chars=None, detect_headings=True, ordered=False, metadata_titles=False,
+                         timeout=None, max_tasks_per_worker=None, max_memory_mb=None, quarantine_path=None,
+                         prefilter=False, matrix_path=None):
+    """
+      This function classifies the PDF files of a directory and yields the 
+      result of each paper as soon as it is ready, so memory stays flat 
+      however large the corpus is.
+
+      Args:
+          directory (str): The path to the directory containing PDF files.
+          workers (int): Number of worker processes; see analyze_papers.
+          ordered (bool): If True, yield in os.listdir order. Otherwise title hits 
+              come first and the other results are yielded in completion order.
+          matrix_path (str, optional): Directory to save the term matrix of the 
+              yielded counts in, once every result has been yielded.
+          The other arguments are the same as for analyze_papers.
+
+      Yields:
+          dict: A dictionary with the keys filename, path, top_keyword, source 
+              and counts (see classify_paper_details). Quarantined papers have the 
+              source "quarantine" and a reason key.
+    """
+    options = {"max_pages": max_pages, "max_chars": max_chars, "detect_headings": detect_headings}
+    if prefilter:
+        options["prefilter"] = True
+    supervision = {"timeout": timeout, "max_tasks_per_worker": max_tasks_per_worker, 
+                   "max_memory_mb": max_memory_mb, "quarantine_path": quarantine_path}
+    files = list_pdf_files(directory)
+    builder = _matrix_builder(classes_path) if matrix_path else None
+    for filename, file_path, details in _iter_cascade(files, workers, classes_path, fast, backend, cache_dir, 
+                                                      options, ordered, metadata_titles, supervision):
+        if builder is not None:
+            builder.add_result(filename, details)
+        yield {"filename": filename, "path": file_path, **details}
+    if builder is not None:
+        builder.build().save(matrix_path)
+
+def _matrix_builder(classes_path):
+    # numpy is only needed when a term matrix is saved.
+    from keyword_engine import load_terms
+    from term_matrix import TermMatrixBuilder
+    return TermMatrixBuilder(load_terms(classes_path))
+
+def write_jsonl(results, output):
+    """
+      This function writes per-paper results to a JSON Lines file, one line 
+      per paper, flushing after each line so readers see results as they arrive.
+
+      Args:
+          results (iterable of dict): Results from iter_classifications.
+          output (str or file): The path of the output file, or an open text file.
+
+      Returns:
+          int: The number of results written.
+    """
+    if isinstance(output, str):
+        with open(output, "a", encoding="utf-8") as file:
+            return write_jsonl(results, file)
+    written = 0
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        written += 1
+    return written
+
+def _config_signature(classes_path, backend, options, metadata_titles=False):
+    # Settings that change a paper's result; stored rows are reused only 
+    # while these stay the same.
+    signature = {
+        "classes": classes_hash(classes_path),
+        "backend": backend,
+        "sections": SECTIONS_FOR_CHECKING,
+        "options": options,
+    }
+    if metadata_titles:
+        signature["metadata_titles"] = True
+    return json.dumps(signature, sort_keys=True)
+
+def _signature_in_worker(item):
+    filename, file_path = item
+    return first_page_signature(file_path)
+
+def _first_page_signatures(files, workers=1, store=None, supervision=None):
+    # Signatures for dedup.plan_unique, read from the results store when the 
+    # file is unchanged. Under a timeout they are computed in a SupervisedPool, 
+    # so a first page that hangs MuPDF quarantines its file like classification 
+    # does. Files that cannot be read get no signature and are kept as unique.
+    signatures = {}
+    todo = []
+    for filename, file_path in files:
+        found, signature = store.lookup_signature(file_path) if store is not None else (False, None)
+        if found:
+            signatures[file_path] = signature
+        else:
+            todo.append((filename, file_path))
+    supervision = supervision or {}
+    if todo and supervision.get("timeout") is not None:
+        quarantine = Quarantine(supervision.get("quarantine_path"))
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        with SupervisedPool(max(1, min(workers, len(todo))), _signature_in_worker, timeout=supervision["timeout"], 
+                            context=context) as pool:
+            outcomes = [(file_path, status, value) 
+                        for index, (filename, file_path), status, value in pool.imap_unordered(todo)]
+    else:
+        outcomes = []
+        for filename, file_path in todo:
+            try:
+                outcomes.append((file_path, "ok", first_page_signature(file_path)))
+            except Exception as e:
+                outcomes.append((file_path, "error", f"{type(e).__name__}: {e}"))
+    for file_path, status, value in outcomes:
+        if status == "ok":
+            signatures[file_path] = value
+            if store is not None:
+                store.save_signature(file_path, value)
+        elif status == "error":
+            print("Could not read", file_path, value)
+        else:
+            reason = f"{status} after {value:.1f}s" if status == "timeout" else f"{status}: {value}"
+            print("Quarantined", file_path, reason)
+            instrumentation.record_path("quarantine")
+            quarantine.add(file_path, reason)
+    return signatures
+
+def analyze_papers(directory, workers=1, classes_path="classes", cache_dir=None, fast=True, backend="spacy",
+                   max_pages=None, max_chars=None, detect_headings=True, db_path=None, rebuild=False, 
+                   metadata_titles=False, timeout=None, max_tasks_per_worker=None, max_memory_mb=None, 
+                   quarantine_path=None, deduplicate=False, prefilter=False, matrix_path=None):
+    """
+      This function analyzes all PDF files in a given directory to identify 
+      the most frequent animal term (excluding terms from a watchlist) 
+      for each paper. It extracts text from relevant sections 
+      ("Methodology", "Materials and Methods", "Results", "Methods") 
+      and skips supplementary files.
+
+      Args:
+          directory (str): The path to the directory containing PDF files.
+          workers (int): Number of worker processes. 1 runs serially in this process; 
+              larger values classify papers in a process pool. The model is loaded 
+              before forking so workers share it copy-on-write.
+          classes_path (str): The path to the file listing the animal terms.
+          cache_dir (str, optional): Directory of the extracted-text cache. Re-runs over 
+              unchanged PDFs then skip fitz entirely.
+          fast (bool): If True, tokenize only instead of running the full spaCy pipeline. 
+              The labels are the same; set False to reproduce the original slow path.
+          backend (str): "spacy" or "aho-corasick"; see load_nlp_and_matcher.
+          max_pages (int, optional): Page budget per document.
+          max_chars (int, optional): Character budget per document. Reading a paper 
+              stops early once its leading term cannot be overtaken within the budget.
+          detect_headings (bool): For PDFs whose table of contents has none of the relevant 
+              sections, find them from the page layout; see plan_pdf_texts.
+          db_path (str, optional): SQLite results store. Only new or changed files are 
+              classified; the others reuse their stored result.
+          rebuild (bool): If True, drop the stored results of the directory and classify 
+              every file again.
+          metadata_titles (bool): If True, papers whose file name has no animal term 
+              are also tagged from the title in their PDF metadata before their text is read.
+          timeout (float, optional): Seconds a paper may take. A paper that runs longer 
+              has its worker killed and is quarantined with no tag. Setting this runs 
+              papers in worker processes even when workers is 1.
+          max_tasks_per_worker (int, optional): Replace each worker process after this many papers.
+          max_memory_mb (float, optional): Replace a worker process once its resident 
+              memory exceeds this, returning memory held by MuPDF.
+          quarantine_path (str, optional): JSON file listing the papers that timed out or 
+              failed. Listed papers are skipped by later runs until the file changes.
+          deduplicate (bool): If True, skip supplementary files and copies of the same 
+              paper (identical files, or re-downloads with the same first page), so 
+              total_counter counts each unique paper once; see dedup.plan_unique. 
+              Quarantined files are not opened, and with db_path the first-page 
+              signatures are kept in the store.
+          prefilter (bool): If True, papers whose title has no animal term are first 
+              checked on their first page and metadata, and skipped without reading 
+              their sections if they are not in English or show no biology content; 
+              see prefilter_reason. Skipped papers are printed with the reason.
+          matrix_path (str, optional): Directory to save the term matrix of the 
+              per-paper counts in, including those reused from db_path, so the 
+              corpus can be rescored with term_matrix.TermMatrix.rescore; see 
+              TermMatrixBuilder.add_result.
+
+      Returns:
+          tuple: A tuple containing three elements:
+              - total_counter (dict): A dictionary where keys are animal terms 
+                  (excluding watchlist terms) and values are their total counts across all papers.
+              - tot (int): The total number of animal terms found (excluding watchlist terms).
+              - skipped (int): The number of PDF files skipped: papers with no animal term and, 
+                  with deduplicate, the duplicates and supplementary files that were not classified.
+    """
+    files = list_pdf_files(directory)
+    options = {"max_pages": max_pages, "max_chars": max_chars, "detect_headings": detect_headings}
+    if prefilter:
+        options["prefilter"] = True
+    supervision = {"timeout": timeout, "max_tasks_per_worker": max_tasks_per_worker, 
+                   "max_memory_mb": max_memory_mb, "quarantine_path": quarantine_path}
+
+    top_keywords = {}
+    # Results by path, kept for the term matrix.
+    results_by_path = {}
+    store = None
+    if db_path:
+        store = ResultsStore(db_path)
+        config = _config_signature(classes_path, backend, options, metadata_titles)
+        if rebuild:
+            store.clear(directory)
+        else:
+            store.prune(directory, [file_path for filename, file_path in files])
+    not_classified = 0
+    if deduplicate:
+        quarantine = Quarantine(quarantine_path)
+        skip = {file_path for filename, file_path in files if file_path in quarantine}
+        signatures = _first_page_signatures([item for item in files if item[1] not in skip], workers, 
+                                            store, supervision)
+        plan = plan_unique(files, skip=skip, signatures=signatures)
+        instrumentation.count("duplicates", len(plan.duplicates))
+        instrumentation.count("supplements", len(plan.supplements))
+        print(plan.report())
+        files = plan.unique
+        not_classified = len(plan.duplicates) + len(plan.supplements)
+    if store is not None and not rebuild:
+        for filename, file_path in files:
+            stored = store.lookup(file_path, config)
+            if stored is not None:
+                top_keywords[file_path] = stored["top_keyword"]
+                if matrix_path:
+                    results_by_path[file_path] = stored
+    todo = [(filename, file_path) for filename, file_path in files if file_path not in top_keywords]
+
+    # Titles are matched for all files at once; only the misses are read, 
+    # largest first. The totals do not depend on the order.
+    results = _iter_cascade(todo, workers, classes_path, fast, backend, cache_dir, options, ordered=False, 
+                            metadata_titles=metadata_titles, supervision=supervision)
+    try:
+        for filename, file_path, details in results:
+            top_keywords[file_path] = details["top_keyword"]
+            if matrix_path:
+                results_by_path[file_path] = details
+            # Quarantined papers are not stored, so they are tried again once 
+            # taken off the quarantine list.
+            if store is not None and details["source"] != "quarantine":
+                store.save(file_path, config, details)
+    finally:
+        if store is not None:
+            store.close()
+
+    if matrix_path:
+        builder = _matrix_builder(classes_path)
+        for filename, file_path in files:
+            builder.add_result(filename, results_by_path[file_path])
+        builder.build().save(matrix_path)
+    total_counter, tot, skipped = aggregate_results((filename, top_keywords[file_path]) 
+                                                    for filename, file_path in files)
+    return total_counter, tot, skipped + not_classified
+
 # def analyze_pickle(filename):
 #     skipped = 0
 #     total_counter = {}
@@ -231,3 +1103,25 @@ def analyze_papers(directory):
 
 #     return total_counter,tot,skipped
 
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Tag each PDF of a directory with its most frequent animal term.")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--db", dest="db_path", help="SQLite results store for incremental runs.")
+    parser.add_argument("--rebuild", action="store_true", help="Reclassify every file and rewrite the results store.")
+    parser.add_argument("--timeout", type=float, help="Seconds a paper may take before it is quarantined.")
+    parser.add_argument("--max-tasks-per-worker", type=int, help="Replace each worker after this many papers.")
+    parser.add_argument("--max-memory-mb", type=float, help="Replace a worker once it uses this much memory.")
+    parser.add_argument("--quarantine", dest="quarantine_path", help="JSON list of papers that timed out or failed.")
+    parser.add_argument("--deduplicate", action="store_true", help="Classify each unique paper once, skipping supplements.")
+    parser.add_argument("--prefilter", action="store_true", help="Skip papers not in English or with no biology content.")
+    args = parser.parse_args()
+    total_counter,tot,skipped = analyze_papers(args.directory, workers=args.workers, db_path=args.db_path, rebuild=args.rebuild,
+                                               timeout=args.timeout, max_tasks_per_worker=args.max_tasks_per_worker,
+                                               max_memory_mb=args.max_memory_mb, quarantine_path=args.quarantine_path,
+                                               deduplicate=args.deduplicate, prefilter=args.prefilter)
+    print(total_counter)
+    print("Counted papers", tot)
+    print("Skipped papers", skipped)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# Command-line entry point for scripts and cron jobs, e.g.
+#     python scipaper_classify.py classify PAPERS_DIR --db results.sqlite --json
+#     python scipaper_classify.py stored results.sqlite --totals
+# Only the standard library is imported at start-up; each subcommand imports
+# what it needs, so --help and results-store queries never load fitz, spaCy
+# or pandas. Results go to stdout as JSON, progress lines to stderr.
+import os
+import sys
+import json
+import argparse
+import contextlib
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CLASSES = os.path.join(REPO_ROOT, "classes")
+
+def _use_old_files():
+    # reading_pdf and count_keywords import parse from old_files.
+    path = os.path.join(REPO_ROOT, "old_files")
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+def _emit(value, output):
+    output.write(json.dumps(value) + "\n")
+    output.flush()
+
+def _totals(total_counter, tot, skipped):
+    # analyze_papers counts untagged papers under False, which JSON cannot key.
+    counts = {term: count for term, count in total_counter.items() if term is not False}
+    return {"counts": counts, "counted": tot, "skipped": skipped}
+
+def run_classify(args, output):
+    """
+    Tag the papers of a directory or archive, printing the totals or, with
+    --jsonl, one line per paper as soon as it is classified.
+    """
+    import scipaper_classifier
+    settings = dict(workers=args.workers, classes_path=args.classes_path, cache_dir=args.cache_dir,
+                    backend=args.backend, max_pages=args.max_pages, max_chars=args.max_chars,
+                    metadata_titles=args.metadata_titles, timeout=args.timeout,
+                    max_tasks_per_worker=args.max_tasks_per_worker, max_memory_mb=args.max_memory_mb,
+                    quarantine_path=args.quarantine_path, prefilter=args.prefilter, matrix_path=args.matrix_path)
+    if args.jsonl:
+        results = scipaper_classifier.iter_classifications(args.directory, ordered=args.ordered, **settings)
+        scipaper_classifier.write_jsonl(results, output)
+        return
+    total_counter, tot, skipped = scipaper_classifier.analyze_papers(
+        args.directory, db_path=args.db_path, rebuild=args.rebuild, deduplicate=args.deduplicate, **settings)
+    if args.json:
+        _emit(_totals(total_counter, tot, skipped), output)
+    else:
+        output.write(f"{total_counter}\nCounted papers {tot}\nSkipped papers {skipped}\n")
+
+def run_stored(args, output):
+    """
+    Print the results kept in a results store, without opening any PDF.
+    """
+    from results_store import ResultsStore
+    if not os.path.exists(args.db_path):
+        raise SystemExit(f"No results store at {args.db_path}")
+    store = ResultsStore(args.db_path)
+    try:
+        rows = list(store.iter_results(args.directory))
+    finally:
+        store.close()
+    if not args.totals:
+        for path, result in rows:
+            _emit({"filename": os.path.basename(path), "path": path, **result}, output)
+        return
+    from scipaper_classifier import aggregate_results
+    _emit(_totals(*aggregate_results((os.path.basename(path), result["top_keyword"])
+                                     for path, result in rows)), output)
+
+def run_tool(args, output):
+    """
+    Find the papers that cite a tool, with the animals of each paper.
+    """
+    _use_old_files()
+    from reading_pdf import scan_papers_for_tool
+    papers = scan_papers_for_tool(args.directory, args.tool, args.classes_path, args.backend)
+    for filename, paper in papers.items():
+        if paper["cited"] or not args.cited_only:
+            _emit({"filename": filename, **paper}, output)
+
+def run_ris(args, output):
+    """
+    Count the top keyword of each entry of a RIS export.
+    """
+    _use_old_files()
+    from parse import count_keywords
+    _emit(count_keywords(args.file, exclude_others=not args.include_others, include_titles=args.titles,
+                         batch_size=args.batch_size, backend=args.backend, classes_path=args.classes_path), output)
+
+def run_taxonomy(args, output):
+    """
+    Group animal counts by a taxonomic rank, from the local taxonomy index or from NCBI.
+    """
+    from taxonomic_classification import group_animal_counts
+    animal_counts = {}
+    if args.counts:
+        with open(args.counts) as file:
+            loaded = json.load(file)
+        # Accepts a plain {animal: count} object or the output of classify --json.
+        animal_counts.update(loaded.get("counts", loaded) if isinstance(loaded, dict) else {})
+    for name in args.names:
+        animal_counts.setdefault(name, 1)
+    names = list(animal_counts)
+    if args.index:
+        from taxdump_index import TaxdumpIndex
+        with TaxdumpIndex(args.index) as index:
+            records = [index.classify(name, (args.rank.lower(),)) for name in names]
+    else:
+        from taxonomy_resolver import TaxonomyResolver
+        from taxonomic_classification import EMAIL
+        resolver = TaxonomyResolver(cache_path=args.cache_path, api_key=args.api_key, email=EMAIL)
+        try:
+            records = resolver.classify(names)
+        finally:
+            resolver.close()
+    groups = group_animal_counts(animal_counts, records, args.rank.capitalize())
+    for group, members in groups.items():
+        _emit({args.rank.capitalize(): group, "count": sum(count for animal, count in members),
+               "animals": dict(members)}, output)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="scipaper-classify",
+                                     description="Tag scientific papers with the animals they study.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    classify = subparsers.add_parser("classify", help="Tag each PDF of a directory or archive.")
+    classify.add_argument("directory")
+    classify.add_argument("--workers", type=int, default=1)
+    classify.add_argument("--classes", dest="classes_path", default=DEFAULT_CLASSES)
+    classify.add_argument("--backend", default="spacy", choices=["spacy", "aho-corasick"])
+    classify.add_argument("--cache-dir", help="Cache of extracted text for re-runs.")
+    classify.add_argument("--db", dest="db_path", help="SQLite results store for incremental runs.")
+    classify.add_argument("--rebuild", action="store_true", help="Reclassify every file and rewrite the results store.")
+    classify.add_argument("--max-pages", type=int, help="Page budget per paper.")
+    classify.add_argument("--max-chars", type=int, help="Character budget per paper.")
+    classify.add_argument("--metadata-titles", action="store_true", help="Also match the title in the PDF metadata.")
+    classify.add_argument("--timeout", type=float, help="Seconds a paper may take before it is quarantined.")
+    classify.add_argument("--max-tasks-per-worker", type=int, help="Replace each worker after this many papers.")
+    classify.add_argument("--max-memory-mb", type=float, help="Replace a worker once it uses this much memory.")
+    classify.add_argument("--quarantine", dest="quarantine_path", help="JSON list of papers that timed out or failed.")
+    classify.add_argument("--deduplicate", action="store_true", help="Classify each unique paper once, skipping supplements.")
+    classify.add_argument("--prefilter", action="store_true", help="Skip papers not in English or with no biology content.")
+    classify.add_argument("--matrix", dest="matrix_path", help="Directory to save the term matrix of the counts in.")
+    classify.add_argument("--json", action="store_true", help="Print the totals as one JSON object.")
+    classify.add_argument("--jsonl", action="store_true", help="Print one JSON line per paper instead of the totals.")
+    classify.add_argument("--ordered", action="store_true", help="With --jsonl, print papers in directory order.")
+    classify.set_defaults(run=run_classify)
+
+    stored = subparsers.add_parser("stored", help="Print the results kept in a results store.")
+    stored.add_argument("db_path")
+    stored.add_argument("--directory", help="Only the papers of this directory or archive.")
+    stored.add_argument("--totals", action="store_true", help="Print the totals instead of one line per paper.")
+    stored.set_defaults(run=run_stored)
+
+    tool = subparsers.add_parser("tool", help="Find the papers that cite a tool such as DeepLabCut.")
+    tool.add_argument("directory")
+    tool.add_argument("--tool", default="DeepLabCut")
+    tool.add_argument("--classes", dest="classes_path", default=DEFAULT_CLASSES)
+    tool.add_argument("--backend", default="spacy", choices=["spacy", "aho-corasick"])
+    tool.add_argument("--cited-only", action="store_true", help="Only print the papers that cite the tool.")
+    tool.set_defaults(run=run_tool)
+
+    ris = subparsers.add_parser("ris", help="Count the keywords of the entries of a RIS export.")
+    ris.add_argument("file")
+    ris.add_argument("--include-others", action="store_true", help="Also count entries with no keyword.")
+    ris.add_argument("--titles", action="store_true", help="List the titles of each keyword.")
+    ris.add_argument("--batch-size", type=int, default=256)
+    ris.add_argument("--backend", default="spacy", choices=["spacy", "aho-corasick"])
+    ris.add_argument("--classes", dest="classes_path", default=os.path.join(REPO_ROOT, "old_files", "classes"))
+    ris.set_defaults(run=run_ris)
+
+    taxonomy = subparsers.add_parser("taxonomy", help="Group animals by a taxonomic rank.")
+    taxonomy.add_argument("names", nargs="*", help="Animal names, each counted once.")
+    taxonomy.add_argument("--counts", help="JSON file of animal counts, such as the output of classify --json.")
+    taxonomy.add_argument("--rank", default="class")
+    taxonomy.add_argument("--index", help="Local index built by taxdump_index.py; without it NCBI is queried.")
+    taxonomy.add_argument("--api-key", help="NCBI API key.")
+    taxonomy.add_argument("--cache-path", default="taxonomy_cache.sqlite", help="Cache of NCBI answers.")
+    taxonomy.set_defaults(run=run_taxonomy)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    output = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        args.run(args, output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
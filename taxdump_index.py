@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import mmap
+import array
+import bisect
+import struct
+import tempfile
+
+# Bump when the file layout changes; older index files are then rejected.
+INDEX_VERSION = 1
+MAGIC = b"TAXIDX\0\0"
+# Name classes of names.dmp kept in the index, best first: when a name belongs
+# to several taxa, those with a better class come first.
+NAME_CLASSES = ["genbank common name", "common name", "scientific name", "synonym"]
+ROOT_TAXID = 1
+
+def _dump_rows(path):
+    # names.dmp and nodes.dmp rows are fields separated by "\t|\t" and ended by "\t|".
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.rstrip("\n")
+            if line.endswith("\t|"):
+                line = line[:-2]
+            yield line.split("\t|\t")
+
+def _strings(values):
+    # Offsets (len(values) + 1 of them) and the concatenated UTF-8 bytes.
+    offsets = array.array("Q", [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+def build_index(dump_dir, index_path, name_classes=NAME_CLASSES):
+    """
+    Build a taxonomy index from the NCBI taxdump files.
+
+    The index is a single file of flat arrays: the nodes sorted by tax ID with
+    their parent and rank, the scientific name of each node, and the names of
+    the wanted classes sorted case-insensitively. It is memory-mapped when
+    opened, so lookups read only the pages they touch.
+
+    Args:
+        dump_dir (str): The directory with names.dmp and nodes.dmp, from
+            https://ftp.ncbi.nlm.nih.gov/pub/taxonomy/taxdump.tar.gz or a small fixture.
+        index_path (str): Where to write the index.
+        name_classes (list of str): The name classes to index, best first.
+
+    Returns:
+        str: The path of the written index.
+    """
+    nodes = []
+    ranks = []
+    rank_numbers = {}
+    for row in _dump_rows(os.path.join(dump_dir, "nodes.dmp")):
+        rank = row[2]
+        if rank not in rank_numbers:
+            rank_numbers[rank] = len(ranks)
+            ranks.append(rank)
+        nodes.append((int(row[0]), int(row[1]), rank_numbers[rank]))
+    nodes.sort()
+
+    class_numbers = {name_class: number for number, name_class in enumerate(name_classes)}
+    scientific = {}
+    names = []
+    for row in _dump_rows(os.path.join(dump_dir, "names.dmp")):
+        taxid, name, name_class = int(row[0]), row[1], row[3]
+        if name_class == "scientific name":
+            scientific[taxid] = name
+        if name_class in class_numbers:
+            names.append((name.casefold(), class_numbers[name_class], taxid))
+    names.sort()
+
+    sci_offsets, sci_blob = _strings(scientific.get(taxid, "") for taxid, _, _ in nodes)
+    key_offsets, key_blob = _strings(key for key, _, _ in names)
+    sections = [
+        ("node_taxids", array.array("I", [taxid for taxid, _, _ in nodes])),
+        ("node_parents", array.array("I", [parent for _, parent, _ in nodes])),
+        ("node_ranks", array.array("H", [rank for _, _, rank in nodes])),
+        ("sci_offsets", sci_offsets),
+        ("sci_blob", sci_blob),
+        ("key_offsets", key_offsets),
+        ("key_blob", key_blob),
+        ("name_taxids", array.array("I", [taxid for _, _, taxid in names])),
+        ("name_classes", array.array("B", [name_class for _, name_class, _ in names])),
+    ]
+
+    layout = {}
+    position = 0
+    for name, data in sections:
+        raw = data.tobytes() if isinstance(data, array.array) else data
+        layout[name] = [position, len(raw), data.typecode if isinstance(data, array.array) else "B"]
+        # Keep every section 8-byte aligned so it can be cast in place.
+        position += len(raw) + (-len(raw) % 8)
+    header = json.dumps({"version": INDEX_VERSION, "byteorder": sys.byteorder, "ranks": ranks,
+                         "name_classes": list(name_classes), "sections": layout}).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)), suffix=".tmp")
+    with os.fdopen(fd, "wb") as file:
+        file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for name, data in sections:
+            raw = data.tobytes() if isinstance(data, array.array) else data
+            file.write(raw + b"\0" * (-len(raw) % 8))
+    os.replace(tmp_path, index_path)
+    return index_path
+
+class TaxdumpIndex:
+    """
+    Read-only, memory-mapped taxonomy index built by build_index.
+
+    Args:
+        index_path (str): The path to the index file.
+    """
+    def __init__(self, index_path):
+        self._file = open(index_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a taxonomy index: {index_path}")
+        header_size = struct.unpack_from("<I", self._map, len(MAGIC))[0]
+        start = len(MAGIC) + 4
+        header = json.loads(self._map[start:start + header_size])
+        if header["version"] != INDEX_VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError(f"Taxonomy index {index_path} must be rebuilt")
+        self.ranks = header["ranks"]
+        self.name_classes = header["name_classes"]
+        data = memoryview(self._map)[start + header_size:]
+        self._sections = {}
+        for name, (offset, length, typecode) in header["sections"].items():
+            self._sections[name] = data[offset:offset + length].cast(typecode)
+        self._taxids = self._sections["node_taxids"]
+        self._keys = _Keys(self._sections["key_offsets"], self._sections["key_blob"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # The section views must be released before the map can be closed.
+        for view in self._sections.values():
+            view.release()
+        self._sections = {}
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self._taxids)
+
+    def _node(self, taxid):
+        position = bisect.bisect_left(self._taxids, taxid)
+        if position == len(self._taxids) or self._taxids[position] != taxid:
+            return None
+        return position
+
+    def taxids(self, name, name_classes=None):
+        """
+        Return the taxa a name belongs to, ignoring case.
+
+        Args:
+            name (str): A common or scientific name.
+            name_classes (list of str, optional): Only consider these name classes.
+
+        Returns:
+            list of int: The tax IDs, best name class first.
+        """
+        key = name.casefold()
+        low = bisect.bisect_left(self._keys, key)
+        high = bisect.bisect_right(self._keys, key, low)
+        classes = self._sections["name_classes"]
+        found = []
+        for position in range(low, high):
+            if name_classes is None or self.name_classes[classes[position]] in name_classes:
+                taxid = self._sections["name_taxids"][position]
+                if taxid not in found:
+                    found.append(taxid)
+        return found
+
+    def taxid(self, name, name_classes=None):
+        """
+        Return the best tax ID of a name, or None if it is not in the index.
+        """
+        found = self.taxids(name, name_classes)
+        return found[0] if found else None
+
+    def scientific_name(self, taxid):
+        position = self._node(taxid)
+        if position is None:
+            return None
+        offsets = self._sections["sci_offsets"]
+        return bytes(self._sections["sci_blob"][offsets[position]:offsets[position + 1]]).decode("utf-8")
+
+    def rank(self, taxid):
+        position = self._node(taxid)
+        return None if position is None else self.ranks[self._sections["node_ranks"][position]]
+
+    def parent(self, taxid):
+        position = self._node(taxid)
+        return None if position is None else self._sections["node_parents"][position]
+
+    def lineage(self, taxid):
+        """
+        Walk from a taxon up to the root.
+
+        Args:
+            taxid (int): The tax ID.
+
+        Returns:
+            list of tuple: (tax ID, rank) of the taxon and each ancestor, the taxon first.
+        """
+        lineage = []
+        while taxid is not None and all(taxid != seen for seen, _ in lineage):
+            rank = self.rank(taxid)
+            if rank is None:
+                break
+            lineage.append((taxid, rank))
+            if taxid == ROOT_TAXID:
+                break
+            taxid = self.parent(taxid)
+        return lineage
+
+    def classify(self, name, ranks=("class", "order")):
+        """
+        Look up a name and the names of its ancestors at some ranks.
+
+        Args:
+            name (str): A common or scientific name.
+            ranks (iterable of str): The ranks to report.
+
+        Returns:
+            dict: The keys TaxId and ScientificName, and the capitalized name of each
+                rank found in the lineage, such as Class and Order; None if the name
+                is not in the index.
+        """
+        taxid = self.taxid(name)
+        if taxid is None:
+            return None
+        record = {"TaxId": taxid, "ScientificName": self.scientific_name(taxid)}
+        for ancestor, rank in self.lineage(taxid):
+            if rank in ranks:
+                record.setdefault(rank.capitalize(), self.scientific_name(ancestor))
+        return record
+
+class _Keys:
+    # Sequence view of the sorted name keys, for bisect.
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        return bytes(self.blob[self.offsets[position]:self.offsets[position + 1]]).decode("utf-8")
+
+if __name__ == "__main__":
+    # Build step: python taxdump_index.py DUMP_DIR [INDEX_PATH]
+    dump_dir = sys.argv[1]
+    index_path = sys.argv[2] if len(sys.argv) > 2 else "taxonomy.idx"
+    print("Built", build_index(dump_dir, index_path))
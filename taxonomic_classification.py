@@ -1,53 +1,84 @@
-import parse
-import pandas as pd
-from Bio import Entrez
-from Bio.Entrez import HTTPError
-
-Entrez.email = 'teruel.anna@gmail.com'
-
-def common_to_scientific_names(common_names):
-    scientific_names = []
-    
-    for common_name in common_names:
-        try:
-            handle = Entrez.esearch(db="taxonomy", term=f"{common_name}[Common Name]")
-            record = Entrez.read(handle)
-            handle.close()
-
-            if record["Count"] == "0":
-                scientific_names.append(None)
-            else:
-                taxid = record["IdList"][0]
-                handle = Entrez.efetch(db="taxonomy", id=taxid, retmode="xml")
-                records = Entrez.read(handle)
-                handle.close()
-                scientific_name = records[0]["ScientificName"]
-                scientific_names.append(scientific_name)
-        except Exception as e:
-            print(f"An error occurred for '{common_name}': {str(e)}")
-            scientific_names.append(None)
-    
-    return scientific_names
-
-def classify_animal(animal_list, api_key):
-    Entrez.api_key = api_key
-    results = []
-    for animal in animal_list:
-        try:
-            handle = Entrez.esearch(db="taxonomy", term=animal)
-            record = Entrez.read(handle)
-            taxid = record["IdList"][0]
-            handle = Entrez.efetch(db="taxonomy", id=taxid, retmode="xml")
-            records = Entrez.read(handle)
-            taxonomy_data = records[0]
-            results.append(taxonomy_data)
-        except HTTPError as e:
-            print(f"HTTPError for '{animal}': {e}")
-            results.append(None) 
-    
+from taxonomy_resolver import TaxonomyResolver
+from taxdump_index import TaxdumpIndex
+
+EMAIL = 'teruel.anna@gmail.com'
+
+def common_to_scientific_names(common_names, resolver=None):
+    """
+    Look up the scientific name of each common name in the NCBI taxonomy.
+
+    Args:
+        common_names (list of str): The common names.
+        resolver (TaxonomyResolver, optional): The resolver to use. Defaults to one
+            with the local cache in the working directory.
+
+    Returns:
+        list of str: The scientific name of each common name, or None if it was not found.
+    """
+    resolver = resolver or TaxonomyResolver(email=EMAIL)
+    records = resolver.classify(common_names, field="Common Name")
+    return [record["ScientificName"] if record else None for record in records]
+
+def classify_animal(animal_list, api_key, resolver=None):
+    """
+    Fetch the NCBI taxonomy record of each animal.
+
+    Args:
+        animal_list (list of str): The animal names, typically scientific names.
+        api_key (str): NCBI API key.
+        resolver (TaxonomyResolver, optional): The resolver to use. Defaults to one
+            with the local cache in the working directory.
+
+    Returns:
+        pandas.DataFrame: One row per animal, with the lineage ranks such as Class and Order as columns.
+    """
+    resolver = resolver or TaxonomyResolver(api_key=api_key, email=EMAIL)
+    import pandas as pd
+    results = resolver.classify(animal_list, field=None)
+    df = pd.DataFrame(results)
+    return df
+
+def classify_animal_offline(animal_list, index_path="taxonomy.idx", ranks=("class", "order")):
+    """
+    Classify animals with a local taxonomy index instead of NCBI requests.
+
+    Args:
+        animal_list (list of str): Common or scientific names.
+        index_path (str): The index built by taxdump_index.build_index.
+        ranks (iterable of str): The ranks to report.
+
+    Returns:
+        pandas.DataFrame: One row per animal, with CommonName, TaxId, ScientificName and
+            a column per rank such as Class and Order.
+    """
+    import pandas as pd
+    with TaxdumpIndex(index_path) as index:
+        results = [dict(index.classify(animal, ranks) or {}, CommonName=animal) for animal in animal_list]
     df = pd.DataFrame(results)
     return df
 
+def group_animal_counts(animal_counts, records, rank="Class"):
+    """
+    Group animal counts by a taxonomic rank, without pandas.
+
+    Args:
+        animal_counts (dict): Animal names mapped to their counts, such as the
+            total_counter of analyze_papers.
+        records (list of dict): The taxonomy record of each animal, in the order of
+            animal_counts, or None where the animal was not found.
+        rank (str): The record key to group by, such as "Class" or "Order".
+
+    Returns:
+        dict: Rank names mapped to lists of (animal, count) pairs sorted by count, largest
+            group first. Animals without the rank are grouped under None.
+    """
+    groups = {}
+    for (animal, count), record in zip(animal_counts.items(), records):
+        groups.setdefault((record or {}).get(rank), []).append((animal, count))
+    for members in groups.values():
+        members.sort(key=lambda member: member[1], reverse=True)
+    return dict(sorted(groups.items(), key=lambda group: sum(count for animal, count in group[1]), reverse=True))
+
 if __name__ == "__main__":
     animal_counts = {'mouse': 651, 'rat': 148, 'fly': 50, 'ant': 24, 'macaque': 18, 'dolphin': 2, 'bird': 29, 'fish': 72, 
                      'rabbit': 10, 'pig': 17, 'dog': 19, 'cobra': 1, 'monkey': 37, 'insect': 23, 'bug': 3, 'beetle': 4, 'rodent': 30, 
@@ -60,10 +91,10 @@ if __name__ == "__main__":
                      'flea': 1, 'snail': 1, 'alligator': 1, 'crocodile': 1, 'termite': 1, 'wasp': 1}
 
     common_names = list(animal_counts.keys())
-    scientific_names = common_to_scientific_names(common_names)
-
     api_key = 'YOUR_NCBI_API_KEY'  # Replace with your NCBI API key
-    classification_df = classify_animal(scientific_names, api_key)
+    resolver = TaxonomyResolver(api_key=api_key, email=EMAIL)
+    scientific_names = common_to_scientific_names(common_names, resolver)
+    classification_df = classify_animal(scientific_names, api_key, resolver)
 
     # Now you can group and sort the results by taxonomic group
     if not classification_df.empty:
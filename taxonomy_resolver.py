@@ -0,0 +1,257 @@
+import json
+import time
+import sqlite3
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+# NCBI allows 3 requests per second without an API key and 10 with one.
+RATE_WITHOUT_KEY = 3
+RATE_WITH_KEY = 10
+# Ranks copied from the lineage into each taxon record.
+RANKS = ["superkingdom", "kingdom", "phylum", "class", "order", "family", "genus"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS names (
+    term TEXT PRIMARY KEY,
+    taxid TEXT
+);
+CREATE TABLE IF NOT EXISTS taxa (
+    taxid TEXT PRIMARY KEY,
+    record TEXT NOT NULL
+);
+"""
+
+def urllib_fetch(url, params, timeout=30):
+    """
+    Send a GET request with the standard library.
+
+    This is the default HTTP layer of TaxonomyResolver. Any callable with the
+    same signature can replace it, for example to talk to a local stub server.
+
+    Args:
+        url (str): The URL without query string.
+        params (dict): The query parameters.
+        timeout (float): Seconds to wait for the server.
+
+    Returns:
+        bytes: The response body.
+    """
+    with urllib.request.urlopen(url + "?" + urllib.parse.urlencode(params), timeout=timeout) as response:
+        return response.read()
+
+def _retryable(error):
+    # Client errors other than rate limiting will fail again the same way.
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code == 429 or error.code >= 500
+    return isinstance(error, OSError)
+
+class RateLimiter:
+    """
+    Space out calls so no more than rate of them start per second, across threads.
+
+    Args:
+        rate (float): Calls allowed per second.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def parse_esearch(body):
+    """
+    Return the tax IDs of an esearch XML response.
+    """
+    root = ElementTree.fromstring(body)
+    return [element.text for element in root.findall("./IdList/Id")]
+
+def parse_taxa(body):
+    """
+    Parse an efetch taxonomy XML response.
+
+    Args:
+        body (bytes): The response body.
+
+    Returns:
+        dict: Tax IDs mapped to records with the keys TaxId, ScientificName, Rank,
+            Lineage and the capitalized name of each rank in RANKS found in the
+            lineage, such as Class and Order.
+    """
+    taxa = {}
+    for taxon in ElementTree.fromstring(body).findall("./Taxon"):
+        record = {
+            "TaxId": taxon.findtext("TaxId"),
+            "ScientificName": taxon.findtext("ScientificName"),
+            "Rank": taxon.findtext("Rank"),
+            "Lineage": taxon.findtext("Lineage"),
+        }
+        ancestors = [(ancestor.findtext("Rank"), ancestor.findtext("ScientificName"))
+                     for ancestor in taxon.findall("./LineageEx/Taxon")]
+        for rank, name in ancestors + [(record["Rank"], record["ScientificName"])]:
+            if rank in RANKS:
+                record[rank.capitalize()] = name
+        taxa[record["TaxId"]] = record
+    return taxa
+
+class TaxonomyResolver:
+    """
+    Resolve animal names to NCBI taxonomy records.
+
+    Every answer, including "not found", is kept in a local SQLite cache, so
+    names already resolved never go to the network again. Name searches run
+    concurrently, record fetches are batched, and all requests share one rate
+    limiter and retry transient failures with exponential backoff.
+
+    Args:
+        cache_path (str): The path to the SQLite cache file.
+        api_key (str, optional): NCBI API key, which raises the rate limit.
+        email (str, optional): Contact address sent to NCBI.
+        fetch (callable, optional): HTTP layer, called as fetch(url, params) and
+            returning the response body. Defaults to urllib_fetch.
+        base_url (str): The E-utilities base URL.
+        workers (int): Number of concurrent requests.
+        batch_size (int): Number of tax IDs per efetch request.
+        retries (int): Number of retries of a failed request.
+        backoff (float): Seconds before the first retry, doubled at each retry.
+        rate (float, optional): Requests per second. Defaults to NCBI's limit.
+    """
+    def __init__(self, cache_path="taxonomy_cache.sqlite", api_key=None, email=None, fetch=None,
+                 base_url=EUTILS_URL, workers=3, batch_size=200, retries=3, backoff=0.5, rate=None):
+        self.api_key = api_key
+        self.email = email
+        self.fetch = fetch or urllib_fetch
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = RateLimiter(rate or (RATE_WITH_KEY if api_key else RATE_WITHOUT_KEY))
+        # The connection is only used from the calling thread; worker threads
+        # only make requests.
+        self.connection = sqlite3.connect(cache_path)
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def _request(self, tool, params):
+        params = dict(params, db="taxonomy")
+        if self.api_key:
+            params["api_key"] = self.api_key
+        if self.email:
+            params["email"] = self.email
+        for attempt in range(self.retries + 1):
+            self.limiter.wait()
+            try:
+                return self.fetch(f"{self.base_url}/{tool}.fcgi", params)
+            except Exception as error:
+                if attempt == self.retries or not _retryable(error):
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _search(self, term):
+        ids = parse_esearch(self._request("esearch", {"term": term}))
+        return ids[0] if ids else None
+
+    def resolve_taxids(self, names, field="Common Name"):
+        """
+        Find the tax ID of each name.
+
+        Args:
+            names (list of str): The names to look up.
+            field (str, optional): The search field, such as "Common Name" or
+                "Scientific Name". None searches all fields.
+
+        Returns:
+            dict: Names mapped to their tax ID, or None if NCBI has no match. Names
+                whose lookup failed are left out, and are tried again next time.
+        """
+        terms = {name: f"{name}[{field}]" if field else name for name in names if name}
+        taxids = {}
+        missing = []
+        for name, term in terms.items():
+            row = self.connection.execute("SELECT taxid FROM names WHERE term = ?", (term,)).fetchone()
+            if row is None:
+                missing.append(name)
+            else:
+                taxids[name] = row[0]
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = {name: pool.submit(self._search, terms[name]) for name in dict.fromkeys(missing)}
+            for name, future in futures.items():
+                try:
+                    taxids[name] = future.result()
+                except Exception as e:
+                    print(f"An error occurred for '{name}': {str(e)}")
+                    continue
+                self.connection.execute("INSERT OR REPLACE INTO names (term, taxid) VALUES (?, ?)",
+                                        (terms[name], taxids[name]))
+        self.connection.commit()
+        return taxids
+
+    def fetch_taxa(self, taxids):
+        """
+        Fetch the taxonomy records of tax IDs, batch_size IDs per request.
+
+        Args:
+            taxids (iterable of str): The tax IDs.
+
+        Returns:
+            dict: Tax IDs mapped to their records (see parse_taxa). IDs whose fetch
+                failed are left out.
+        """
+        taxa = {}
+        missing = []
+        for taxid in dict.fromkeys(taxid for taxid in taxids if taxid):
+            row = self.connection.execute("SELECT record FROM taxa WHERE taxid = ?", (taxid,)).fetchone()
+            if row is None:
+                missing.append(taxid)
+            else:
+                taxa[taxid] = json.loads(row[0])
+
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(self._request, "efetch", {"id": ",".join(batch), "retmode": "xml"})
+                       for batch in batches]
+            for batch, future in zip(batches, futures):
+                try:
+                    fetched = parse_taxa(future.result())
+                except Exception as e:
+                    print(f"An error occurred for tax IDs {', '.join(batch)}: {str(e)}")
+                    continue
+                for taxid, record in fetched.items():
+                    taxa[taxid] = record
+                    self.connection.execute("INSERT OR REPLACE INTO taxa (taxid, record) VALUES (?, ?)",
+                                            (taxid, json.dumps(record)))
+        self.connection.commit()
+        return taxa
+
+    def classify(self, names, field="Common Name"):
+        """
+        Return the taxonomy record of each name.
+
+        Args:
+            names (list of str): The names to look up.
+            field (str, optional): The search field; see resolve_taxids.
+
+        Returns:
+            list of dict: The record of each name, in order, or None where the name
+                could not be resolved.
+        """
+        taxids = self.resolve_taxids(names, field)
+        taxa = self.fetch_taxa(taxids.values())
+        return [taxa.get(taxids.get(name)) for name in names]
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,275 @@
+import os
+import json
+import numpy as np
+from collections import Counter
+from keyword_engine import load_terms
+
+# Bump when the saved layout changes; older matrices are then rejected.
+MATRIX_VERSION = 1
+# Section of the counts taken from the file name.
+TITLE_SECTION = "Title"
+# Section of the counts classify_paper_details takes from the relevant sections
+# of a PDF, which it counts as a whole.
+SECTIONS_SECTION = "Sections"
+SOURCE_SECTIONS = {"title": TITLE_SECTION, "pdf": SECTIONS_SECTION}
+ARRAYS = ["indptr", "terms", "sections", "counts"]
+
+class TermMatrixBuilder:
+    """
+    Collect per-document, per-section term counts into a sparse matrix.
+
+    Term IDs follow the order of the classes file; terms outside it get IDs
+    after the last class.
+
+    Args:
+        terms (list of str): The vocabulary, typically load_terms("classes").
+    """
+    def __init__(self, terms):
+        self.term_list = list(terms)
+        self.term_ids = {term: number for number, term in enumerate(self.term_list)}
+        self.section_list = []
+        self.section_ids = {}
+        self.documents = []
+        self.indptr = [0]
+        self.terms = []
+        self.sections = []
+        self.counts = []
+
+    def _id(self, value, values, ids):
+        if value not in ids:
+            ids[value] = len(values)
+            values.append(value)
+        return ids[value]
+
+    def add(self, document, counts_by_section):
+        """
+        Add one document.
+
+        Args:
+            document (str): The document name, such as the PDF file name.
+            counts_by_section (dict): Section names mapped to {term: count}.
+        """
+        for section, counts in counts_by_section.items():
+            section_id = self._id(section, self.section_list, self.section_ids)
+            for term, count in counts.items():
+                if count:
+                    self.terms.append(self._id(term, self.term_list, self.term_ids))
+                    self.sections.append(section_id)
+                    self.counts.append(count)
+        self.documents.append(document)
+        self.indptr.append(len(self.counts))
+
+    def add_result(self, document, result):
+        """
+        Add one document from the counts the classification already computed, so
+        the matrix is built without reading any paper again.
+
+        The pipeline keeps no per-section counts: a paper tagged from its file name
+        has its title counts under Title, and a paper read from its PDF has the
+        counts of all its relevant sections under Sections. Papers that were
+        skipped, filtered or quarantined get an empty row. Excluding terms is
+        exact for papers read from their PDF; a title-tagged paper whose title
+        terms are all excluded becomes untagged, where the pipeline would have
+        read its PDF. build_term_matrix reads every paper with full provenance.
+
+        Args:
+            document (str): The document name, such as the PDF file name.
+            result (dict): The result with keys source and counts, as returned by
+                classify_paper_details or iter_classifications.
+        """
+        section = SOURCE_SECTIONS.get(result["source"])
+        self.add(document, {section: result["counts"]} if section else {})
+
+    def build(self):
+        return TermMatrix(
+            self.documents, self.term_list, self.section_list,
+            np.array(self.indptr, dtype=np.int64), np.array(self.terms, dtype=np.int32),
+            np.array(self.sections, dtype=np.int16), np.array(self.counts, dtype=np.int32))
+
+class TermMatrix:
+    """
+    Sparse document x term count matrix with the section of every count.
+
+    The nonzero entries of document d are positions indptr[d] to indptr[d + 1]
+    of the terms, sections and counts arrays, as in the CSR format. A term
+    found in two sections of a document has one entry per section.
+
+    Args:
+        documents (list of str): The document names, one per row.
+        term_list (list of str): The terms, indexed by term ID.
+        section_list (list of str): The sections, indexed by section ID.
+        indptr, terms, sections, counts (numpy.ndarray): The CSR arrays.
+    """
+    def __init__(self, documents, term_list, section_list, indptr, terms, sections, counts):
+        self.documents = list(documents)
+        self.term_list = list(term_list)
+        self.section_list = list(section_list)
+        self.indptr = indptr
+        self.terms = terms
+        self.sections = sections
+        self.counts = counts
+        # Rank of each term in alphabetical order, the tie-break of get_top_keyword.
+        self._alphabetical = np.argsort(np.argsort(np.array(self.term_list, dtype=object))) \
+            if self.term_list else np.zeros(0, dtype=np.int64)
+        self._rows = None
+
+    def __len__(self):
+        return len(self.documents)
+
+    def save(self, directory):
+        """
+        Save the matrix as .npy arrays and a meta.json file in a directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, name + ".npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w") as file:
+            json.dump({"version": MATRIX_VERSION, "documents": self.documents, "terms": self.term_list,
+                       "sections": self.section_list}, file)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Load a saved matrix.
+
+        Args:
+            directory (str): The directory given to save.
+            mmap (bool): If True, memory-map the arrays instead of reading them.
+
+        Returns:
+            TermMatrix: The matrix.
+        """
+        with open(os.path.join(directory, "meta.json")) as file:
+            meta = json.load(file)
+        if meta["version"] != MATRIX_VERSION:
+            raise ValueError(f"Term matrix in {directory} must be rebuilt")
+        arrays = [np.load(os.path.join(directory, name + ".npy"), mmap_mode="r" if mmap else None)
+                  for name in ARRAYS]
+        return cls(meta["documents"], meta["terms"], meta["sections"], *arrays)
+
+    def _row_of_entries(self):
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(len(self.documents), dtype=np.int64), np.diff(self.indptr))
+        return self._rows
+
+    def _ids(self, values, ids):
+        lookup = {value: number for number, value in enumerate(values)}
+        return np.array([lookup[value] for value in ids if value in lookup], dtype=np.int64)
+
+    def document_counts(self, document, sections=None):
+        """
+        Return the term counts of one document.
+
+        Args:
+            document (str): The document name.
+            sections (iterable of str, optional): Only count these sections; all if None.
+
+        Returns:
+            Counter: Terms mapped to their counts.
+        """
+        row = self.documents.index(document)
+        counts = Counter()
+        for position in range(self.indptr[row], self.indptr[row + 1]):
+            if sections is None or self.section_list[self.sections[position]] in sections:
+                counts[self.term_list[self.terms[position]]] += int(self.counts[position])
+        return counts
+
+    def rescore(self, exclude=(), sections=None):
+        """
+        Recompute the top keyword of every document and the totals, as
+        get_top_keyword and aggregate_results do, without re-reading any text.
+
+        Args:
+            exclude (iterable of str): Terms to ignore, such as the watch_terms of
+                old_files/read_pickle.py.
+            sections (iterable of str, optional): Only count these sections; all if None.
+
+        Returns:
+            tuple: A tuple containing four elements:
+                - dict: Document names mapped to their top keyword, or False if no
+                  term is left.
+                - dict: total_counter, top keywords mapped to the number of documents
+                  they won. As in aggregate_results, documents with no term left
+                  are counted under False.
+                - int: tot, the number of documents, tagged or not.
+                - int: Number of documents skipped for having no term left.
+        """
+        keep = np.ones(len(self.counts), dtype=bool)
+        excluded = self._ids(self.term_list, exclude)
+        if len(excluded):
+            keep &= ~np.isin(self.terms, excluded)
+        if sections is not None:
+            keep &= np.isin(self.sections, self._ids(self.section_list, sections))
+
+        # Sum each (document, term) over its sections.
+        n_terms = max(len(self.term_list), 1)
+        keys = self._row_of_entries()[keep] * n_terms + self.terms[keep]
+        keys, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.counts[keep], minlength=len(keys))
+        rows, terms = keys // n_terms, keys % n_terms
+
+        # Per document, the highest count wins and ties go to the first term alphabetically.
+        order = np.lexsort((self._alphabetical[terms], -totals, rows))
+        rows, terms = rows[order], terms[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        rows, terms = rows[first], terms[first]
+
+        winners = dict.fromkeys(self.documents, False)
+        for row, term in zip(rows.tolist(), terms.tolist()):
+            winners[self.documents[row]] = self.term_list[term]
+        wins = np.bincount(terms, minlength=len(self.term_list))
+        total_counter = {self.term_list[term]: int(wins[term]) for term in np.flatnonzero(wins)}
+        skipped = len(self.documents) - len(rows)
+        if skipped:
+            total_counter[False] = skipped
+        return winners, total_counter, len(self.documents), skipped
+
+def matrix_from_match_lists(match_lists, classes_path="classes", section="Other"):
+    """
+    Build a matrix from lists of raw matches, such as the animals_used.pkl
+    pickle read by old_files/read_pickle.py.
+
+    Args:
+        match_lists (dict): Document names mapped to lists of matched terms.
+        classes_path (str): The classes file that gives the term IDs.
+        section (str): The section to file the counts under.
+
+    Returns:
+        TermMatrix: The matrix.
+    """
+    builder = TermMatrixBuilder(load_terms(classes_path))
+    for document, matches in match_lists.items():
+        builder.add(document, {section: Counter(matches)})
+    return builder.build()
+
+def build_term_matrix(directory, classes_path="classes", backend="spacy"):
+    """
+    Scan every PDF of a directory and build its term matrix with section provenance.
+
+    Each paper is read once: its file name is matched as the Title section and
+    its text is split into sections (from the table of contents or detected
+    headings), text outside the named sections being filed under Other.
+    Supplementary files are skipped, as in analyze_papers.
+
+    Args:
+        directory (str): The path to the directory containing PDF files.
+        classes_path (str): The classes file with the animal terms.
+        backend (str): "spacy" or "aho-corasick".
+
+    Returns:
+        TermMatrix: The matrix, one row per paper in os.listdir order.
+    """
+    from multi_scan import MultiVocabularyScanner
+    from scipaper_classifier import list_pdf_files, isSupplementary, normalize_title
+
+    terms = load_terms(classes_path)
+    scanner = MultiVocabularyScanner({"animals": terms}, backend, classes_path)
+    builder = TermMatrixBuilder(terms)
+    for filename, file_path in list_pdf_files(directory):
+        if isSupplementary(file_path):
+            continue
+        counts_by_section = {TITLE_SECTION: Counter(term for _, term in scanner.match(normalize_title(file_path)))}
+        counts_by_section.update(scanner.scan_pdf(file_path)["animals"])
+        builder.add(filename, counts_by_section)
+    return builder.build()
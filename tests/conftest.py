@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The modules live at the repository root, and parse.py in old_files.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "old_files")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
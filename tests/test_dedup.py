@@ -0,0 +1,75 @@
+import os
+import pytest
+from conftest import REPO_ROOT
+
+fitz = pytest.importorskip("fitz")
+
+import dedup
+import scipaper_classifier
+from dedup import plan_unique
+from results_store import ResultsStore
+
+FIRST_PAGE = "Gait analysis of freely moving mice recorded in an open field arena over five days " * 3
+
+def _write_pdf(path, text, title=""):
+    document = fitz.open()
+    document.new_page().insert_text((72, 72), text)
+    document.set_metadata({"title": title})
+    document.save(path)
+    document.close()
+
+@pytest.fixture
+def corpus(tmp_path):
+    # paper_b re-downloads paper_a: same first page, different bytes.
+    _write_pdf(tmp_path / "paper_a_mice.pdf", FIRST_PAGE, "a")
+    _write_pdf(tmp_path / "paper_b_mice.pdf", FIRST_PAGE, "a re-download")
+    _write_pdf(tmp_path / "paper_a_supplement_1.pdf", "Supplementary figures")
+    (tmp_path / "paper_c_rat.pdf").write_text("not a pdf")
+    return tmp_path
+
+def _files(directory):
+    return scipaper_classifier.list_pdf_files(str(directory))
+
+def test_unreadable_files_are_kept_as_unique(corpus, capsys):
+    plan = plan_unique(_files(corpus))
+    unique = [filename for filename, file_path in plan.unique]
+    assert len(unique) == 2 and "paper_c_rat.pdf" in unique
+    assert len(plan.duplicates) == 1 and len(plan.supplements) == 1
+    assert "Could not read" in capsys.readouterr().out
+
+def test_skipped_paths_are_not_opened(corpus, capsys, monkeypatch):
+    broken = str(corpus / "paper_c_rat.pdf")
+    opened = []
+    signature = dedup.first_page_signature
+    monkeypatch.setattr(dedup, "first_page_signature", lambda path: opened.append(path) or signature(path))
+    plan = plan_unique(_files(corpus), skip={broken})
+    assert broken not in opened
+    assert broken in [file_path for filename, file_path in plan.unique]
+    assert "Could not read" not in capsys.readouterr().out
+
+def test_signatures_are_stored_until_the_file_changes(corpus, tmp_path):
+    path = str(corpus / "paper_a_mice.pdf")
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    assert store.lookup_signature(path) == (False, None)
+    signature = dedup.first_page_signature(path)
+    store.save_signature(path, signature)
+    assert store.lookup_signature(path) == (True, signature)
+    _write_pdf(path, "A different first page")
+    assert store.lookup_signature(path) == (False, None)
+    store.close()
+
+def test_incremental_runs_reuse_signatures_and_count_skipped_files(corpus, tmp_path, monkeypatch):
+    settings = dict(classes_path=os.path.join(REPO_ROOT, "classes"), backend="aho-corasick",
+                    db_path=str(tmp_path / "results.sqlite"), deduplicate=True)
+    first = scipaper_classifier.analyze_papers(str(corpus), **settings)
+    opened = []
+    signature = scipaper_classifier.first_page_signature
+    monkeypatch.setattr(scipaper_classifier, "first_page_signature", 
+                        lambda path: opened.append(path) or signature(path))
+    second = scipaper_classifier.analyze_papers(str(corpus), **settings)
+    assert second == first
+    # Only the file that could not be read is tried again.
+    assert opened == [str(corpus / "paper_c_rat.pdf")]
+    total_counter, tot, skipped = second
+    # The duplicate and the supplement, plus the unreadable paper that has no tag.
+    assert skipped == 2 + total_counter.get(False, 0)
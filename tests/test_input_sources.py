@@ -0,0 +1,51 @@
+import io
+import tarfile
+import zipfile
+import pytest
+import input_sources
+from input_sources import list_pdfs, read_bytes, source_stat
+
+MEMBERS = {"papers/mouse_gait.pdf": b"%PDF-1.4 mouse", "papers/rat_maze.pdf": b"%PDF-1.4 rat", "README": b"notes"}
+
+@pytest.fixture(autouse=True)
+def close_archives():
+    yield
+    input_sources.close_archives()
+
+def _tar(path, mode):
+    with tarfile.open(path, mode) as archive:
+        for name, data in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 1700000000
+            archive.addfile(info, io.BytesIO(data))
+    return str(path)
+
+def _zip(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in MEMBERS.items():
+            archive.writestr(name, data)
+    return str(path)
+
+@pytest.mark.parametrize("make", [lambda tmp_path: _zip(tmp_path / "corpus.zip"),
+                                  lambda tmp_path: _tar(tmp_path / "corpus.tar", "w")])
+def test_members_are_read_in_any_order(tmp_path, make):
+    archive = make(tmp_path)
+    files = list_pdfs(archive)
+    assert [filename for filename, path in files] == ["mouse_gait.pdf", "rat_maze.pdf"]
+    for filename, path in reversed(files):
+        member = path.split("::")[1]
+        assert read_bytes(path) == MEMBERS[member]
+        assert source_stat(path)[0] == len(MEMBERS[member])
+
+@pytest.mark.parametrize("name, mode", [("corpus.tar.gz", "w:gz"), ("corpus.tar.bz2", "w:bz2")])
+def test_compressed_tars_are_rejected(tmp_path, name, mode):
+    archive = _tar(tmp_path / name, mode)
+    with pytest.raises(ValueError, match="compressed tar archive"):
+        list_pdfs(archive)
+
+def test_broken_archives_are_reported_as_such(tmp_path):
+    path = tmp_path / "corpus.tar"
+    path.write_bytes(b"not an archive" * 100)
+    with pytest.raises(tarfile.ReadError):
+        list_pdfs(str(path))
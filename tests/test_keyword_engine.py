@@ -0,0 +1,87 @@
+import random
+import pytest
+from keyword_engine import KeywordMatcher, token_boundaries
+
+TERMS = ["rat", "rats", "mouse", "mice", "ant", "fly", "sea urchin", "guinea pig"]
+
+# (text, matched_texts of the spaCy PhraseMatcher on an English tokenizer).
+PARITY_CASES = [
+    # Hyphens split between letters, not before a digit.
+    ("rat-2 and mouse-1", []),
+    ("a rat-like mouse", ["rat", "mouse"]),
+    ("ant-eater", ["ant"]),
+    ("10-mouse", ["mouse"]),
+    ("rat--mouse", ["rat", "mouse"]),
+    ("rat—mouse", ["rat", "mouse"]),
+    ("sea-urchin", []),
+    # Digits and letters stay together.
+    ("rat2", []),
+    ("5rats", []),
+    ("Fig.2rat", []),
+    # URLs and e-mail addresses are one token.
+    ("http://rat.org/mouse", []),
+    ("see www.mouse.com today", []),
+    ("mouse@rat.org", []),
+    # Abbreviations: a period between lower-case letters does not split.
+    ("e.g.rat", []),
+    ("U.S.rat", []),
+    ("i.e. mice", ["mice"]),
+    ("rat.mouse", []),
+    ("rat.Mouse", ["rat"]),
+    # Other punctuation.
+    ("mice/rats", ["mice", "rats"]),
+    ("rat/s", ["rat"]),
+    ("rats,mice", ["rats", "mice"]),
+    ("rat:mouse", ["rat", "mouse"]),
+    ("rat_mouse", []),
+    ("_rat_", ["rat"]),
+    ("rat's mouse’s", ["rat", "mouse"]),
+    ("(rats)", ["rats"]),
+    ("[mouse]", ["mouse"]),
+    ('"rat"', ["rat"]),
+    ("rats.", ["rats"]),
+    ("mice...", ["mice"]),
+    ("rat…mouse", ["rat", "mouse"]),
+    ("mouse(s)", []),
+    ("rats%", []),
+    ("+rat", ["rat"]),
+    # Whole tokens only, case-sensitive, one space inside a phrase.
+    ("ratmouse", []),
+    ("elephant ants", []),
+    ("guinea pigs", []),
+    ("Rat RAT rat", ["rat"]),
+    ("sea urchin.", ["sea urchin"]),
+    ("sea  urchin", []),
+    ("fly\nfly", ["fly", "fly"]),
+]
+
+@pytest.mark.parametrize("text, expected", PARITY_CASES)
+def test_matches_follow_spacy_token_boundaries(text, expected):
+    assert KeywordMatcher(TERMS).match(text) == expected
+
+def test_token_boundaries():
+    assert token_boundaries("(rats).") == {0, 1, 5, 6, 7}
+    assert token_boundaries("rat-like") == {0, 3, 4, 8}
+    assert token_boundaries("http://rat.org/mouse") == {0, 20}
+
+def _random_texts(count, seed=0):
+    rng = random.Random(seed)
+    words = TERMS + ["the", "e.g.", "Fig.", "http://www.", ".org", "2", "A", "x", "U.S."]
+    punctuation = list(" -/.,;:()[]'\"!?…–—~+*=<>_&%$#@") + ["'s", "...", "--", "  ", "\n", "://"]
+    for _ in range(count):
+        parts = [rng.choice(words) if rng.random() < 0.55 else rng.choice(punctuation)
+                 for _ in range(rng.randint(1, 8))]
+        yield "".join(parts)
+
+def test_parity_with_spacy_tokenizer():
+    spacy = pytest.importorskip("spacy")
+    from spacy.matcher import PhraseMatcher
+    nlp = spacy.blank("en")
+    phrase_matcher = PhraseMatcher(nlp.vocab)
+    phrase_matcher.add("terms", list(nlp.tokenizer.pipe(TERMS)))
+    matcher = KeywordMatcher(TERMS)
+    texts = [text for text, _ in PARITY_CASES] + list(_random_texts(3000))
+    for text in texts:
+        doc = nlp.tokenizer(text)
+        expected = sorted(doc[start:end].text for _, start, end in phrase_matcher(doc))
+        assert sorted(matcher.match(text)) == expected, text
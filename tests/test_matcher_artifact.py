@@ -0,0 +1,47 @@
+import os
+import pytest
+from conftest import REPO_ROOT
+import matcher_artifact
+from matcher_artifact import load_matcher
+
+CLASSES = os.path.join(REPO_ROOT, "classes")
+
+def _matches(nlp, matcher, text):
+    if nlp is None:
+        return [text[start:end] for start, end in matcher.find(text)]
+    doc = nlp.make_doc(text)
+    return [doc[start:end].text for match_id, start, end in matcher(doc)]
+
+def test_unreadable_artifact_falls_back_to_compiling(tmp_path, monkeypatch):
+    monkeypatch.setattr(matcher_artifact, "_read_artifact", lambda path, backend: None)
+    nlp, matcher = load_matcher(CLASSES, "aho-corasick", artifact_dir=str(tmp_path))
+    assert _matches(nlp, matcher, "Two mice and a rat.") == ["mice", "rat"]
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    # A saved blank English pipeline stands in for en_core_web_sm: it has the
+    # same tokenizer, which is all fast mode uses.
+    spacy = pytest.importorskip("spacy")
+    path = str(tmp_path / "model")
+    spacy.blank("en").to_disk(path)
+    monkeypatch.setattr(matcher_artifact, "MODEL_NAME", path)
+    return spacy
+
+def test_fast_mode_does_not_load_the_model(model, tmp_path, monkeypatch):
+    artifact_dir = str(tmp_path / "artifacts")
+    built = load_matcher(CLASSES, "spacy", artifact_dir=artifact_dir)
+    def fail(*args, **kwargs):
+        raise AssertionError("the model was loaded")
+    monkeypatch.setattr(model, "load", fail)
+    nlp, matcher = load_matcher(CLASSES, "spacy", artifact_dir=artifact_dir)
+    text = "Mice, rats and C. elegans were tested; the rat-like mouse-lemur was not."
+    assert _matches(nlp, matcher, text) == _matches(*built, text)
+    assert _matches(nlp, matcher, text) == ["rats", "rat", "mouse"]
+
+def test_model_version_change_rebuilds_the_artifact(model, tmp_path, monkeypatch):
+    artifact_dir = str(tmp_path / "artifacts")
+    load_matcher(CLASSES, "spacy", artifact_dir=artifact_dir)
+    path = matcher_artifact.artifact_path(CLASSES, "spacy", artifact_dir)
+    assert matcher_artifact._read_artifact(path, "spacy") is not None
+    monkeypatch.setattr(matcher_artifact, "model_version", lambda: "9.9.9")
+    assert matcher_artifact._read_artifact(path, "spacy") is None
@@ -0,0 +1,37 @@
+import os
+import json
+import pytest
+from conftest import REPO_ROOT
+from matcher_artifact import MODEL_NAME
+from scipaper_classifier import load_nlp_and_matcher, match_texts, compare_fast_match, compare_backends
+
+CLASSES = os.path.join(REPO_ROOT, "classes")
+
+# Titles and methods sentences with the phrases the original full-pipeline
+# tokenize_and_match returns for them.
+with open(os.path.join(os.path.dirname(__file__), "fixtures", "match_samples.json"), encoding="utf-8") as file:
+    SAMPLES = json.load(file)
+TEXTS = [sample["text"] for sample in SAMPLES]
+EXPECTED = [sample["matches"] for sample in SAMPLES]
+
+def _require_model():
+    spacy = pytest.importorskip("spacy")
+    if not spacy.util.is_package(MODEL_NAME):
+        pytest.skip(f"{MODEL_NAME} is not installed")
+
+def test_aho_corasick_reproduces_recorded_matches():
+    nlp, matcher = load_nlp_and_matcher(CLASSES, backend="aho-corasick")
+    assert match_texts(TEXTS, matcher, nlp) == EXPECTED
+
+def test_fast_mode_reproduces_recorded_matches():
+    _require_model()
+    nlp, matcher = load_nlp_and_matcher(CLASSES, fast=True)
+    assert match_texts(TEXTS, matcher, nlp) == EXPECTED
+
+def test_fast_mode_matches_full_pipeline():
+    _require_model()
+    assert compare_fast_match(TEXTS, CLASSES) == []
+
+def test_backends_agree():
+    _require_model()
+    assert compare_backends(TEXTS, CLASSES) == []
@@ -0,0 +1,15 @@
+import os
+from conftest import REPO_ROOT
+from multi_scan import MultiVocabularyScanner, default_vocabularies
+
+CLASSES = os.path.join(REPO_ROOT, "classes")
+TEXT = "Poses of mice were tracked with DeepLabCut2.0 (DeepLabCut; Mathis et al.)."
+
+def test_tools_are_found_inside_longer_tokens():
+    scanner = MultiVocabularyScanner(default_vocabularies(CLASSES), "aho-corasick", CLASSES,
+                                     substring_vocabularies=["tools"])
+    assert sorted(scanner.match(TEXT)) == [("animals", "mice"), ("tools", "DeepLabCut"), ("tools", "DeepLabCut")]
+
+def test_token_vocabularies_follow_token_boundaries():
+    scanner = MultiVocabularyScanner(default_vocabularies(CLASSES), "aho-corasick", CLASSES)
+    assert sorted(scanner.match(TEXT)) == [("animals", "mice"), ("tools", "DeepLabCut")]
@@ -0,0 +1,63 @@
+import os
+from conftest import REPO_ROOT
+from scipaper_classifier import load_nlp_and_matcher, count_matches_in_pages, get_top_keyword_from_counts
+
+nlp, matcher = load_nlp_and_matcher(os.path.join(REPO_ROOT, "classes"), backend="aho-corasick")
+
+class _Pages(list):
+    # A list of pages that records how many of them are iterated over.
+    read = 0
+
+    def __iter__(self):
+        for page in super().__iter__():
+            self.read += 1
+            yield page
+
+def _read(pages, **budget):
+    read = []
+    def lazy_pages():
+        for page in pages:
+            read.append(page)
+            yield page
+    return count_matches_in_pages(lazy_pages(), matcher, nlp, **budget), len(read)
+
+def test_character_budget_does_not_cut_words():
+    counts, _ = _read(["the rats ran"], max_chars=7)
+    assert counts == {}
+    counts, _ = _read(["the rats ran", "mice"], max_chars=8)
+    assert counts == {"rats": 1}
+
+def test_no_budget_reads_every_page():
+    counts, read = _read(["mice mice mice mice rat"] * 20)
+    assert read == 20
+    assert counts == {"mice": 80, "rat": 20}
+
+def test_character_budget_stops_once_the_lead_is_safe():
+    counts, read = _read(["mice mice mice mice rat"] * 20, max_chars=20 * 23)
+    assert read < 20
+    assert get_top_keyword_from_counts(counts) == "mice"
+
+def test_page_budget_stops_early_only_when_the_pages_are_known():
+    pages = ["mice mice mice mice rat"] + ["the arena"] * 9
+    _, read = _read(pages, max_pages=10)
+    assert read == 10
+    known = _Pages(pages)
+    assert count_matches_in_pages(known, matcher, nlp, max_pages=10) == {"mice": 4, "rat": 1}
+    assert known.read == 10
+    # Nine pages of 9 characters hold at most 45 mentions.
+    known = _Pages(["mice " * 50] + ["the arena"] * 9)
+    assert count_matches_in_pages(known, matcher, nlp, max_pages=10) == {"mice": 50}
+    assert known.read == 1
+
+def test_a_richer_late_page_is_not_missed():
+    pages = ["mouse mouse"] * 3 + ["rat " * 10]
+    for budget in [dict(max_pages=4), dict(max_chars=sum(map(len, pages)))]:
+        counts, read = _read(pages, **budget)
+        assert get_top_keyword_from_counts(counts) == "rat"
+        counts = count_matches_in_pages(pages, matcher, nlp, **budget)
+        assert counts == {"mouse": 6, "rat": 10}
+
+def test_close_counts_are_read_to_the_end_of_the_budget():
+    counts, read = _read(["mice rat"] * 10, max_pages=10)
+    assert read == 10
+    assert counts == {"mice": 10, "rat": 10}
@@ -0,0 +1,70 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+import instrumentation
+from pdf_sections import LAYOUT_PROBE_PAGES, SectionIndex
+from scipaper_classifier import plan_pdf_texts
+
+def _document(pages):
+    document = fitz.open()
+    for lines in pages:
+        page = document.new_page()
+        for number, (text, size) in enumerate(lines):
+            page.insert_text((72, 72 + 24 * number), text, fontsize=size)
+    return document
+
+def _plan(document):
+    instrumentation.enable()
+    try:
+        with SectionIndex(document, cache_pages=False) as index:
+            texts = list(plan_pdf_texts(index))
+    finally:
+        counters = instrumentation.disable().counters
+    return texts, counters["layout_pages"], counters["pages"]
+
+def test_layout_search_stops_without_headings():
+    document = _document([[(f"Page {number} of plain text about the mouse.", 11)] for number in range(10)])
+    texts, layout_pages, pages = _plan(document)
+    assert layout_pages == LAYOUT_PROBE_PAGES
+    # The fallback reads pages 0, 1 and 3 to 6; pages 0 and 1 keep their text from the search.
+    assert pages == 4
+    assert [text.split()[1] for text in texts] == ["0", "1", "3", "4", "5", "6"]
+
+def test_layout_headings_are_still_found():
+    body = [("Body text of the paper.", 11)]
+    pages = [[("INTRODUCTION", 16)] + body] + [body] * 6 + [[("METHODS", 16), ("Mice were tested.", 11)]] + [body]
+    texts, layout_pages, extracted = _plan(_document(pages))
+    assert texts == ["Mice were tested.", "Body text of the paper."]
+    assert extracted == 0
+
+def test_deeplabcut_fallback_reuses_the_pages_searched(tmp_path):
+    from reading_pdf import check_deeplabcut_citation
+    pdf_path = str(tmp_path / "paper.pdf")
+    _document([[(f"Page {number} tracked with DeepLabCut.", 11)] for number in range(10)]).save(pdf_path)
+    instrumentation.enable()
+    try:
+        cited, full_text = check_deeplabcut_citation(pdf_path)
+    finally:
+        counters = instrumentation.disable().counters
+    assert cited and "Page 9" in full_text
+    assert counters["layout_pages"] == LAYOUT_PROBE_PAGES
+    assert counters["pages"] == 10 - LAYOUT_PROBE_PAGES
+
+def test_each_paper_records_one_path(tmp_path):
+    from conftest import REPO_ROOT
+    from matcher_artifact import load_matcher
+    from scipaper_classifier import count_pdf_matches
+    from text_cache import TextCache
+    nlp, matcher = load_matcher(f"{REPO_ROOT}/classes", "aho-corasick")
+    cache = TextCache(str(tmp_path / "cache"))
+    short = str(tmp_path / "short.pdf")
+    _document([[("Two mice.", 11)]] * 2).save(short)
+    paths = []
+    for _ in range(2):
+        instrumentation.enable()
+        try:
+            assert count_pdf_matches(short, matcher, nlp, cache) is None
+        finally:
+            paths.append(dict(instrumentation.disable().paths))
+    assert paths == [{"skip": 1}, {"cache": 1}]
@@ -0,0 +1,23 @@
+from prefilter import biology_signal, skip_reason
+
+ECONOMICS = ("The rate of innovation and the ratio of investment to output have both risen over the last "
+             "decade. We propose a model in which firms compose their portfolios to pose less risk, motor "
+             "vehicle producers separate from the cellphone industry, and the tracking error of funds "
+             "depends on the generation of new patents. The estimates suggest that this evolution of "
+             "prices is driven by competition among firms in the same market.")
+
+BEHAVIOR = ("We recorded the locomotion of freely moving rats in an open field and estimated their posture "
+            "with markerless pose estimation. Neural activity in the motor cortex was imaged while the "
+            "animals explored the arena, and the behavior of each rat was scored over five sessions to "
+            "relate the gait of the rodents to the activity of cortical cells in both hemispheres.")
+
+def test_stems_of_other_words_are_not_biology():
+    assert biology_signal("rate ratio rated pose propose motor cellphone generation evolution") == 0
+    assert biology_signal("rat rats pose estimation motor cortex cells") == 5
+
+def test_non_biology_paper_is_skipped():
+    assert skip_reason(ECONOMICS) == "no biology signal"
+
+def test_biology_paper_is_read():
+    assert biology_signal(BEHAVIOR) > 5
+    assert skip_reason(BEHAVIOR) is None
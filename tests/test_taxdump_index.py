@@ -0,0 +1,38 @@
+import os
+import pytest
+from conftest import REPO_ROOT
+from taxdump_index import TaxdumpIndex, build_index
+from taxonomic_classification import group_animal_counts
+
+DUMP_DIR = os.path.join(REPO_ROOT, "tests", "fixtures", "taxdump")
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    index_path = build_index(DUMP_DIR, str(tmp_path_factory.mktemp("taxonomy") / "taxonomy.idx"))
+    with TaxdumpIndex(index_path) as index:
+        yield index
+
+def test_classify_common_name(index):
+    assert index.classify("Mouse") == {"TaxId": 10090, "ScientificName": "Mus musculus",
+                                       "Order": "Rodentia", "Class": "Mammalia"}
+    assert index.classify("zebrafish", ("class",)) == {"TaxId": 7955, "ScientificName": "Danio rerio",
+                                                       "Class": "Actinopteri"}
+    assert index.classify("unicorn") is None
+
+def test_names_of_any_class_and_case(index):
+    assert index.taxid("norway RAT") == 10116
+    assert index.taxid("Brachydanio rerio") == 7955
+    assert index.taxid("Brachydanio rerio", ["scientific name"]) is None
+
+def test_lineage_reaches_the_root(index):
+    lineage = index.lineage(7227)
+    assert lineage[0] == (7227, "species")
+    assert lineage[-1] == (1, "no rank")
+    assert (50557, "class") in lineage
+    assert len(index) == 22
+
+def test_group_animal_counts_by_class(index):
+    animal_counts = {"mouse": 5, "fruit fly": 3, "rat": 2, "unicorn": 1}
+    records = [index.classify(name) for name in animal_counts]
+    assert group_animal_counts(animal_counts, records) == {
+        "Mammalia": [("mouse", 5), ("rat", 2)], "Insecta": [("fruit fly", 3)], None: [("unicorn", 1)]}
@@ -0,0 +1,101 @@
+import threading
+import urllib.error
+import pytest
+from taxonomy_resolver import TaxonomyResolver
+
+# Canned E-utilities answers: common names to tax IDs, and tax IDs to
+# (scientific name, class, order).
+TAXIDS = {"mouse": "10090", "rat": "10116", "zebrafish": "7955", "fruit fly": "7227", "macaque": "9544"}
+TAXA = {"10090": ("Mus musculus", "Mammalia", "Rodentia"), "10116": ("Rattus norvegicus", "Mammalia", "Rodentia"),
+        "7955": ("Danio rerio", "Actinopteri", "Cypriniformes"), "7227": ("Drosophila melanogaster", "Insecta", "Diptera"),
+        "9544": ("Macaca mulatta", "Mammalia", "Primates")}
+
+def _taxon(taxid):
+    name, class_name, order = TAXA[taxid]
+    return (f"<Taxon><TaxId>{taxid}</TaxId><ScientificName>{name}</ScientificName><Rank>species</Rank>"
+            f"<Lineage>cellular organisms; Eukaryota; {class_name}; {order}</Lineage><LineageEx>"
+            f"<Taxon><TaxId>1</TaxId><ScientificName>{class_name}</ScientificName><Rank>class</Rank></Taxon>"
+            f"<Taxon><TaxId>2</TaxId><ScientificName>{order}</ScientificName><Rank>order</Rank></Taxon>"
+            f"</LineageEx></Taxon>")
+
+class StubFetch:
+    """
+    Stand-in for urllib_fetch that answers from TAXIDS and TAXA and records each request.
+
+    Args:
+        failures (dict): Search terms mapped to the HTTP status codes returned,
+            one per request, before the term is answered.
+    """
+    def __init__(self, failures=None):
+        self.failures = {term: list(codes) for term, codes in (failures or {}).items()}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url, params):
+        tool = url.rsplit("/", 1)[1].split(".")[0]
+        key = params.get("term") or params.get("id")
+        with self._lock:
+            self.requests.append((tool, key))
+            codes = self.failures.get(key)
+            code = codes.pop(0) if codes else None
+        if code is not None:
+            raise urllib.error.HTTPError(url, code, "stub failure", {}, None)
+        if tool == "esearch":
+            name = params["term"].split("[")[0]
+            ids = f"<Id>{TAXIDS[name]}</Id>" if name in TAXIDS else ""
+            return f"<eSearchResult><IdList>{ids}</IdList></eSearchResult>".encode()
+        return ("<TaxaSet>" + "".join(_taxon(taxid) for taxid in params["id"].split(",")) + "</TaxaSet>").encode()
+
+    def count(self, tool):
+        return sum(1 for requested, key in self.requests if requested == tool)
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "taxonomy_cache.sqlite")
+
+def _resolver(cache_path, fetch, **settings):
+    return TaxonomyResolver(cache_path, fetch=fetch, rate=1000, backoff=0.001, **settings)
+
+def test_records_are_fetched_in_batches(cache_path):
+    fetch = StubFetch()
+    resolver = _resolver(cache_path, fetch, batch_size=2)
+    records = resolver.classify(["mouse", "rat", "zebrafish", "fruit fly", "macaque", "unicorn", "mouse"])
+    resolver.close()
+    assert [record and record["Class"] for record in records] == [
+        "Mammalia", "Mammalia", "Actinopteri", "Insecta", "Mammalia", None, "Mammalia"]
+    assert records[0]["ScientificName"] == "Mus musculus" and records[0]["Order"] == "Rodentia"
+    assert fetch.count("esearch") == 6
+    batches = [key.split(",") for tool, key in fetch.requests if tool == "efetch"]
+    assert sorted(len(batch) for batch in batches) == [1, 2, 2]
+    assert sorted(sum(batches, [])) == sorted(TAXIDS.values())
+
+def test_cached_answers_are_not_requested_again(cache_path):
+    resolver = _resolver(cache_path, StubFetch())
+    first = resolver.classify(["mouse", "unicorn"])
+    resolver.close()
+    fetch = StubFetch()
+    resolver = _resolver(cache_path, fetch)
+    # "unicorn" was not found; that answer is cached too.
+    assert resolver.classify(["mouse", "unicorn"]) == first
+    assert fetch.requests == []
+    assert resolver.classify(["mouse", "rat"])[1]["TaxId"] == "10116"
+    resolver.close()
+    assert fetch.requests == [("esearch", "rat[Common Name]"), ("efetch", "10116")]
+
+def test_transient_failures_are_retried(cache_path):
+    fetch = StubFetch({"rat[Common Name]": [503, 429], "10116": [500]})
+    resolver = _resolver(cache_path, fetch, retries=2)
+    assert resolver.classify(["rat"])[0]["Class"] == "Mammalia"
+    resolver.close()
+    assert fetch.requests == [("esearch", "rat[Common Name]")] * 3 + [("efetch", "10116")] * 2
+
+def test_failed_names_are_tried_again_next_time(cache_path, capsys):
+    fetch = StubFetch({"rat[Common Name]": [503, 503], "mouse[Common Name]": [400]})
+    resolver = _resolver(cache_path, fetch, retries=1)
+    assert resolver.classify(["rat", "mouse"]) == [None, None]
+    # Client errors are not retried.
+    assert fetch.requests.count(("esearch", "mouse[Common Name]")) == 1
+    assert fetch.requests.count(("esearch", "rat[Common Name]")) == 2
+    assert "An error occurred for 'rat'" in capsys.readouterr().out
+    assert resolver.classify(["rat", "mouse"])[0]["Class"] == "Mammalia"
+    resolver.close()
@@ -0,0 +1,46 @@
+import os
+from collections import Counter
+import pytest
+from conftest import REPO_ROOT
+
+pytest.importorskip("numpy")
+
+import scipaper_classifier
+from term_matrix import TermMatrix, TermMatrixBuilder
+
+CLASSES = os.path.join(REPO_ROOT, "classes")
+
+def test_results_are_filed_by_source():
+    builder = TermMatrixBuilder(["mouse", "rat", "human"])
+    builder.add_result("a.pdf", {"top_keyword": "mouse", "source": "title", "counts": Counter(mouse=1)})
+    builder.add_result("b.pdf", {"top_keyword": "human", "source": "pdf", "counts": Counter(human=9, rat=4)})
+    builder.add_result("c.pdf", {"top_keyword": False, "source": "quarantine", "counts": Counter()})
+    matrix = builder.build()
+    assert matrix.document_counts("a.pdf", ["Title"]) == {"mouse": 1}
+    assert matrix.document_counts("b.pdf", ["Sections"]) == {"human": 9, "rat": 4}
+    assert matrix.document_counts("c.pdf") == {}
+    winners, total_counter, tot, skipped = matrix.rescore(exclude=["human"])
+    assert winners == {"a.pdf": "mouse", "b.pdf": "rat", "c.pdf": False}
+    assert (total_counter, tot, skipped) == ({"mouse": 1, "rat": 1, False: 1}, 3, 1)
+
+def test_analyze_papers_saves_its_counts(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    corpus = tmp_path / "papers"
+    corpus.mkdir()
+    # Papers tagged from their file name are never opened.
+    for name in ["mouse_gait.pdf", "rat_and_mouse_rat.pdf", "monkey_reaching.pdf"]:
+        (corpus / name).write_bytes(b"")
+    # This one is read and stays untagged.
+    document = fitz.open()
+    for number in range(4):
+        document.new_page().insert_text((72, 72), f"Page {number} of a survey of river sediments.")
+    document.save(str(corpus / "sediment_survey.pdf"))
+    matrix_path = str(tmp_path / "matrix")
+    total_counter, tot, skipped = scipaper_classifier.analyze_papers(
+        str(corpus), classes_path=CLASSES, backend="aho-corasick", matrix_path=matrix_path)
+    matrix = TermMatrix.load(matrix_path)
+    assert sorted(matrix.documents) == sorted(os.listdir(corpus))
+    winners, rescored_counter, rescored_tot, rescored_skipped = matrix.rescore()
+    assert (rescored_counter, rescored_tot, rescored_skipped) == (total_counter, tot, skipped)
+    assert (tot, skipped) == (4, 1) and winners["sediment_survey.pdf"] is False
+    assert matrix.document_counts("rat_and_mouse_rat.pdf") == {"rat": 2, "mouse": 1}
@@ -0,0 +1,79 @@
+import os
+import time
+from conftest import REPO_ROOT
+import scipaper_classifier
+from matcher_artifact import load_matcher
+from worker_pool import Quarantine, SupervisedPool
+
+CLASSES = os.path.join(REPO_ROOT, "classes")
+
+def _work(task):
+    if task == "sleep":
+        time.sleep(30)
+    elif task == "crash":
+        os._exit(3)
+    elif task == "error":
+        raise ValueError("bad task")
+    return task * 2
+
+def _outcomes(pool, tasks):
+    return {task: (status, value) for index, task, status, value in pool.imap_unordered(tasks)}
+
+def test_a_task_past_its_deadline_is_killed():
+    with SupervisedPool(2, _work, timeout=0.5) as pool:
+        outcomes = _outcomes(pool, ["sleep", "ab"])
+    status, elapsed = outcomes["sleep"]
+    assert status == "timeout" and 0.5 <= elapsed < 30
+    assert outcomes["ab"] == ("ok", "abab")
+    assert pool.recycled == 1
+
+def test_crashes_and_errors_do_not_stop_the_batch():
+    with SupervisedPool(1, _work) as pool:
+        outcomes = _outcomes(pool, ["crash", "error", "ab"])
+    assert outcomes == {"crash": ("crash", 3), "error": ("error", "ValueError: bad task"), "ab": ("ok", "abab")}
+    assert pool.recycled == 1
+
+def test_workers_are_recycled_after_their_task_limit():
+    with SupervisedPool(1, _work, max_tasks_per_worker=2) as pool:
+        outcomes = _outcomes(pool, ["a", "b", "c", "d", "e"])
+    assert outcomes == {task: ("ok", task * 2) for task in "abcde"}
+    assert pool.recycled == 2
+
+def test_quarantine_applies_until_the_file_changes(tmp_path):
+    paper = tmp_path / "paper.pdf"
+    paper.write_bytes(b"%PDF-1.4")
+    path = str(tmp_path / "quarantine.json")
+    Quarantine(path).add(str(paper), "timeout after 60.0s")
+    quarantine = Quarantine(path)
+    assert str(paper) in quarantine
+    assert quarantine.reason(str(paper)) == "timeout after 60.0s"
+    paper.write_bytes(b"%PDF-1.4 replaced")
+    assert str(paper) not in quarantine
+
+def test_quarantined_papers_are_not_opened_for_their_metadata_title(tmp_path, monkeypatch):
+    corpus = tmp_path / "papers"
+    corpus.mkdir()
+    for name in ["hangs.pdf", "untitled.pdf"]:
+        (corpus / name).write_bytes(b"%PDF-1.4")
+    quarantine_path = str(tmp_path / "quarantine.json")
+    Quarantine(quarantine_path).add(str(corpus / "hangs.pdf"), "timeout after 60.0s")
+    # The log is a file so that reads in the forked workers are seen too.
+    log = tmp_path / "opened.txt"
+    def read_metadata_title(file_path):
+        with open(log, "a") as file:
+            file.write(os.path.basename(file_path) + "\n")
+        return "gait of the mouse"
+    monkeypatch.setattr(scipaper_classifier, "read_metadata_title", read_metadata_title)
+    results = scipaper_classifier.iter_classifications(
+        str(corpus), workers=2, classes_path=CLASSES, backend="aho-corasick", metadata_titles=True,
+        timeout=30, quarantine_path=quarantine_path)
+    tags = {result["filename"]: (result["top_keyword"], result["source"]) for result in results}
+    assert tags == {"hangs.pdf": (False, "quarantine"), "untitled.pdf": ("mouse", "title")}
+    assert log.read_text().split() == ["untitled.pdf"]
+
+def test_an_unreadable_pdf_is_a_metadata_title_miss(tmp_path, capsys):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf at all")
+    nlp, matcher = load_matcher(CLASSES, "aho-corasick")
+    assert scipaper_classifier.match_titles([("broken.pdf", str(broken))], matcher, nlp, metadata_titles=True) == {}
+    assert "Could not read the metadata of" in capsys.readouterr().out
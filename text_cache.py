@@ -0,0 +1,168 @@
+import os
+import json
+import zlib
+import hashlib
+import tempfile
+import instrumentation
+from input_sources import content_hash
+
+# Bump when the way text is extracted from a PDF changes, so stale entries
+# are never served.
+EXTRACTION_VERSION = 2
+
+_VALUE = b"V"
+_SKIP = b"S"
+
+def file_content_hash(path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 digest of a file's content.
+
+    Args:
+        path (str): The path to the file, or an archive member (see input_sources).
+        chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    return content_hash(path, chunk_size)
+
+class TextCache:
+    """
+    On-disk cache of text extracted from PDFs.
+
+    Entries are keyed by the PDF content hash and the extraction settings,
+    so renamed or re-downloaded copies hit the same entry and a change of
+    settings never returns stale text. Values are any JSON-serializable
+    extraction result, typically the list of page texts, and are stored
+    zlib-compressed. When the cache grows past max_bytes the least recently
+    used entries are removed.
+
+    Args:
+        directory (str): The directory holding the cache entries.
+        max_bytes (int): Size cap of the cache directory in bytes.
+        level (int): zlib compression level.
+    """
+    def __init__(self, directory, max_bytes=2 * 1024**3, level=6):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    def key(self, pdf_path, settings):
+        """
+        Build the cache key of a PDF for the given extraction settings.
+
+        Args:
+            pdf_path (str): The path to the PDF file.
+            settings (object): Anything whose repr identifies the extraction settings.
+
+        Returns:
+            str: The cache key.
+        """
+        content_hash = file_content_hash(pdf_path)
+        settings_repr = repr((EXTRACTION_VERSION, settings))
+        return hashlib.sha256((content_hash + settings_repr).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up an entry.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            tuple: (found, value). value is None when the PDF was recorded as skipped.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            self.misses += 1
+            instrumentation.count("cache_misses")
+            return False, None
+        # Touch the entry so eviction sees it as recently used.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        instrumentation.count("cache_hits")
+        if data[:1] == _SKIP:
+            return True, None
+        return True, json.loads(zlib.decompress(data[1:]).decode("utf-8"))
+
+    def put(self, key, value):
+        """
+        Store an entry, evicting least recently used entries if the cache is full.
+
+        Args:
+            key (str): The cache key.
+            value (object): The extraction result, or None to record that the PDF was skipped.
+        """
+        if value is None:
+            data = _SKIP
+        else:
+            data = _VALUE + zlib.compress(json.dumps(value).encode("utf-8"), self.level)
+        # Write to a temporary file and rename it, so concurrent workers never
+        # read a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, self._path(key))
+        self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache is below its size cap.
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        size = sum(entry_size for _, _, entry_size in entries)
+        for path, _, entry_size in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+    def get_or_extract(self, pdf_path, settings, extract):
+        """
+        Return the cached extraction of a PDF, extracting and storing it on a miss.
+
+        Args:
+            pdf_path (str): The path to the PDF file.
+            settings (object): The extraction settings, part of the cache key.
+            extract (callable): Called with pdf_path on a miss; returns the value or None.
+
+        Returns:
+            object: The extraction result, or None if the PDF was skipped.
+        """
+        key = self.key(pdf_path, settings)
+        found, value = self.get(key)
+        if found:
+            return value
+        value = extract(pdf_path)
+        self.put(key, value)
+        return value
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".z")
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".z"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import multiprocessing
+from multiprocessing.connection import wait
+from input_sources import source_stat
+
+def _rss_bytes():
+    # Current resident memory of this process. /proc is read on Linux; other
+    # platforms only expose the peak, which is a safe over-estimate here.
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def _worker_loop(connection, func, initializer, initargs):
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        try:
+            reply = ("ok", func(task))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        connection.send(reply + (_rss_bytes(),))
+    connection.close()
+
+class _Worker:
+    def __init__(self, context, func, initializer, initargs):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(child, func, initializer, initargs), daemon=True)
+        self.process.start()
+        child.close()
+        self.tasks_done = 0
+        self.task = None
+        self.started = None
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+        self.connection.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+class SupervisedPool:
+    """
+    Process pool that protects a batch from pathological inputs.
+
+    Each task runs under a wall-clock deadline; a worker that misses it is
+    killed, which also cancels work stuck inside C code such as MuPDF, and
+    a fresh worker takes its place. Workers are also replaced after a number
+    of tasks or once their memory grows past a threshold, so memory held by
+    native libraries is given back during long runs.
+
+    Args:
+        processes (int): Number of worker processes.
+        func (callable): Called with each task in a worker.
+        initializer (callable, optional): Called with initargs when a worker starts.
+        initargs (tuple): Arguments of initializer.
+        timeout (float, optional): Seconds each task may take.
+        max_tasks_per_worker (int, optional): Tasks after which a worker is replaced.
+        max_memory_mb (float, optional): Resident memory after which a worker is replaced.
+        context (multiprocessing context, optional): Defaults to the platform default.
+    """
+    def __init__(self, processes, func, initializer=None, initargs=(), timeout=None, max_tasks_per_worker=None,
+                 max_memory_mb=None, context=None):
+        self.processes = processes
+        self.func = func
+        self.initializer = initializer
+        self.initargs = initargs
+        self.timeout = timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_memory = max_memory_mb * 1024 * 1024 if max_memory_mb else None
+        self.context = context or multiprocessing.get_context()
+        self.recycled = 0
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for worker in self._workers:
+            if worker.task is None:
+                worker.stop()
+            else:
+                worker.kill()
+                worker.connection.close()
+        self._workers = []
+
+    def _start_worker(self):
+        worker = _Worker(self.context, self.func, self.initializer, self.initargs)
+        self._workers.append(worker)
+        return worker
+
+    def _replace(self, worker, kill=False):
+        self._workers.remove(worker)
+        if kill:
+            worker.kill()
+            worker.connection.close()
+        else:
+            worker.stop()
+        self.recycled += 1
+
+    def imap_unordered(self, tasks):
+        """
+        Run tasks and yield their outcomes as they finish.
+
+        Args:
+            tasks (iterable): The tasks, sent to func one by one.
+
+        Yields:
+            tuple: (index of the task, task, status, value), where status is "ok" with
+                the return value of func, "error" with the exception message,
+                "timeout" with the seconds elapsed, or "crash" with the exit code
+                of the worker.
+        """
+        pending = enumerate(tasks)
+        exhausted = False
+        while True:
+            while not exhausted and sum(worker.task is not None for worker in self._workers) < self.processes:
+                task = next(pending, None)
+                if task is None:
+                    exhausted = True
+                    break
+                idle = [worker for worker in self._workers if worker.task is None]
+                worker = idle[0] if idle else self._start_worker()
+                worker.task = task
+                worker.started = time.monotonic()
+                worker.connection.send(task[1])
+
+            busy = [worker for worker in self._workers if worker.task is not None]
+            if not busy:
+                return
+            wait_for = None
+            if self.timeout is not None:
+                deadline = min(worker.started for worker in busy) + self.timeout
+                wait_for = max(deadline - time.monotonic(), 0)
+            ready = wait([worker.connection for worker in busy], wait_for)
+
+            for worker in busy:
+                (index, task), elapsed = worker.task, time.monotonic() - worker.started
+                if worker.connection in ready:
+                    try:
+                        status, value, rss = worker.connection.recv()
+                    except (EOFError, OSError):
+                        worker.process.join()
+                        worker.task = None
+                        self._replace(worker, kill=True)
+                        yield index, task, "crash", worker.process.exitcode
+                        continue
+                    worker.task = None
+                    worker.tasks_done += 1
+                    if ((self.max_tasks_per_worker and worker.tasks_done >= self.max_tasks_per_worker) or
+                            (self.max_memory and rss > self.max_memory)):
+                        self._replace(worker)
+                    yield index, task, status, value
+                elif self.timeout is not None and elapsed >= self.timeout:
+                    worker.task = None
+                    self._replace(worker, kill=True)
+                    yield index, task, "timeout", elapsed
+
+class Quarantine:
+    """
+    Persistent list of files that timed out, crashed or failed, so later runs
+    skip them. An entry only applies while the file keeps the same size and
+    modification time; a replaced file is tried again.
+
+    Args:
+        path (str, optional): The JSON file holding the list. None keeps it in memory only.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path) as file:
+                self.entries = json.load(file)
+
+    def __contains__(self, file_path):
+        entry = self.entries.get(os.path.abspath(file_path))
+        if entry is None:
+            return False
+        return (entry["size"], entry["mtime"]) == source_stat(file_path)
+
+    def reason(self, file_path):
+        entry = self.entries.get(os.path.abspath(file_path))
+        return entry["reason"] if entry else None
+
+    def add(self, file_path, reason):
+        """
+        Quarantine a file and save the list.
+
+        Args:
+            file_path (str): The path to the offending file.
+            reason (str): Why it was quarantined, such as "timeout after 60.0s".
+        """
+        size, mtime = source_stat(file_path)
+        self.entries[os.path.abspath(file_path)] = {"reason": reason, "size": size, "mtime": mtime}
+        self.save()
+
+    def remove(self, file_path):
+        if self.entries.pop(os.path.abspath(file_path), None) is not None:
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)